@@ -13,6 +13,37 @@ def check_probability(instance, attribute, value):
         raise ValueError("probability must be a float in range [0,1]")
 
 
+# ---------------------------------------------------------------------------- #
+#                                 scale factors                                #
+# ---------------------------------------------------------------------------- #
+
+SCALE_FACTORS = (1, 10, 100)
+
+# sizes at scale factor 1. Every size is multiplied by the scale factor, so
+# tables keep the same ratios at every scale. Work orders are capped at half
+# of the maintenance slots each, so their counts don't depend on the draws
+SCALE_FACTOR_SIZES = {
+    "size": 1000,
+    "flight_slots_size": 1000,
+    "maintenance_slots_size": 1000,
+    "forecasted_orders_size": 500,
+    "tlb_orders_size": 500,
+    "work_packages_size": 1000,
+    "fleet_size": 20,
+    "personnel_list_size": 500,
+}
+
+
+def scale_sizes(scale_factor: int) -> T.Dict[str, T.Any]:
+    """The sizes of every table at a scale factor, e.g. BaseConfig(**scale_sizes(10))"""
+    if scale_factor < 1:
+        raise ValueError("scale factor must be a positive integer")
+    sizes = {k: v * scale_factor for k, v in SCALE_FACTOR_SIZES.items()}
+    # sequential registration codes, random ones collide in large fleets
+    sizes["fleet_start"] = 0
+    return sizes
+
+
 @attr.s(auto_attribs=True)
 class BaseConfig:
     """A configuration class to control the generation process"""
@@ -26,6 +57,7 @@ class BaseConfig:
     size: int = 1000  # base size
     flight_slots_size: T.Optional[int] = None
     maintenance_slots_size: T.Optional[int] = None
+    # at most this many orders of each kind, and packages
     tlb_orders_size: T.Optional[int] = None
     forecasted_orders_size: T.Optional[int] = None
     work_packages_size: T.Optional[int] = None
@@ -33,9 +65,25 @@ class BaseConfig:
     # maintenance_events_size is controlled by maintenance_slots_size
     max_attach_size: int = 1
     max_work_packages: int = 1
+    # work orders per maintenance event
     max_work_orders: int = 1
     proba_forecast_order: float = 0.5
 
+    # how slots are generated. "random" draws each slot independently, and fixes
+    # overlapping flights afterwards (R20). "timeline" walks the timeline of each
+    # aircraft, so that none of its slots overlap by construction
+    engine: str = attr.ib("random", validator=attr.validators.in_(("random", "timeline")))
+
+    # R8: serial ids are handed out in contiguous blocks of this size
+    id_block_size: int = 10000
+    # this run is shard `shard` of `num_shards`, and only takes its share of
+    # the id blocks. See scripts/distributed.py
+    shard: int = 0
+    num_shards: int = 1
+    # if set, aircraft get sequential registration codes from this index on,
+    # so that the fleets of different shards don't overlap
+    fleet_start: T.Optional[int] = None
+
     # ---------------------------------------------------------------------------- #
     #                            other sensible defaults                           #
     # ---------------------------------------------------------------------------- #
@@ -61,6 +109,56 @@ class BaseConfig:
     prob_bad: T.Optional[float] = None
     prob_good: T.Optional[float] = None
 
+    # if True, rows are generated clean and corrupted afterwards, column by
+    # column, with exact noisy and bad rates. See scripts/corruption.py
+    corruption_pass: bool = False
+
+    # if True, the provider uses its own implementations of lexify, numerify,
+    # uuid4, pybool and random datetimes instead of Faker's. See AirportProvider
+    fast_primitives: bool = False
+
+    # ---------------------------------------------------------------------------- #
+    #                                memory controls                               #
+    # ---------------------------------------------------------------------------- #
+
+    # if set, finished tables are spilled to disk when the tables held in
+    # memory go over this budget. See scripts/store.py
+    max_memory_mb: T.Optional[float] = None
+    # parent folder of the spilled tables, the system default if None
+    spill_dir: T.Optional[str] = None
+    # if True, finished tables are kept as columns, and low-cardinality ones
+    # as codes into a shared vocabulary. Rows are rebuilt when read
+    compact_tables: bool = False
+    # if True, finished tables are moved to memory-mapped column files in
+    # spill_dir, which later stages and the sinks read from
+    mapped_tables: bool = False
+
+    # ---------------------------------------------------------------------------- #
+    #                                     cache                                    #
+    # ---------------------------------------------------------------------------- #
+
+    # if set, generated tables are cached in this folder, keyed by a hash of
+    # this config and the package version. See scripts/cache.py
+    cache_dir: T.Optional[str] = None
+    # least recently used entries are evicted over this size
+    cache_max_mb: float = 1024.0
+
+    # if set, the tables and random state are saved to this folder after every
+    # stage, and a later run with the same folder resumes from the last
+    # completed stage. See scripts/checkpoint.py
+    checkpoint_dir: T.Optional[str] = None
+
+    # ---------------------------------------------------------------------------- #
+    #                                instrumentation                               #
+    # ---------------------------------------------------------------------------- #
+
+    # if set, per-stage metrics are written to this JSON file
+    metrics_path: T.Optional[str] = None
+    # how to report progress: a tqdm "bar", "log" lines for batch jobs, or "none"
+    progress: str = attr.ib("bar", validator=attr.validators.in_(("bar", "log", "none")))
+    # progress is updated once per chunk of rows, not per row
+    progress_chunk_size: int = 1000
+
     # ---------------------------------------------------------------------------- #
     #                              database parameters                             #
     # ---------------------------------------------------------------------------- #
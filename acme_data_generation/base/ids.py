@@ -0,0 +1,144 @@
+import typing as T
+from collections import defaultdict
+
+import attr
+
+__doc__ = """Serial identifiers for the tables that require them (R8).
+
+Identifiers are handed out in contiguous blocks. Each table has its own
+sequence, and each shard (or worker) owns a disjoint, strided subset of the
+blocks of every sequence, so that ids are unique by construction and parallel
+generators only need to agree on `block_size` and `num_shards` beforehand.
+
+For `num_shards=2` and `block_size=3`, ids are distributed like
+
+    shard 0: 1 2 3 . . . 7 8 9 . . .
+    shard 1: . . . 4 5 6 . . . 10 11 12
+"""
+
+
+class IdBlockExhausted(Exception):
+    """Raised when an IdBlock has no ids left"""
+
+
+@attr.s(auto_attribs=True)
+class IdBlock:
+    """A contiguous range of ids [start, stop)"""
+
+    start: int
+    stop: int
+    cursor: int = attr.ib(default=None)
+
+    def __attrs_post_init__(self):
+        if self.cursor is None:
+            self.cursor = self.start
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def remaining(self) -> int:
+        return self.stop - self.cursor
+
+    def next_id(self) -> int:
+        if self.cursor >= self.stop:
+            raise IdBlockExhausted(f"block [{self.start}, {self.stop}) is exhausted")
+        value = self.cursor
+        self.cursor += 1
+        return value
+
+
+class IdAllocator:
+    """Allocates serial ids per table, in blocks reserved for a single shard
+
+    >>> ids = IdAllocator(block_size=100)
+    >>> ids.next_id("workorders"), ids.next_id("workorders")
+    (1, 2)
+    >>> ids.next_id("workpackages")
+    1
+    """
+
+    def __init__(
+        self,
+        block_size: int = 10000,
+        shard: int = 0,
+        num_shards: int = 1,
+        start: T.Union[int, T.Dict[str, int]] = 1,
+    ):
+        if block_size < 1:
+            raise ValueError("block_size must be a positive integer")
+        if not (0 <= shard < num_shards):
+            raise ValueError("shard must be in range [0, num_shards)")
+
+        self.block_size = block_size
+        self.shard = shard
+        self.num_shards = num_shards
+
+        # first id of each sequence, e.g. the high-water mark of an existing
+        # dataset plus one
+        self._default_start = 1 if isinstance(start, dict) else start
+        self._start = defaultdict(
+            lambda: self._default_start, start if isinstance(start, dict) else {})
+
+        # number of blocks already reserved by this shard, per table
+        self._reserved: T.Dict[str, int] = defaultdict(int)
+        self._current: T.Dict[str, IdBlock] = {}
+        self._last: T.Dict[str, int] = {}
+
+    def block_bounds(self, table: str, index: int) -> T.Tuple[int, int]:
+        """Returns the bounds of the `index`-th block owned by this shard"""
+        global_index = index * self.num_shards + self.shard
+        start = self._start[table] + global_index * self.block_size
+        return start, start + self.block_size
+
+    def owner(self, table: str, value: int) -> T.Optional[int]:
+        """Returns the shard whose blocks hold the id `value` of `table`, or
+        None if it is before the start of the sequence"""
+        offset = value - self._start[table]
+        if offset < 0:
+            return None
+        return offset // self.block_size % self.num_shards
+
+    def reserve(self, table: str) -> IdBlock:
+        """Reserves the next block of ids of `table` for this shard"""
+        start, stop = self.block_bounds(table, self._reserved[table])
+        self._reserved[table] += 1
+        block = IdBlock(start=start, stop=stop)
+        self._current[table] = block
+        return block
+
+    def next_id(self, table: str) -> int:
+        """Returns the next id of `table`, reserving a new block if needed"""
+        block = self._current.get(table)
+        if block is None or block.remaining == 0:
+            block = self.reserve(table)
+        self._last[table] = block.next_id()
+        return self._last[table]
+
+    def high_water_marks(self) -> T.Dict[str, int]:
+        """Returns the largest id handed out so far, per table"""
+        return dict(self._last)
+
+    def getstate(self) -> T.Dict[str, T.Any]:
+        """The state of the allocator as plain JSON types, see setstate"""
+        return {
+            "block_size": self.block_size,
+            "shard": self.shard,
+            "num_shards": self.num_shards,
+            "default_start": self._default_start,
+            "start": dict(self._start),
+            "reserved": dict(self._reserved),
+            "current": {t: attr.astuple(b) for t, b in self._current.items()},
+            "last": dict(self._last),
+        }
+
+    def setstate(self, state: T.Dict[str, T.Any]) -> None:
+        """Restores a state returned by getstate, ids continue where they were"""
+        self.block_size = state["block_size"]
+        self.shard = state["shard"]
+        self.num_shards = state["num_shards"]
+        self._default_start = state["default_start"]
+        self._start = defaultdict(lambda: self._default_start, state["start"])
+        self._reserved = defaultdict(int, state["reserved"])
+        self._current = {t: IdBlock(*b) for t, b in state["current"].items()}
+        self._last = dict(state["last"])
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+__doc__ = """Timestamps as integer seconds since the unix epoch
+
+The provider generates and shifts timestamps as plain integers, which are
+cheaper to add, compare and sort than datetime and timedelta objects, and
+converts them to naive datetimes only when building the entities.
+
+>>> to_epoch(datetime(2010, 1, 1))
+1262304000
+>>> from_epoch(1262304000 + seconds(hours=2))
+datetime.datetime(2010, 1, 1, 2, 0)
+"""
+
+EPOCH = datetime(1970, 1, 1)
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+def seconds(days: int = 0, hours: int = 0, minutes: int = 0) -> int:
+    return days * DAY + hours * HOUR + minutes * MINUTE
+
+
+def to_seconds(duration: timedelta) -> int:
+    """Whole seconds of a duration"""
+    return duration // timedelta(seconds=1)
+
+
+def to_epoch(timestamp: datetime) -> int:
+    """Seconds since the epoch of a naive datetime, read as UTC"""
+    return (timestamp - EPOCH) // timedelta(seconds=1)
+
+
+def from_epoch(epoch: int) -> datetime:
+    """The naive datetime of an epoch timestamp, read as UTC"""
+    return EPOCH + timedelta(seconds=epoch)
+
@@ -1,14 +1,19 @@
 import argparse
 import logging
+import time
+import typing as T
 from pathlib import Path
 
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.engine.base import Engine
-from sqlalchemy.engine.url import URL
+from acme_data_generation.base.config import SCALE_FACTORS, BaseConfig, scale_sizes
+from acme_data_generation.scripts.profiling import PROFILERS, StageProfiler
+from acme_data_generation.scripts.progress import REPORTERS
 
-from acme_data_generation.base.config import BaseConfig
-from acme_data_generation.scripts.db_utils import create_all, delete_all, get_session
-from acme_data_generation.scripts.generate import AircraftGenerator
+if T.TYPE_CHECKING:
+    from sqlalchemy.engine.base import Engine
+
+# Faker, the providers, the models and SQLAlchemy take most of the startup
+# time, so they are imported by the sub-commands that need them. This keeps
+# `--help` and argument errors instant. See tests/test_cli.py
 
 logging.basicConfig(level=logging.INFO)
 
@@ -17,6 +22,7 @@ logging.basicConfig(level=logging.INFO)
 # default path definitions
 basepath = Path(__file__).parent
 default_output_path = basepath.parent.joinpath("out")
+default_checks_paths = sorted(basepath.parent.joinpath("tests-fixes").glob("*-checks.sql"))
 
 
 # ---------------------------------------------------------------------------- #
@@ -24,33 +30,99 @@ default_output_path = basepath.parent.joinpath("out")
 # ---------------------------------------------------------------------------- #
 
 
-def to_csv(args):
+def get_profiler(args) -> T.Optional[StageProfiler]:
+    if args.profile is None:
+        return None
+    return StageProfiler(args.profile, args.profile_out, top=args.profile_top)
 
-    config = BaseConfig(
-        size=args.rows,
-        prob_good=(1 - (args.prob_noisy + args.prob_bad)),
+
+def print_profile(profiler: T.Optional[StageProfiler]) -> None:
+    if profiler is not None:
+        print(profiler.summary())
+        logging.info(f"Profiles written to {profiler.out_dir}")
+
+
+def get_sizes(args) -> T.Dict[str, int]:
+    """Sizes of every table at args.scale_factor, if given, or args.rows"""
+    if args.scale_factor is None:
+        return {"size": args.rows}
+    return scale_sizes(args.scale_factor)
+
+
+def resume_config(args) -> BaseConfig:
+    """The settings of the run in args.resume, reported as asked in args"""
+    from acme_data_generation.scripts.checkpoint import RunCheckpoint
+
+    logging.info(f"Resuming the run in {args.resume}, generation arguments are ignored")
+    return RunCheckpoint(args.resume).config(
+        progress=args.progress, metrics_path=args.metrics_out)
+
+
+def generation_config(args) -> BaseConfig:
+    """The BaseConfig of the csv and sql sub-commands"""
+    if args.resume is not None:
+        return resume_config(args)
+
+    return BaseConfig(
+        **get_sizes(args),
+        prob_good=1 - (args.prob_noisy + args.prob_bad),
         prob_noisy=args.prob_noisy,
         prob_bad=args.prob_bad,
+        metrics_path=args.metrics_out,
+        max_memory_mb=args.max_memory_mb,
+        compact_tables=args.compact_tables,
+        mapped_tables=args.mapped_tables,
+        cache_dir=args.cache_dir,
+        cache_max_mb=args.cache_max_mb,
+        engine=args.engine,
+        progress=args.progress,
+        checkpoint_dir=args.checkpoint_dir,
     )
 
+
+# csv options the pipeline of `-w N` does not support: shards are planned
+# without metrics, cache or checkpoints, and generated in other processes
+PIPELINE_UNSUPPORTED = {
+    "profile": "--profile",
+    "metrics_out": "--metrics-out",
+    "cache_dir": "--cache-dir",
+    "checkpoint_dir": "--checkpoint-dir",
+    "resume": "--resume",
+}
+
+
+def to_csv(args):
+    from acme_data_generation.scripts.generate import AircraftGenerator
+
+    if args.workers > 1:
+        unsupported = [flag for dest, flag in PIPELINE_UNSUPPORTED.items() if getattr(args, dest) is not None]
+        if unsupported:
+            csv_parser.error(f"{', '.join(unsupported)} can't be combined with -w/--workers > 1")
+
+    config = generation_config(args)
+
     print(config._prob_weights)
 
-    ag = AircraftGenerator(config)
+    if args.workers > 1:
+        from acme_data_generation.scripts.pipeline import CsvSink, Pipeline
+
+        pipeline = Pipeline(config, CsvSink(args.out_path), workers=args.workers, writers=args.writers)
+        print(pipeline.run())
+        return
+
+    profiler = get_profiler(args)
+    ag = AircraftGenerator(config, profiler=profiler)
     ag.populate()
     ag.to_csv(path=args.out_path)
+    ag.close()
+    print_profile(profiler)
 
 
-def to_sql(args):
-
-    config = BaseConfig(
-        size=args.rows,
-        prob_good=1 - (args.prob_noisy + args.prob_bad),
-        prob_noisy=args.prob_noisy,
-        prob_bad=args.prob_bad,
-    )
+def get_url(args, drivername: str = "postgres"):
+    from sqlalchemy.engine.url import URL
 
     _sqla_url = {
-        "drivername": "postgres",
+        "drivername": drivername,
         "username": args.db_user,
         "password": args.db_pwd,
         "host": args.db_host,
@@ -58,7 +130,22 @@ def to_sql(args):
         "database": args.db_name,
     }
 
-    engine = create_engine(URL(**_sqla_url), echo=args.verbose)
+    return URL(**_sqla_url)
+
+
+def get_engine(args, **kwargs) -> "Engine":
+    from sqlalchemy import create_engine
+
+    return create_engine(get_url(args), echo=args.verbose, **kwargs)
+
+
+def to_sql(args):
+    from acme_data_generation.scripts.db_utils import create_all, delete_all, get_session
+    from acme_data_generation.scripts.generate import AircraftGenerator
+
+    config = generation_config(args)
+
+    engine = get_engine(args)
 
     # create session
     if args.hard:
@@ -82,10 +169,106 @@ def to_sql(args):
     #     for _r in result:
     #         print(_r)
 
+    profiler = get_profiler(args)
+    ag = AircraftGenerator(config, profiler=profiler)
+
+    if args.async_load:
+        from acme_data_generation.scripts.async_sql import AsyncLoader
+
+        # asyncpg only understands the postgresql:// scheme
+        loader = AsyncLoader(str(get_url(args, "postgresql")), workers=args.workers)
+        print(loader.run(ag))
+        ag.close()
+        print_profile(profiler)
+        return
+
     session = get_session(engine)
-    ag = AircraftGenerator(config)
     ag.populate()
     ag.to_sql(session)
+    ag.close()
+    print_profile(profiler)
+
+
+def plan(args):
+    from acme_data_generation.scripts.distributed import plan, write_manifest
+
+    config = BaseConfig(
+        **get_sizes(args),
+        prob_good=1 - (args.prob_noisy + args.prob_bad),
+        prob_noisy=args.prob_noisy,
+        prob_bad=args.prob_bad,
+    )
+
+    if args.dry_run:
+        from acme_data_generation.scripts.estimate import calibrate, estimate, format_estimate
+
+        calibration = calibrate(config, sample_size=args.calibration_rows)
+        print(format_estimate(estimate(config, calibration), shards=args.shards))
+        return
+
+    manifest = plan(config, num_shards=args.shards, out=args.out_dir)
+    path = write_manifest(manifest, args.manifest)
+    logging.info(f"Manifest of {args.shards} shards written to {path}")
+
+
+def run_shard(args):
+    from acme_data_generation.scripts.distributed import read_manifest, run_shard
+
+    manifest = read_manifest(args.manifest)
+    profiler = get_profiler(args)
+    run_shard(
+        manifest, args.shard, profiler=profiler, progress=args.progress, metrics_path=args.metrics_out)
+    print_profile(profiler)
+
+
+def merge(args):
+    from acme_data_generation.scripts.distributed import merge, read_manifest
+
+    merged = merge(read_manifest(args.manifest), out=args.out)
+    for tablename, rows in merged.items():
+        print(f"{tablename}: {rows}")
+
+
+def append(args):
+    from acme_data_generation.scripts.append import AppendGenerator, DatasetNotFound
+
+    config = BaseConfig(
+        prob_good=1 - (args.prob_noisy + args.prob_bad),
+        prob_noisy=args.prob_noisy,
+        prob_bad=args.prob_bad,
+        metrics_path=args.metrics_out,
+        progress=args.progress,
+    )
+
+    profiler = get_profiler(args)
+    try:
+        ag = AppendGenerator(config, dataset=args.dataset, days=args.days, profiler=profiler)
+    except DatasetNotFound as e:
+        append_parser.error(str(e))
+    ag.populate()
+    ag.append_csv()
+    ag.close()
+    print_profile(profiler)
+
+
+def check_db(args):
+    from acme_data_generation.scripts.checks import format_report, parse_checks, run_checks
+
+    checks = [check for path in args.sql_files for check in parse_checks(path)]
+    if args.rules:
+        checks = [check for check in checks if check.rule in args.rules]
+
+    # one connection per worker, so checks don't wait on the pool
+    engine = get_engine(args, pool_size=args.workers, max_overflow=0)
+
+    logging.info(f"Running {len(checks)} checks with {args.workers} workers")
+    start = time.perf_counter()
+    results = run_checks(engine, checks, workers=args.workers, timeout=args.timeout)
+    elapsed = time.perf_counter() - start
+
+    print(format_report(results))
+    print(f"\n{len(results)} checks in {elapsed:.3f}[s]")
+    engine.dispose()
 
 
 # ---------------------------------------------------------------------------- #
@@ -98,43 +281,202 @@ base_parser = argparse.ArgumentParser(
 )
 
 # ---------------------------------------------------------------------------- #
-#                            to csv argument parsing                           #
+#                          database argument parsing                           #
 # ---------------------------------------------------------------------------- #
 
-subparsers = base_parser.add_subparsers(help="sub-command help")
+# shared by every sub-command that connects to a database
+db_parser = argparse.ArgumentParser(add_help=False)
 
+db_parser.add_argument(
+    "-v", "--verbose", help="sets SQLAlchemy as verbose", action="store_true"
+)
 
-csv_parser = subparsers.add_parser(
-    "csv", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+db_parser.add_argument(
+    "--db-name", help="database name", default="postgres", type=str,
+)
+db_parser.add_argument(
+    "--db-user", help="database user", default="postgres", type=str,
 )
 
-csv_parser.add_argument(
-    "out_path",
-    metavar="OUT_PATH",
-    help="path to output folder",
-    default=default_output_path,
+db_parser.add_argument("--db-pwd", help="database password", type=str, required=True)
+db_parser.add_argument("--db-host", help="database host", default="0.0.0.0", type=str)
+db_parser.add_argument(
+    "--db-port",
+    help="database port. The default is 54320, set by docker-compose",
+    default=54320,
+    type=int,
+)
+
+# ---------------------------------------------------------------------------- #
+#                       instrumentation argument parsing                       #
+# ---------------------------------------------------------------------------- #
+
+# shared by every sub-command that generates data
+instrumentation_parser = argparse.ArgumentParser(add_help=False)
+
+instrumentation_parser.add_argument(
+    "--progress",
+    help="show a progress bar, log rows/s and ETA per stage, or report nothing",
+    choices=REPORTERS,
+    default="bar",
+)
+
+instrumentation_parser.add_argument(
+    "--profile",
+    help="profile each generation and output stage separately",
+    choices=PROFILERS,
+    default=None,
+)
+
+instrumentation_parser.add_argument(
+    "--profile-out",
+    metavar="DIR",
+    help="folder to write one profile file per stage to",
+    default=Path("profiles"),
     type=Path,
 )
 
+instrumentation_parser.add_argument(
+    "--profile-top",
+    help="number of hot functions to print per stage",
+    default=10,
+    type=int,
+)
 
-csv_parser.add_argument(
+instrumentation_parser.add_argument(
+    "--metrics-out",
+    help="write per-stage timing and memory metrics to this JSON file",
+    default=None,
+    type=Path,
+)
+
+# ---------------------------------------------------------------------------- #
+#                         dataset argument parsing                             #
+# ---------------------------------------------------------------------------- #
+
+# the quality of the rows, shared by every sub-command that generates data
+quality_parser = argparse.ArgumentParser(add_help=False)
+
+quality_parser.add_argument(
     "--prob-noisy",
     help="A probability that a row is generated with noisy quality of data",
     default=0.0,
     type=float,
 )
 
-csv_parser.add_argument(
+quality_parser.add_argument(
     "--prob-bad",
     help="A probability that a row is generated with bad quality of data",
     default=0.0,
     type=float,
 )
 
-csv_parser.add_argument(
+# the size of a new dataset, shared by csv, sql and plan
+size_parser = argparse.ArgumentParser(add_help=False)
+
+size_parser.add_argument(
     "-r", "--rows", help="number of rows to create", default=1000, type=int,
 )
 
+size_parser.add_argument(
+    "--scale-factor",
+    help="set the size of every table, the fleet and the personnel in fixed ratios. Overrides --rows",
+    choices=SCALE_FACTORS,
+    default=None,
+    type=int,
+)
+
+# how a single process generates a dataset, shared by csv and sql
+generation_parser = argparse.ArgumentParser(add_help=False)
+
+generation_parser.add_argument(
+    "--engine",
+    help="draw slots at random and fix overlaps afterwards, or walk each aircraft's timeline",
+    choices=("random", "timeline"),
+    default="random",
+)
+
+generation_parser.add_argument(
+    "--max-memory-mb",
+    help="spill finished tables to disk when the generated tables go over this budget",
+    default=None,
+    type=float,
+)
+
+generation_parser.add_argument(
+    "--compact-tables",
+    help="keep finished tables as columns, with airports, kinds and codes dictionary-encoded, to use less memory",
+    action="store_true",
+)
+
+generation_parser.add_argument(
+    "--mapped-tables",
+    help="move finished tables to memory-mapped column files, for datasets larger than the memory",
+    action="store_true",
+)
+
+generation_parser.add_argument(
+    "--cache-dir",
+    help="reuse the tables of previous runs with the same settings, cached in this folder",
+    default=None,
+    type=Path,
+)
+
+generation_parser.add_argument(
+    "--cache-max-mb",
+    help="evict least recently used cache entries over this size",
+    default=1024.0,
+    type=float,
+)
+
+generation_parser.add_argument(
+    "--checkpoint-dir",
+    help="save the tables and random state to this folder after every stage",
+    default=None,
+    type=Path,
+)
+
+generation_parser.add_argument(
+    "--resume",
+    help="resume the run checkpointed in this folder, with the settings it started with",
+    default=None,
+    type=Path,
+    metavar="RUN_DIR",
+)
+
+# ---------------------------------------------------------------------------- #
+#                            to csv argument parsing                           #
+# ---------------------------------------------------------------------------- #
+
+subparsers = base_parser.add_subparsers(help="sub-command help")
+
+
+csv_parser = subparsers.add_parser(
+    "csv",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    parents=[size_parser, quality_parser, generation_parser, instrumentation_parser],
+)
+
+csv_parser.add_argument(
+    "out_path",
+    metavar="OUT_PATH",
+    help="path to output folder",
+    default=default_output_path,
+    type=Path,
+)
+
+csv_parser.add_argument(
+    "-w",
+    "--workers",
+    help="generate the dataset in this many shards, in parallel processes, and write them as they come",
+    default=1,
+    type=int,
+)
+
+csv_parser.add_argument(
+    "--writers", help="threads writing the CSV files, with --workers", default=2, type=int,
+)
+
 csv_parser.set_defaults(func=to_csv)
 
 # ---------------------------------------------------------------------------- #
@@ -142,52 +484,160 @@ csv_parser.set_defaults(func=to_csv)
 # ---------------------------------------------------------------------------- #
 
 sql_parser = subparsers.add_parser(
-    "sql", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    "sql",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    parents=[db_parser, size_parser, quality_parser, generation_parser, instrumentation_parser],
 )
 
-
 sql_parser.add_argument(
-    "--prob-noisy",
-    help="A probability that a row is generated with noisy quality of data",
-    default=0.0,
-    type=float,
+    "--hard", help="wipe database before insertion", action="store_true"
 )
 
 sql_parser.add_argument(
-    "--prob-bad",
-    help="A probability that a row is generated with bad quality of data",
-    default=0.0,
-    type=float,
+    "--async-load",
+    help="load each table with COPY through asyncpg while the next ones are generated",
+    action="store_true",
 )
 
 sql_parser.add_argument(
-    "-r", "--rows", help="number of rows to store", default=1000, type=int,
+    "-w", "--workers", help="concurrent connections of --async-load", default=4, type=int,
 )
 
-sql_parser.add_argument(
-    "--hard", help="wipe database before insertion", action="store_true"
+sql_parser.set_defaults(func=to_sql)
+
+# ---------------------------------------------------------------------------- #
+#                          check-db argument parsing                           #
+# ---------------------------------------------------------------------------- #
+
+check_db_parser = subparsers.add_parser(
+    "check-db",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    parents=[db_parser],
+    help="run the business rules checks in tests-fixes against a database",
 )
-sql_parser.add_argument(
-    "-v", "--verbose", help="sets SQLAlchemy as verbose", action="store_true"
+
+check_db_parser.add_argument(
+    "sql_files",
+    metavar="SQL_FILE",
+    help="check packs to run, with one '-- Rn' header per rule",
+    nargs="*",
+    default=default_checks_paths,
+    type=Path,
 )
 
-sql_parser.add_argument(
-    "--db-name", help="database name", default="postgres", type=str,
+check_db_parser.add_argument(
+    "--rules",
+    help="only run checks for these rules, e.g. --rules R1 R20",
+    nargs="+",
+    default=None,
 )
-sql_parser.add_argument(
-    "--db-user", help="database user", default="postgres", type=str,
+
+check_db_parser.add_argument(
+    "-w", "--workers", help="number of concurrent connections", default=4, type=int,
 )
 
-sql_parser.add_argument("--db-pwd", help="database password", type=str, required=True)
-sql_parser.add_argument("--db-host", help="database host", default="0.0.0.0", type=str)
-sql_parser.add_argument(
-    "--db-port",
-    help="database port. The default is 54320, set by docker-compose",
-    default=54320,
+check_db_parser.add_argument(
+    "--timeout", help="timeout per query, in seconds", default=60.0, type=float,
+)
+
+check_db_parser.set_defaults(func=check_db)
+
+# ---------------------------------------------------------------------------- #
+#                      distributed generation argument parsing                 #
+# ---------------------------------------------------------------------------- #
+
+plan_parser = subparsers.add_parser(
+    "plan",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    parents=[size_parser, quality_parser],
+    help="split a dataset in shards, and write their manifest",
+)
+
+plan_parser.add_argument(
+    "--shards", help="number of shards", default=2, type=int,
+)
+
+plan_parser.add_argument(
+    "--out-dir",
+    help="folder the shards write to, one sub-folder each. It must be reachable by every node",
+    default=default_output_path,
+    type=Path,
+)
+
+plan_parser.add_argument(
+    "-m", "--manifest", help="path of the manifest", default=Path("manifest.json"), type=Path,
+)
+
+plan_parser.add_argument(
+    "--dry-run",
+    help="print the expected rows, disk, memory and time of each table instead of writing a manifest",
+    action="store_true",
+)
+
+plan_parser.add_argument(
+    "--calibration-rows",
+    help="slots generated to measure the cost per row, with --dry-run",
+    default=200,
     type=int,
 )
 
-sql_parser.set_defaults(func=to_sql)
+plan_parser.set_defaults(func=plan)
+
+run_shard_parser = subparsers.add_parser(
+    "run-shard",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    parents=[instrumentation_parser],
+    help="generate one shard of a manifest",
+)
+
+run_shard_parser.add_argument("manifest", metavar="MANIFEST", type=Path)
+
+run_shard_parser.add_argument(
+    "--shard", help="index of the shard to generate", required=True, type=int,
+)
+
+run_shard_parser.set_defaults(func=run_shard)
+
+merge_parser = subparsers.add_parser(
+    "merge",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    help="verify the shards of a manifest, and concatenate them in one CSV per table",
+)
+
+merge_parser.add_argument("manifest", metavar="MANIFEST", type=Path)
+
+merge_parser.add_argument(
+    "-o", "--out", help="output folder, <out-dir>/merged by default", default=None, type=Path,
+)
+
+merge_parser.set_defaults(func=merge)
+
+
+# ---------------------------------------------------------------------------- #
+#                              append argument parsing                         #
+# ---------------------------------------------------------------------------- #
+
+append_parser = subparsers.add_parser(
+    "append",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    parents=[quality_parser, instrumentation_parser],
+    help="extend a CSV dataset with the next days of operations",
+)
+
+append_parser.add_argument(
+    "--from",
+    help="folder of the CSV dataset to extend",
+    dest="dataset",
+    metavar="DATASET",
+    required=True,
+    type=Path,
+)
+
+append_parser.add_argument(
+    "--days", help="number of days to add after the end of the dataset", required=True, type=int,
+)
+
+append_parser.set_defaults(func=append)
 
 
 def cli():
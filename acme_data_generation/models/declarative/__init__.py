@@ -1,4 +1,3 @@
-from sqlalchemy.orm import sessionmaker
 from .aims import Base as AIMSBase
 from .amos import Base as AMOSBase
 
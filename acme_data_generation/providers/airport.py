@@ -4,12 +4,16 @@ from datetime import datetime, timedelta
 import random
 from string import ascii_letters, digits, punctuation, ascii_uppercase
 import math
+from itertools import chain, repeat
 
 from faker import Faker
 from faker.providers import BaseProvider
 
+from acme_data_generation.base.ids import IdAllocator
+from acme_data_generation.base.timestamps import DAY, from_epoch, seconds, to_epoch, to_seconds
 from acme_data_generation.models.declarative import aims, amos
 from acme_data_generation.models.non_orm.serializable import Manufacturer, Reporter
+from acme_data_generation.providers.reference import ReferenceTable
 
 
 class AirportProvider(BaseProvider):
@@ -22,9 +26,8 @@ class AirportProvider(BaseProvider):
         allowed_chars: str = ascii_letters + punctuation + digits,
     ):
         # https://www.askpython.com/python/examples/generate-random-strings-in-python
-        return "".join(
-            random.SystemRandom().choice(allowed_chars) for _ in range(str_size)
-        )
+        # drawn from the generator's random, so that it can be seeded
+        return "".join(self.generator.random.choices(allowed_chars, k=str_size))
 
     def make_noisy(
         self, string: str, alter_case: bool = True, max_whitespace: int = 0
@@ -43,7 +46,7 @@ class AirportProvider(BaseProvider):
 
         altered_case = (
             (
-                char.upper() if self.generator.pybool() else char.lower()
+                char.upper() if self._pybool() else char.lower()
                 for char in string
             )
             if alter_case
@@ -55,7 +58,109 @@ class AirportProvider(BaseProvider):
 
         return leading_whitespace + "".join(altered_case) + trailing_whitespace
 
-    _airport_codes: T.List[str] = [
+    # ---------------------------------------------------------------------------- #
+    #                                fast primitives                               #
+    # ---------------------------------------------------------------------------- #
+
+    # If True, the hot primitives below skip Faker's format parsing and
+    # generic dispatch. Values follow the same distributions, and are drawn
+    # from the same seedable `self.generator.random`. See BaseConfig.fast_primitives
+    fast_primitives: bool = False
+
+    def use_fast_primitives(self, enabled: bool = True) -> None:
+        self.fast_primitives = enabled
+
+    def fast_lexify(self, text: str = "????", letters: str = ascii_letters) -> str:
+        """Replaces each '?' in text with a random letter"""
+        parts = text.split("?")
+        picks = self.generator.random.choices(letters, k=len(parts) - 1)
+        picks.append("")
+        return "".join(chain.from_iterable(zip(parts, picks)))
+
+    def fast_numerify(self, text: str = "###") -> str:
+        """Replaces '#' with a digit, '%' with a non-zero digit, '!' with a
+        digit or nothing and '@' with a non-zero digit or nothing"""
+        rand = self.generator.random.random
+        chars = []
+        for char in text:
+            if char == "#":
+                chars.append(digits[int(rand() * 10)])
+            elif char == "%":
+                chars.append(digits[1 + int(rand() * 9)])
+            elif char == "!":
+                chars.append(digits[int(rand() * 10)] if rand() < 0.5 else "")
+            elif char == "@":
+                chars.append(digits[1 + int(rand() * 9)] if rand() < 0.5 else "")
+            else:
+                chars.append(char)
+        return "".join(chars)
+
+    def fast_date_time_between(self, start: datetime, end: datetime) -> datetime:
+        """A datetime between start and end, both included, to the second"""
+        seconds = int((end - start).total_seconds())
+        if seconds <= 0:
+            return start
+        return start + timedelta(seconds=int(self.generator.random.random() * (seconds + 1)))
+
+    def fast_epoch_between(self, start: int, end: int) -> int:
+        """Same as fast_date_time_between, in seconds since the epoch"""
+        if end <= start:
+            return start
+        return start + int(self.generator.random.random() * (end - start + 1))
+
+    def fast_uuid4(self) -> str:
+        """A random version 4 UUID, as a string"""
+        n = self.generator.random.getrandbits(128)
+        # variant RFC 4122 and version 4, as uuid.UUID(int=n, version=4) does
+        n = (n & ~(0xC000 << 48) | 0x8000 << 48) & ~(0xF000 << 64) | 4 << 76
+        h = "%032x" % n
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def uuid4_batch(self, n: int) -> T.List[str]:
+        """n random version 4 UUIDs, as strings, from a single draw of
+        `self.generator.random`"""
+        if n <= 0:
+            return []
+        buffer = bytearray(self.generator.random.getrandbits(128 * n).to_bytes(16 * n, "big"))
+        # version 4 and variant RFC 4122, byte 6 and 8 of every UUID
+        buffer[6::16] = bytes(b & 0x0F | 0x40 for b in buffer[6::16])
+        buffer[8::16] = bytes(b & 0x3F | 0x80 for b in buffer[8::16])
+        h = buffer.hex()
+        return [
+            f"{h[k:k + 8]}-{h[k + 8:k + 12]}-{h[k + 12:k + 16]}-{h[k + 16:k + 20]}-{h[k + 20:k + 32]}"
+            for k in range(0, 32 * n, 32)
+        ]
+
+    def fast_pybool(self) -> bool:
+        return self.generator.random.random() < 0.5
+
+    def _lexify(self, text: str, letters: str) -> str:
+        if self.fast_primitives:
+            return self.fast_lexify(text, letters)
+        return self.lexify(text=text, letters=letters)
+
+    def _numerify(self, text: str) -> str:
+        if self.fast_primitives:
+            return self.fast_numerify(text)
+        return self.numerify(text=text)
+
+    def _epoch_ad(self, start: int, end: int) -> int:
+        # the same draw as date_time_ad, which works in epoch seconds too
+        if self.fast_primitives:
+            return self.fast_epoch_between(start, end)
+        return self.generator.random.randint(start, end)
+
+    def _uuid4(self) -> str:
+        if self.fast_primitives:
+            return self.fast_uuid4()
+        return self.generator.uuid4()
+
+    def _pybool(self) -> bool:
+        if self.fast_primitives:
+            return self.fast_pybool()
+        return self.generator.pybool()
+
+    _airport_codes: ReferenceTable = ReferenceTable([
         "TIA",
         "EVN",
         "GRZ",
@@ -315,7 +420,7 @@ class AirportProvider(BaseProvider):
         "MAN",
         "NCL",
         "SOU",
-    ]
+    ])
 
     _register_prefix: str = "XY-"
     _alphabet: str = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
@@ -329,7 +434,11 @@ class AirportProvider(BaseProvider):
         "2017-01-07 00:00:00", "%Y-%m-%d %H:%M:%S"
     )
 
-    _delay_codes: T.List[str] = [
+    # the same bounds, in seconds since the epoch. See base/timestamps.py
+    _offset_epoch: int = to_epoch(_offset_timestamp)
+    _end_epoch: int = to_epoch(_end_timestamp)
+
+    _delay_codes: ReferenceTable = ReferenceTable([
         "00",
         "01",
         "02",
@@ -414,7 +523,7 @@ class AirportProvider(BaseProvider):
         "97",
         "98",
         "99",
-    ]
+    ])
 
     _slot_kinds: T.List[str] = ["Flight", "Maintenance"]
 
@@ -429,7 +538,7 @@ class AirportProvider(BaseProvider):
         "Revision",
     ]
 
-    _ata_codes: T.List[str] = [
+    _ata_codes: ReferenceTable = ReferenceTable([
         "1100",
         "1210",
         "1220",
@@ -977,13 +1086,13 @@ class AirportProvider(BaseProvider):
         "8560",
         "8570",
         "8597",
-    ]
+    ])
 
     _work_order_kinds: T.List[str] = ["Forecast", "TechnicalLogBook"]
     _frequency_units_kinds: T.List[str] = ["Flights", "Days", "Miles"]
     _mel_category_kinds: T.List[str] = ["A", "B", "C", "D"]
     _report_kinds: T.List[str] = ["PIREP", "MAREP"]
-    _aircraft_models: T.List[str] = [
+    _aircraft_models: ReferenceTable = ReferenceTable([
         "A319",
         "A320 family",
         "A320neo family",
@@ -996,7 +1105,7 @@ class AirportProvider(BaseProvider):
         "747",
         "767",
         "777",
-    ]
+    ])
 
     _aircraft_manufacturers: T.List[str] = [
         "Airbus",
@@ -1021,7 +1130,7 @@ class AirportProvider(BaseProvider):
     def airport_code(self, quality: str = "good") -> str:
         mapping = {
             "bad": self.bothify("#??"),  # e.g. 3Ws, 1fR
-            "good": self.random_element(self._airport_codes),
+            "good": self._airport_codes.choice(self.generator.random),
         }
 
         return self._quality_dispatcher(mapping, quality)
@@ -1029,7 +1138,7 @@ class AirportProvider(BaseProvider):
     def delay_code(self, quality: str = "good") -> str:
         mapping = {
             "bad": self.bothify("##"),  # e.g. 123, 999
-            "good": self.random_element(self._delay_codes),
+            "good": self._delay_codes.choice(self.generator.random),
         }
 
         return self._quality_dispatcher(mapping, quality)
@@ -1068,7 +1177,7 @@ class AirportProvider(BaseProvider):
 
     def ata_code(self, quality: str = "good") -> str:
         mapping = {
-            "good": self.random_element(self._ata_codes),
+            "good": self._ata_codes.choice(self.generator.random),
             "bad": self.random_string(4),
         }
         return self._quality_dispatcher(mapping, quality)
@@ -1114,7 +1223,7 @@ class AirportProvider(BaseProvider):
 
     def aircraft_model(self, quality: str = "good") -> str:
         mapping = {
-            "good": self.random_element(self._aircraft_models),
+            "good": self._aircraft_models.choice(self.generator.random),
             "bad": self.random_string(random.randint(5, 14)),
         }
         return self._quality_dispatcher(mapping, quality)
@@ -1136,7 +1245,7 @@ class AirportProvider(BaseProvider):
             str: flight number, as a string
         """
         mapping = {
-            "good": self.numerify("%%%%"),
+            "good": self._numerify("%%%%"),
             "bad": self.random_string(4, digits + ascii_letters),
         }
         return self._quality_dispatcher(mapping, quality)
@@ -1149,17 +1258,19 @@ class AirportProvider(BaseProvider):
         Returns:
             datetime: a random datetime object
         """
+        return from_epoch(self.flight_epoch(quality=quality))
+
+    def flight_epoch(self, quality="good") -> int:
+        """Same as flight_timestamp, in seconds since the epoch"""
         mapping = {
-            "good": self.generator.date_time_between_dates(
-                self._offset_timestamp, self._end_timestamp
-            ),
+            "good": self.generator.random.randint(self._offset_epoch, self._end_epoch),
         }
 
         # we add or substract 50-500 years at random
-        random_timedelta = self.random_element([-1, 1]) * timedelta(
-            days=random.randint(50 * 365, 100 * 365)
+        random_delta = self.random_element([-1, 1]) * DAY * random.randint(
+            50 * 365, 100 * 365
         )
-        mapping["bad"] = mapping["good"] + random_timedelta
+        mapping["bad"] = mapping["good"] + random_delta
 
         # TODO: implement this. can't think of anything now
         mapping["noisy"] = mapping["good"]
@@ -1167,12 +1278,21 @@ class AirportProvider(BaseProvider):
         return self._quality_dispatcher(mapping, quality)
 
     def aircraft_registration_code(
-        self, prefix: str = None, quality: str = "good"
+        self, prefix: str = None, quality: str = "good", index: T.Optional[int] = None
     ) -> str:
+        """A random registration code, or the index-th one in alphabetical
+        order if index is given, e.g. 0 -> XY-AAA, 27 -> XY-ABB"""
         register_prefix: str = prefix or self._register_prefix
 
+        if index is None:
+            suffix = self._lexify("???", self._alphabet)
+        elif 0 <= index < len(self._alphabet) ** 3:
+            suffix = "".join(self._alphabet[index // 26 ** p % 26] for p in (2, 1, 0))
+        else:
+            raise ValueError(f"there are only {26 ** 3} registration codes")
+
         mapping = {
-            "good": register_prefix + self.lexify(text=f"???", letters=self._alphabet),
+            "good": register_prefix + suffix,
             "bad": self.random_string(6, digits + ascii_letters),
         }
 
@@ -1186,7 +1306,7 @@ class AirportProvider(BaseProvider):
     def manufacturer_serial_number(self, quality="good") -> str:
 
         mapping = {
-            "good": self.numerify(text="MSN %%%%"),
+            "good": self._numerify("MSN %%%%"),
             "bad": self.random_string(random.randint(2, 3), ascii_uppercase)
             + " "
             + self.random_string(random.randint(3, 6), digits + punctuation),
@@ -1194,11 +1314,25 @@ class AirportProvider(BaseProvider):
 
         return self._quality_dispatcher(mapping, quality)
 
-    def maintenance_id(self, max_id: int = 999, quality="good") -> str:
+    def serial_id(
+        self, table: str, max_id: int = 9999, ids: T.Optional[IdAllocator] = None
+    ) -> int:
+        """Returns an id for `table`
+
+        R8: if an IdAllocator is given, ids are serial and unique by
+        construction. Otherwise a random integer up to `max_id` is returned.
+        """
+        if ids is None:
+            return self.random_int(max=max_id)
+        return ids.next_id(table)
+
+    def maintenance_id(
+        self, max_id: int = 999, quality="good", ids: T.Optional[IdAllocator] = None
+    ) -> str:
         # R3
         mid = "_".join(
             [
-                str(self.random_int(max=max_id)),
+                str(self.serial_id("maintenanceevents", max_id=max_id, ids=ids)),
                 str(
                     self.flight_timestamp(quality=quality)
                     + self.interruption_duration(quality=quality)
@@ -1218,6 +1352,14 @@ class AirportProvider(BaseProvider):
     ) -> timedelta:
 
         return timedelta(
+            seconds=self.duration_seconds(max_days, max_hours, max_minutes)
+        )
+
+    def duration_seconds(
+        self, max_days: int = 0, max_hours: int = 0, max_minutes: int = 0
+    ) -> int:
+        """Same as duration, in seconds"""
+        return seconds(
             days=self.random_int(max=max_days),
             hours=self.random_int(max=max_hours),
             minutes=self.random_int(max=max_minutes),
@@ -1240,39 +1382,55 @@ class AirportProvider(BaseProvider):
         if interruption_type is None:
             interruption_type = self.maintenance_event_kind(quality=quality)
 
+        duration = timedelta(
+            seconds=self.interruption_seconds(interruption_type, quality=quality)
+        )
+
+        if return_type:
+            return (interruption_type, duration)
+
+        return duration
+
+    def interruption_seconds(self, interruption_type: str, quality="good") -> int:
+        """Same as interruption_duration, in seconds"""
+
         # setup depending on the maintenance kind obtained
         # R15
         if interruption_type == "Delay":
-            duration = self.duration(max_minutes=59)
+            duration = self.duration_seconds(max_minutes=59)
         elif interruption_type == "Safety":
             # these values were taken from the Java code sample from petar
-            duration = self.duration(max_days=89, max_hours=23, max_minutes=59)
+            duration = self.duration_seconds(max_days=89, max_hours=23, max_minutes=59)
         elif interruption_type == "AircraftOnGround":
-            duration = self.duration(max_hours=23, max_minutes=59)
+            duration = self.duration_seconds(max_hours=23, max_minutes=59)
         elif interruption_type == "Maintenance":
-            duration = self.duration(max_days=1, max_hours=23, max_minutes=59)
+            duration = self.duration_seconds(max_days=1, max_hours=23, max_minutes=59)
             # TODO: this is rule R15-D
-            if duration > timedelta(days=1):
-                duration = timedelta(days=1)
+            duration = min(duration, DAY)
         elif interruption_type == "Revision":
             # days to one month (31 days)
-            duration = self.duration(max_days=31, max_hours=0, max_minutes=0)
+            duration = self.duration_seconds(max_days=31, max_hours=0, max_minutes=0)
         else:
-            # empty timedelta
-            duration = timedelta()
+            # empty duration
+            duration = 0
 
         if quality == "bad":
             duration = duration * self.random_int(-100, 100)
 
-        if return_type:
-            return (interruption_type, duration)
-
         return duration
 
     def mel_reporting_deadline_duration(
         self, mel_type: T.Optional[str] = None, quality: str = "good"
     ) -> timedelta:
         """Returns a timedelta duration object, based on a MEL type."""
+        return timedelta(
+            seconds=self.mel_reporting_deadline_seconds(mel_type=mel_type, quality=quality)
+        )
+
+    def mel_reporting_deadline_seconds(
+        self, mel_type: T.Optional[str] = None, quality: str = "good"
+    ) -> int:
+        """Same as mel_reporting_deadline_duration, in seconds"""
 
         if quality == "bad":
             mel_type = "bad"
@@ -1281,14 +1439,14 @@ class AirportProvider(BaseProvider):
             mel_type = self.mel_category_kind()
 
         _mel_mapping = {
-            "A": timedelta(days=3),
-            "B": timedelta(days=10),
-            "C": timedelta(days=30),
-            "D": timedelta(days=120),
-            "bad": timedelta(days=self.random_int(max=500)),
+            "A": 3 * DAY,
+            "B": 10 * DAY,
+            "C": 30 * DAY,
+            "D": 120 * DAY,
+            "bad": self.random_int(max=500) * DAY,
         }
 
-        return _mel_mapping.get(mel_type, timedelta())
+        return _mel_mapping.get(mel_type, 0)
 
     # ---------------------------------------------------------------------------- #
     #                          beginning of random objects                         #
@@ -1298,14 +1456,14 @@ class AirportProvider(BaseProvider):
     #   Entities that are not stored in a table                                    #
     # ---------------------------------------------------------------------------- #
 
-    def manufacturer(self, quality="good") -> Manufacturer:
+    def manufacturer(self, quality="good", index: T.Optional[int] = None) -> Manufacturer:
         """Returns a random instance of Manufacturer
 
         Returns:
             Manufacturer: A random instance of Manufacturer
         """
         return Manufacturer(
-            aircraft_reg_code=self.aircraft_registration_code(quality=quality),
+            aircraft_reg_code=self.aircraft_registration_code(quality=quality, index=index),
             manufacturer_serial_number=self.manufacturer_serial_number(quality=quality),
             aircraft_model=self.aircraft_model(quality=quality),
             aircraft_manufacturer=self.aircraft_manufacturer(quality=quality),
@@ -1360,15 +1518,26 @@ class AirportProvider(BaseProvider):
         event = event or self.maintenance_event(quality=quality)
 
         return amos.Attachment(
-            file=self.generator.uuid4(), event=event.maintenanceid  # R4
+            file=self._uuid4(), event=event.maintenanceid  # R4
         )  # R5
 
+    def attachment_columns(
+        self, events: T.Sequence[str], per_event: int = 1
+    ) -> T.Dict[str, T.List[str]]:
+        """Columns of amos.Attachment for `per_event` attachments of each
+        maintenance id in `events`, see `attachment`"""
+        return {
+            "file": self.uuid4_batch(len(events) * per_event),
+            "event": list(chain.from_iterable(repeat(e, per_event) for e in events)),  # R4
+        }
+
     def work_order(
         self,
         max_id: int = 9999,
         quality: str = "good",
         maintenance_event: T.Optional[amos.MaintenanceEvent] = None,
         kind: T.Optional[str] = None,
+        ids: T.Optional[IdAllocator] = None,
     ) -> T.Union[amos.WorkOrder, amos.ForecastedOrder, amos.TechnicalLogbookOrder]:
 
         """Produces a random instance of a work order object, based on `kind`
@@ -1384,7 +1553,9 @@ class AirportProvider(BaseProvider):
             }, 'kind must be one of {"Forecast", "TechnicalLogBook"}'
 
         # a work order is referenced from at least one maintenance event
-        maintenance_event = maintenance_event or self.maintenance_event(quality=quality)
+        maintenance_event = maintenance_event or self.maintenance_event(
+            quality=quality, ids=ids
+        )
 
         # R25-A
         aircraft_registration = maintenance_event.aircraftregistration
@@ -1392,9 +1563,13 @@ class AirportProvider(BaseProvider):
         # R25-C
         executionplace = maintenance_event.airport
 
-        # other random attributes
-        workorderid = self.random_int(max=max_id)
-        workpackageid = self.random_int(max=max_id)
+        # R8
+        workorderid = self.serial_id("workorders", max_id=max_id, ids=ids)
+        workpackageid = self.serial_id("workpackages", max_id=max_id, ids=ids)
+
+        # dates are computed in epoch seconds, as in slot()
+        start: int = to_epoch(maintenance_event.starttime)
+        end: int = start + to_seconds(maintenance_event.duration)
 
         if kind == "Forecast":
 
@@ -1402,13 +1577,10 @@ class AirportProvider(BaseProvider):
             planned = maintenance_event.starttime
 
             # R26
-            deadline = planned + maintenance_event.duration
+            deadline = from_epoch(end)
 
             # R25-B
-            executiondate = self.generator.date_time_ad(
-                start_datetime=planned,
-                end_datetime=deadline,
-            )
+            executiondate = from_epoch(self._epoch_ad(start, end))
 
             fo = amos.ForecastedOrder(
                 workorderid=workorderid,
@@ -1433,14 +1605,11 @@ class AirportProvider(BaseProvider):
             reportingdate = maintenance_event.starttime
 
             # R29
-            due = maintenance_event.starttime + maintenance_event.duration
-            due += self.mel_reporting_deadline_duration(mel_type=mel, quality=quality)
+            due_epoch = end + self.mel_reporting_deadline_seconds(mel_type=mel, quality=quality)
+            due = from_epoch(due_epoch)
 
             # R25-B
-            executiondate = self.generator.date_time_ad(
-                start_datetime=reportingdate,
-                end_datetime=due,
-            )
+            executiondate = from_epoch(self._epoch_ad(start, due_epoch))
 
             tlb = amos.TechnicalLogbookOrder(
                 workorderid=workorderid,
@@ -1453,16 +1622,13 @@ class AirportProvider(BaseProvider):
                 reporteurid=self.reporter(quality=quality).reporteurid,
                 reportingdate=reportingdate,
                 due=due,
-                deferred=self.generator.pybool(),
+                deferred=self._pybool(),
                 mel=mel,
             )
 
             return tlb
         else:
-            executiondate = self.generator.date_time_ad(
-                start_datetime=maintenance_event.starttime,
-                end_datetime=maintenance_event.starttime + maintenance_event.duration,
-            )
+            executiondate = from_epoch(self._epoch_ad(start, end))
 
             wo = amos.WorkOrder(
                 workorderid=workorderid,
@@ -1480,6 +1646,7 @@ class AirportProvider(BaseProvider):
         max_id: int = 9999,
         quality: str = "good",
         maintenance_event: T.Optional[amos.MaintenanceEvent] = None,
+        ids: T.Optional[IdAllocator] = None,
     ) -> amos.ForecastedOrder:
 
         fo = self.work_order(
@@ -1487,6 +1654,7 @@ class AirportProvider(BaseProvider):
             quality=quality,
             maintenance_event=maintenance_event,
             kind="Forecast",
+            ids=ids,
         )
 
         return fo
@@ -1496,6 +1664,7 @@ class AirportProvider(BaseProvider):
         max_id: int = 9999,
         quality: str = "good",
         maintenance_event: T.Optional[amos.MaintenanceEvent] = None,
+        ids: T.Optional[IdAllocator] = None,
     ) -> amos.TechnicalLogbookOrder:
 
         tlb = self.work_order(
@@ -1503,6 +1672,7 @@ class AirportProvider(BaseProvider):
             quality=quality,
             maintenance_event=maintenance_event,
             kind="TechnicalLogBook",
+            ids=ids,
         )
 
         return tlb
@@ -1512,6 +1682,7 @@ class AirportProvider(BaseProvider):
         max_id: int = 9999,
         slot: T.Optional[T.Union[aims.FlightSlot, aims.MaintenanceSlot]] = None,
         quality="good",
+        ids: T.Optional[IdAllocator] = None,
     ) -> amos.OperationalInterruption:
         """produces a random operational interruption
 
@@ -1531,6 +1702,8 @@ class AirportProvider(BaseProvider):
             )
 
         oi_starttime = slot.scheduleddeparture
+        # the end of the interruption is computed in epoch seconds, as in slot()
+        start: int = to_epoch(oi_starttime)
         slot_kind = slot.kind
         oi_aircraftregistration = slot.aircraftregistration
 
@@ -1553,13 +1726,14 @@ class AirportProvider(BaseProvider):
                 quality=quality, kind="Maintenance"
             )
 
-            duration = self.interruption_duration(
-                interruption_type=maintenanceeventkind
-            )
+            duration = self.interruption_seconds(maintenanceeventkind)
 
             # R8-A
             maintenance_id = "_".join(
-                [str(self.random_int(max=max_id)), str(oi_starttime + duration)]
+                [
+                    str(self.serial_id("maintenanceevents", max_id=max_id, ids=ids)),
+                    str(from_epoch(start + duration)),
+                ]
             )
         else:
             # Then it is a MaintenanceSlot instance
@@ -1576,13 +1750,14 @@ class AirportProvider(BaseProvider):
                 quality=quality, kind="Flight"
             )
 
-            duration = self.interruption_duration(
-                interruption_type=maintenanceeventkind
-            )
+            duration = self.interruption_seconds(maintenanceeventkind)
 
             # R8-A
             maintenance_id = "_".join(
-                [str(self.random_int(max=max_id)), str(oi_starttime + duration)]
+                [
+                    str(self.serial_id("maintenanceevents", max_id=max_id, ids=ids)),
+                    str(from_epoch(start + duration)),
+                ]
             )
 
         oi = amos.OperationalInterruption(
@@ -1591,7 +1766,7 @@ class AirportProvider(BaseProvider):
             airport=airport,
             subsystem=self.ata_code(quality=quality),
             starttime=oi_starttime,
-            duration=duration,
+            duration=timedelta(seconds=duration),
             kind=maintenanceeventkind,
             flightid=flight_id,
             departure=departure,
@@ -1606,11 +1781,12 @@ class AirportProvider(BaseProvider):
         slot: T.Optional[T.Union[aims.FlightSlot, aims.MaintenanceSlot]] = None,
         operational_interruption: T.Optional[amos.OperationalInterruption] = None,
         quality: str = "good",
+        ids: T.Optional[IdAllocator] = None,
     ) -> amos.MaintenanceEvent:
         """Produces a random maintenance event from a random operational interruption"""
 
         oi = operational_interruption or self.operational_interruption_event(
-            max_id=max_id, slot=slot, quality=quality
+            max_id=max_id, slot=slot, quality=quality, ids=ids
         )
 
         return amos.MaintenanceEvent(
@@ -1627,6 +1803,17 @@ class AirportProvider(BaseProvider):
     #                                     AIMS                                     #
     # ---------------------------------------------------------------------------- #
 
+    def longest_slot(self, kind: str, quality: str = "good", config: T.Optional[dict] = None) -> int:
+        """The longest a slot made by `slot` can last, in seconds, from its
+        scheduled departure to its last arrival, delays included"""
+        config = config or {}
+        # the largest multiplier of bad rows
+        multiplier = 1 if quality in {"good", "noisy"} else 10
+        longest = seconds(hours=config.get("max_duration", 5) * multiplier)
+        if kind == "Flight":
+            longest += seconds(minutes=config.get("max_delay", 40) * multiplier)
+        return longest
+
     def slot(self, *args, **kwargs) -> aims.Slot:
 
         # args, kwargs unpacking
@@ -1635,6 +1822,8 @@ class AirportProvider(BaseProvider):
         manufacturer = kwargs.pop("manufacturer", None)
         quality = kwargs.pop("quality", "good")
         kind = kwargs.pop("kind", None)
+        # scheduled departure in epoch seconds, random if not given
+        departure = kwargs.pop("departure", None)
 
         # change attributes depending on the quality passed
         multiplier = 1 if quality in {"good", "noisy"} else self.random_int(5, 10)
@@ -1649,10 +1838,12 @@ class AirportProvider(BaseProvider):
 
         # base properties
         # R19
-        scheduleddeparture: datetime = self.flight_timestamp(quality=quality)
-        scheduledarrival: datetime = scheduleddeparture + self.duration(
-            max_hours=max_duration
-        )
+        # timestamps are computed in epoch seconds, and converted once
+        if departure is None:
+            departure = self.flight_epoch(quality=quality)
+        arrival: int = departure + self.duration_seconds(max_hours=max_duration)
+        scheduleddeparture: datetime = from_epoch(departure)
+        scheduledarrival: datetime = from_epoch(arrival)
 
         aircraftregistration: str = getattr(
             manufacturer, "aircraft_reg_code", None
@@ -1680,7 +1871,7 @@ class AirportProvider(BaseProvider):
             flight_crew: int = self.random_int(min=min_fcrew, max=max_fcrew)
 
             if cancelled is None:
-                cancelled = self.generator.pybool()
+                cancelled = self._pybool()
 
             # R22-B
             # if flight is cancelled, then some attributes must be empty
@@ -1690,11 +1881,11 @@ class AirportProvider(BaseProvider):
                 actualarrival = None
                 actualdeparture = None
             else:
-                delay = self.duration(max_minutes=max_delay)
+                delay = self.duration_seconds(max_minutes=max_delay)
                 delay_code = self.delay_code(quality=quality)
                 # R22
-                actualdeparture = scheduleddeparture + delay
-                actualarrival = scheduledarrival + delay
+                actualdeparture = from_epoch(departure + delay)
+                actualarrival = from_epoch(arrival + delay)
 
             # stfrtime uses here the format that was in the java code.
             # This date is not ISO 8601 compliant, but it could be set
@@ -1738,7 +1929,7 @@ class AirportProvider(BaseProvider):
                 scheduleddeparture=scheduleddeparture,
                 scheduledarrival=scheduledarrival,
                 kind="Maintenance",
-                programmed=self.generator.pybool(),
+                programmed=self._pybool(),
             )
 
     def flight_slot(self, *args, **kwargs) -> aims.FlightSlot:
@@ -0,0 +1,94 @@
+import random
+import sys
+import typing as T
+from array import array
+from bisect import bisect
+from collections.abc import Sequence
+from itertools import accumulate
+
+__doc__ = """Compact reference tables for the provider vocabularies
+
+A ReferenceTable holds a vocabulary of interned strings, e.g. airport or ATA
+codes, along with an integer code per value and optional sampling weights.
+
+Sampling draws integer codes, which are mapped to values through the table,
+so that a batch of N values costs N draws and N list lookups:
+
+>>> airports = ReferenceTable(["BCN", "VIE", "BRU"], weights=[2, 1, 1])
+>>> airports.sample(random.Random(42), k=4)
+['VIE', 'BCN', 'BCN', 'BCN']
+>>> airports.code("VIE")
+1
+
+Sinks can use `codes` and `index` to dictionary-encode a column, without
+hashing the strings again.
+"""
+
+
+class ReferenceTable(Sequence):
+    """An immutable vocabulary, indexed by integer codes
+
+    It is a Sequence, so it can be used wherever the former list was, e.g.
+    with `random_element`, `random.sample` or `in`.
+    """
+
+    def __init__(
+        self, values: T.Iterable[str], weights: T.Optional[T.Sequence[float]] = None
+    ):
+        self.values: T.Tuple[str, ...] = tuple(sys.intern(v) for v in values)
+        if not self.values:
+            raise ValueError("a reference table needs at least one value")
+
+        # value -> code, the first one if a value is repeated
+        self.index: T.Dict[str, int] = {}
+        for code, value in enumerate(self.values):
+            self.index.setdefault(value, code)
+
+        self.codes = array("I", range(len(self.values)))
+
+        if weights is not None and len(weights) != len(self.values):
+            raise ValueError("there must be one weight per value")
+        self.weights = None if weights is None else tuple(weights)
+        self._cum_weights = None if weights is None else list(accumulate(weights))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __contains__(self, value) -> bool:
+        return value in self.index
+
+    def __repr__(self):
+        return f"ReferenceTable({len(self)} values)"
+
+    def code(self, value: str) -> int:
+        """Returns the code of a value, raises KeyError if not in the table"""
+        return self.index[value]
+
+    def sample_codes(self, rng: random.Random, k: int = 1) -> array:
+        """Draws k codes at once, with replacement"""
+        if self._cum_weights is None:
+            n = len(self.values)
+            return array("I", [int(rng.random() * n) for _ in range(k)])
+
+        total = self._cum_weights[-1]
+        cum_weights = self._cum_weights
+        hi = len(self.values) - 1
+        return array(
+            "I", [bisect(cum_weights, rng.random() * total, 0, hi) for _ in range(k)]
+        )
+
+    def decode(self, codes: T.Iterable[int]) -> T.List[str]:
+        values = self.values
+        return [values[c] for c in codes]
+
+    def sample(self, rng: random.Random, k: int = 1) -> T.List[str]:
+        """Draws k values at once, with replacement"""
+        return self.decode(self.sample_codes(rng, k))
+
+    def choice(self, rng: random.Random) -> str:
+        if self._cum_weights is None:
+            return self.values[int(rng.random() * len(self.values))]
+        return self.sample(rng, 1)[0]
@@ -0,0 +1,259 @@
+import csv
+import hashlib
+import json
+import logging
+import typing as T
+from datetime import datetime
+from pathlib import Path
+
+import attr
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.base.timestamps import DAY, to_epoch
+from acme_data_generation.models.non_orm.serializable import Manufacturer
+from acme_data_generation.providers.airport import AirportProvider
+from acme_data_generation.scripts.generate import AircraftGenerator, split_evenly
+
+__doc__ = """Extends a CSV dataset with the next N days of operations
+
+The state an append needs is kept next to the CSV files, in `append-state.json`:
+when the dataset ends, when each aircraft lands for the last time, the id
+high-water marks (R8), and how many slots an aircraft has per day. The
+first append builds it by scanning the dataset once; later appends only read
+and update it, so their cost is proportional to the new window.
+
+The new window is generated with the timeline engine, aircraft by aircraft,
+each one starting after its last slot, and the rows are appended to the
+existing CSV files. Maintenance personnel and the fleet are not touched.
+"""
+
+STATE = "append-state.json"
+
+# id sequence (R8) -> CSV file and column holding it
+ID_COLUMNS = {
+    "maintenanceevents": (
+        ("maintenance_events", "maintenanceid"),
+        ("operational_interruptions", "maintenanceid"),
+    ),
+    "workorders": (("forecasted_orders", "workorderid"), ("tlb_orders", "workorderid")),
+    "workpackages": (("work_packages", "workpackageid"),),
+}
+
+# slot CSV columns that tell when an aircraft is back on ground
+SLOT_ENDS = ("scheduledarrival", "actualarrival")
+
+
+class DatasetNotFound(Exception):
+    """Raised when a folder has no dataset to append to"""
+
+
+@attr.s(auto_attribs=True)
+class DatasetState:
+    # epoch seconds until which the dataset has been generated
+    until: int
+    # aircraft registration -> epoch seconds its last slot ends
+    last_end: T.Dict[str, int]
+    # id sequence -> largest id used
+    ids: T.Dict[str, int]
+    # slots of the whole fleet per day, kept from the original dataset
+    flights_per_day: float
+    maintenance_per_day: float
+
+
+def _epoch(value: str) -> T.Optional[int]:
+    try:
+        return to_epoch(datetime.fromisoformat(value))
+    except (TypeError, ValueError):
+        # noisy or bad rows
+        return None
+
+
+def _serial(value: str) -> T.Optional[int]:
+    try:
+        return int(value.split("_")[0])
+    except (AttributeError, ValueError):
+        return None
+
+
+def _read(path: Path) -> T.Iterator[T.Dict[str, str]]:
+    if not path.exists():
+        return
+    with path.open(newline="") as fp:
+        yield from csv.DictReader(fp)
+
+
+def scan_dataset(path: Path) -> DatasetState:
+    """Builds the state of a dataset written by `airbase-gen csv`, in one pass"""
+    path = Path(path)
+    fleet = {row["aircraft_reg_code"] for row in _read(path.joinpath("manufacturers.csv"))}
+    if not fleet:
+        raise DatasetNotFound(f"{path} has no manufacturers.csv to append to")
+
+    rows: T.Dict[str, int] = {}
+    last_end: T.Dict[str, int] = {}
+    for tablename in ("flight_slots", "maintenance_slots"):
+        rows[tablename] = 0
+        for row in _read(path.joinpath(f"{tablename}.csv")):
+            rows[tablename] += 1
+            ends = [e for e in (_epoch(row.get(c)) for c in SLOT_ENDS) if e is not None]
+            aircraft = row["aircraftregistration"]
+            if ends and aircraft in fleet:
+                last_end[aircraft] = max(last_end.get(aircraft, 0), *ends)
+
+    ids: T.Dict[str, int] = {}
+    for sequence, columns in ID_COLUMNS.items():
+        for tablename, column in columns:
+            for row in _read(path.joinpath(f"{tablename}.csv")):
+                serial = _serial(row[column])
+                if serial is not None:
+                    ids[sequence] = max(ids.get(sequence, 0), serial)
+
+    # the provider draws slots in [offset, end]
+    days = (AirportProvider._end_epoch - AirportProvider._offset_epoch) / DAY
+    return DatasetState(
+        until=AirportProvider._end_epoch,
+        last_end=last_end,
+        ids=ids,
+        flights_per_day=rows["flight_slots"] / days,
+        maintenance_per_day=rows["maintenance_slots"] / days,
+    )
+
+
+def read_state(path: Path) -> DatasetState:
+    """The append state of a dataset, scanning it if it was never appended to"""
+    state = Path(path).joinpath(STATE)
+    if state.exists():
+        return DatasetState(**json.loads(state.read_text()))
+    logging.info(f"Scanning {path}, only needed for the first append")
+    return scan_dataset(path)
+
+
+def write_state(path: Path, state: DatasetState) -> Path:
+    state_path = Path(path).joinpath(STATE)
+    state_path.write_text(json.dumps(attr.asdict(state), indent=2))
+    return state_path
+
+
+class AppendGenerator(AircraftGenerator):
+    """Generates the slots of the next `days` days, and everything they produce"""
+
+    def __init__(self, config: BaseConfig, dataset: Path, days: int, **kwargs):
+        self.dataset = Path(dataset)
+        self.days = days
+        self.dataset_state = read_state(self.dataset)
+        # a seed per window, so each append differs from the previous one
+        seed = int(hashlib.sha256(
+            f"{config.seed}:{self.dataset_state.until}".encode()).hexdigest()[:8], 16)
+        # the tables depend on the dataset, not only on the config, so they
+        # are neither cached nor checkpointed
+        weights = config._prob_weights
+        config = attr.evolve(
+            config, seed=seed, engine="timeline", cache_dir=None, checkpoint_dir=None)
+        config._prob_weights = weights
+        super().__init__(config, **kwargs)
+
+    @property
+    def window(self) -> T.Tuple[int, int]:
+        start = self.dataset_state.until
+        return start, start + self.days * DAY
+
+    @property
+    def stages(self) -> T.List[T.Tuple[str, T.Callable[[], int]]]:
+        stages = [("fleet", self._read_fleet), ("timelines", self._simulate_window)]
+        # what the new slots produce, as in a full run
+        return stages + [
+            stage for stage in super().stages
+            if stage[0] not in {"maintenance personnel", "fleet", "timelines"}
+        ]
+
+    @property
+    def appended(self) -> T.List[str]:
+        """Tables that get new rows"""
+        return [t for t in self.state if t not in {"manufacturers", "maintenance_personnel"}]
+
+    def _new_ids(self, start: T.Union[int, T.Dict[str, int]] = 1) -> T.Any:
+        # ids continue after the ones in the dataset
+        return super()._new_ids(start={t: n + 1 for t, n in self.dataset_state.ids.items()})
+
+    def _read_fleet(self) -> int:
+        self.manufacturers = [
+            Manufacturer(**row) for row in _read(self.dataset.joinpath("manufacturers.csv"))
+        ]
+        return len(self.manufacturers)
+
+    def _simulate_window(self) -> int:
+        self.flight_slots = []
+        self.maintenance_slots = []
+
+        start, end = self.window
+        state = self.dataset_state
+        logging.info(f"Simulating {self.days} more days of aircraft timelines")
+
+        fleet = len(self.manufacturers)
+        aircraft = list(zip(
+            self.manufacturers,
+            split_evenly(round(state.flights_per_day * self.days), fleet),
+            split_evenly(round(state.maintenance_per_day * self.days), fleet),
+        ))
+
+        for chunk in self.progress.chunks(aircraft, stage="timelines", unit="aircraft"):
+            for manufacturer, flights, maintenance in chunk:
+                flight_slots, maintenance_slots = self._aircraft_timeline(
+                    manufacturer,
+                    flights=flights,
+                    maintenance=maintenance,
+                    # never before the aircraft is back from its last slot
+                    start=max(start, state.last_end.get(manufacturer.aircraft_reg_code, start)),
+                    end=end,
+                )
+                self.flight_slots.extend(flight_slots)
+                self.maintenance_slots.extend(maintenance_slots)
+
+        return len(self.flight_slots) + len(self.maintenance_slots)
+
+    def append_csv(self) -> DatasetState:
+        """Appends the new rows to the dataset, and returns its updated state"""
+        with self._stage("append_csv") as stage:
+            for tablename in self.appended:
+                rows = getattr(self, tablename)
+                if not len(rows):
+                    continue
+                columns = list(rows[0].as_dict().keys())
+                file = self.dataset.joinpath(f"{tablename}.csv")
+
+                header = None
+                if file.exists():
+                    with file.open(newline="") as fp:
+                        header = next(csv.reader(fp), None)
+                if header is not None and header != columns:
+                    raise ValueError(f"{file} has columns {header}, expected {columns}")
+
+                with file.open("at", newline="") as fp:
+                    writer = csv.DictWriter(fp, fieldnames=columns, delimiter=",")
+                    if header is None:
+                        writer.writeheader()
+                    for chunk in self.progress.chunks(rows, stage=f"{tablename}.csv"):
+                        writer.writerows(entity.as_dict() for entity in chunk)
+                stage.rows += len(rows)
+
+        state = self.dataset_state
+        ids = self.ids.high_water_marks()
+        last_end = dict(state.last_end)
+        for slot in (*self.flight_slots, *self.maintenance_slots):
+            ends = [to_epoch(t) for t in (slot.scheduledarrival, getattr(slot, "actualarrival", None))
+                    if isinstance(t, datetime)]
+            if ends:
+                aircraft = slot.aircraftregistration
+                last_end[aircraft] = max(last_end.get(aircraft, 0), *ends)
+
+        self.dataset_state = attr.evolve(
+            state,
+            until=self.window[1],
+            last_end=last_end,
+            ids={t: max(state.ids.get(t, 0), ids.get(t, 0)) for t in {*state.ids, *ids}},
+        )
+        write_state(self.dataset, self.dataset_state)
+
+        self._dump_metrics()
+        logging.info(f"Appended {self.days} days to {self.dataset}")
+        return self.dataset_state
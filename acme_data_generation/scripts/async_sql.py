@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+import typing as T
+from itertools import islice
+
+import attr
+
+from acme_data_generation.scripts.store import ColumnarTable, MappedTable
+
+try:
+    import asyncpg
+except ImportError:  # optional, only needed by `airbase-gen sql --async-load`
+    asyncpg = None
+
+__doc__ = """Loads tables into postgres while they are being generated
+
+`AircraftGenerator.populate` runs in a worker thread, and hands every table
+over as soon as it is final. The table is cut in chunks of records, which go
+through a bounded queue to `workers` consumers, each one with its own
+connection, that load them with COPY (`copy_records_to_table`). When the
+queue is full the generator waits, so memory stays bounded. If a COPY fails,
+the generator raises its error at its next chunk, the other consumers are
+cancelled, and the run fails with that error.
+
+End to end time gets close to max(generation, load), instead of their sum.
+Tables that are not mapped to a database table, such as manufacturers, are
+skipped, as in `AircraftGenerator.to_sql`.
+"""
+
+CHUNK_SIZE = 10000
+
+
+@attr.s(auto_attribs=True)
+class Chunk:
+    schema: T.Optional[str]
+    table: str
+    columns: T.List[str]
+    records: T.List[T.Tuple[T.Any, ...]]
+
+
+@attr.s(auto_attribs=True)
+class LoadStats:
+    # tablename -> rows loaded
+    rows: T.Dict[str, int] = attr.Factory(dict)
+    chunks: int = 0
+    wall_time: float = 0.0
+    # time the generator waited on a full queue, i.e. the database was behind
+    producer_stall: float = 0.0
+    # time consumers waited on an empty queue, i.e. generation was behind
+    consumer_idle: float = 0.0
+
+    def __str__(self):
+        lines = [f"{table}: {rows} rows" for table, rows in self.rows.items()]
+        lines.append(
+            f"{sum(self.rows.values())} rows in {self.chunks} chunks, {self.wall_time:.3f}[s]. "
+            f"generator stalled {self.producer_stall:.3f}[s], "
+            f"loaders idle {self.consumer_idle:.3f}[s]"
+        )
+        return "\n".join(lines)
+
+
+def to_chunks(rows: T.Iterable[T.Any], chunk_size: int = CHUNK_SIZE) -> T.Iterator[Chunk]:
+    """Cuts mapped entities in chunks of records, skips non mapped ones"""
+    if isinstance(rows, (ColumnarTable, MappedTable)):
+        # records straight from the columns, e.g. attachments
+        table = getattr(rows.entity_class, "__table__", None)
+        if table is None:
+            return
+        for records in rows.iter_records(chunk_size):
+            yield Chunk(schema=table.schema, table=table.name, columns=rows.columns, records=records)
+        return
+
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, chunk_size))
+        if not batch:
+            break
+        table = getattr(type(batch[0]), "__table__", None)
+        if table is None:
+            # not a sqlalchemy mapped class
+            break
+        columns = list(batch[0].as_dict().keys())
+        yield Chunk(
+            schema=table.schema,
+            table=table.name,
+            columns=columns,
+            records=[tuple(row.as_dict().values()) for row in batch],
+        )
+
+
+class AsyncLoader:
+    def __init__(
+        self,
+        dsn: str,
+        workers: int = 4,
+        queue_size: int = 8,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.dsn = dsn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+
+    async def _open(self):
+        if asyncpg is None:
+            raise ImportError("the async loader needs asyncpg, pip install asyncpg")
+        return await asyncpg.create_pool(
+            self.dsn, min_size=self.workers, max_size=self.workers
+        )
+
+    async def _close(self, pool) -> None:
+        await pool.close()
+
+    async def _copy(self, pool, chunk: Chunk) -> None:
+        async with pool.acquire() as connection:
+            await connection.copy_records_to_table(
+                chunk.table,
+                records=chunk.records,
+                columns=chunk.columns,
+                schema_name=chunk.schema,
+            )
+
+    async def _consume(self, pool, queue: asyncio.Queue, stats: LoadStats) -> None:
+        while True:
+            start = time.perf_counter()
+            item = await queue.get()
+            stats.consumer_idle += time.perf_counter() - start
+            if item is None:
+                break
+            tablename, chunk = item
+            await self._copy(pool, chunk)
+            stats.rows[tablename] = stats.rows.get(tablename, 0) + len(chunk.records)
+            stats.chunks += 1
+
+    async def _run(self, ag) -> LoadStats:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        stats = LoadStats()
+        # set to the error of the first consumer that fails
+        failure: asyncio.Future = loop.create_future()
+
+        def on_done(consumer: asyncio.Future) -> None:
+            if consumer.cancelled() or failure.done():
+                return
+            if consumer.exception() is not None:
+                failure.set_exception(consumer.exception())
+
+        async def put(item: T.Any) -> None:
+            # waits for room in the queue, unless a consumer failed, since
+            # then nobody may ever make room
+            putting = asyncio.ensure_future(queue.put(item))
+            await asyncio.wait([putting, failure], return_when=asyncio.FIRST_COMPLETED)
+            if failure.done():
+                putting.cancel()
+                raise failure.exception()
+
+        def on_table(tablename: str, rows: T.Sequence[T.Any]) -> None:
+            # runs in the generator thread, blocks while the queue is full
+            for chunk in to_chunks(rows, self.chunk_size):
+                start = time.perf_counter()
+                asyncio.run_coroutine_threadsafe(put((tablename, chunk)), loop).result()
+                stats.producer_stall += time.perf_counter() - start
+
+        pool = await self._open()
+        try:
+            consumers = [
+                asyncio.ensure_future(self._consume(pool, queue, stats))
+                for _ in range(self.workers)
+            ]
+            for consumer in consumers:
+                consumer.add_done_callback(on_done)
+            try:
+                await loop.run_in_executor(None, lambda: ag.populate(on_table=on_table))
+                for _ in consumers:
+                    await put(None)
+                await asyncio.gather(*consumers)
+            except BaseException:
+                # consumers that are left would wait on the queue forever
+                for consumer in consumers:
+                    consumer.cancel()
+                await asyncio.gather(*consumers, return_exceptions=True)
+                raise
+        finally:
+            await self._close(pool)
+
+        return stats
+
+    def run(self, ag) -> LoadStats:
+        """Populates `ag` and loads its tables, returns the load statistics"""
+        start = time.perf_counter()
+        stats = asyncio.run(self._run(ag))
+        stats.wall_time = time.perf_counter() - start
+        logging.info(f"Loaded {sum(stats.rows.values())} rows in {stats.wall_time:.3f}[s]")
+        return stats
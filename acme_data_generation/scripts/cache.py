@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import typing as T
+from datetime import datetime
+from pathlib import Path
+
+import attr
+
+from acme_data_generation import __version__
+from acme_data_generation.scripts.store import SpilledTable, class_path, import_class
+
+__doc__ = """A content-addressed, on-disk cache of generated tables
+
+Generation is deterministic for a given configuration and seed, so the tables
+of a run can be stored under a hash of the configuration and the package
+version, and reused by any later run with the same key:
+
+    <cache_dir>/
+        <key>/
+            manifest.json
+            flight_slots/      # a SpilledTable, one file per column
+            ...
+
+The reference tables, maintenance personnel and the fleet, are also cached
+on their own, under a key of only what their stage reads (`stage_key`), with
+the random state the run continues from. A run that changes anything else,
+e.g. the number of slots, still reuses them.
+
+Entries are evicted least recently used first, once the cache goes over
+`max_mb`. An entry is used when it is read or written.
+"""
+
+# configuration fields that do not change the generated tables
+IGNORED_FIELDS = (
+    "progress",
+    "progress_chunk_size",
+    "metrics_path",
+    "max_memory_mb",
+    "spill_dir",
+    "compact_tables",
+    "mapped_tables",
+    "cache_dir",
+    "cache_max_mb",
+    "db_url",
+    "checkpoint_dir",
+)
+
+# stages that generate reference tables -> configuration fields they read,
+# on top of the seed. They run first, so no other stage changes their input
+REFERENCE_STAGES = {
+    "maintenance personnel": ("personnel_list_size",),
+    "fleet": ("fleet_size", "fleet_start"),
+}
+
+MANIFEST = "manifest.json"
+
+
+def config_key(config) -> str:
+    """A hash of the configuration fields that affect the generated tables"""
+    fields = {
+        k: v for k, v in attr.asdict(config).items() if k not in IGNORED_FIELDS
+    }
+    # the weights actually used, which may be set after init
+    fields["_prob_weights"] = config._prob_weights
+    payload = json.dumps(
+        {"version": __version__, "config": fields}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def stage_key(config, stage: str, previous: str = "") -> str:
+    """A hash of what a reference stage depends on: its own fields, the seed,
+    and the key of the stage before it, whose random state it continues from"""
+    fields = {f: getattr(config, f) for f in REFERENCE_STAGES[stage]}
+    fields.update(
+        seed=config.seed,
+        fast_primitives=config.fast_primitives,
+        corruption_pass=config.corruption_pass,
+    )
+    if not config.corruption_pass:
+        # the quality of every row is drawn with them
+        fields["_prob_weights"] = config._prob_weights
+    payload = json.dumps(
+        {"version": __version__, "stage": stage, "previous": previous, "config": fields},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _size_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 2 ** 20
+
+
+@attr.s(auto_attribs=True)
+class CacheEntry:
+    key: str
+    path: Path
+    # tablename -> rows, in generation order
+    tables: T.Dict[str, T.Sequence[T.Any]]
+    # anything else needed to restore a run, e.g. id high-water marks
+    extra: T.Dict[str, T.Any]
+
+
+class TableCache:
+    def __init__(self, path: Path, max_mb: float = 1024.0):
+        self.path = Path(path)
+        self.max_mb = max_mb
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path.joinpath(key)
+
+    def get(self, key: str) -> T.Optional[CacheEntry]:
+        """Returns the cached tables of a key, as spilled tables, if any"""
+        path = self._entry_path(key)
+        manifest = path.joinpath(MANIFEST)
+        if not manifest.exists():
+            return None
+
+        meta = json.loads(manifest.read_text())
+        tables = {}
+        for tablename, table in meta["tables"].items():
+            if not table["length"]:
+                tables[tablename] = []
+                continue
+            tables[tablename] = SpilledTable(
+                path.joinpath(tablename),
+                entity_class=import_class(table["class"]),
+                columns=table["columns"],
+                length=table["length"],
+                chunk_size=table["chunk_size"],
+            )
+
+        # marks the entry as recently used
+        os.utime(manifest)
+        return CacheEntry(key=key, path=path, tables=tables, extra=meta["extra"])
+
+    def put(
+        self,
+        key: str,
+        tables: T.Dict[str, T.Sequence[T.Any]],
+        extra: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> Path:
+        """Stores tables under a key, then evicts entries over the size limit"""
+        path = self._entry_path(key)
+        # written aside and renamed, so readers never see a partial entry
+        tmp = self.path.joinpath(f"{key}.tmp-{os.getpid()}")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+
+        meta = {
+            "version": __version__,
+            "created": datetime.now().isoformat(),
+            "tables": {},
+            "extra": extra or {},
+        }
+        for tablename, rows in tables.items():
+            if not len(rows):
+                meta["tables"][tablename] = {"length": 0}
+                continue
+
+            if isinstance(rows, SpilledTable):
+                shutil.copytree(rows.path, tmp.joinpath(tablename))
+                table = rows
+            else:
+                table = SpilledTable.spill(rows, tmp.joinpath(tablename))
+
+            meta["tables"][tablename] = {
+                "class": class_path(table.entity_class),
+                "columns": table.columns,
+                "length": table.length,
+                "chunk_size": table.chunk_size,
+            }
+
+        tmp.joinpath(MANIFEST).write_text(json.dumps(meta, indent=2, default=str))
+
+        if path.exists():
+            shutil.rmtree(path)
+        tmp.rename(path)
+
+        self.evict()
+        return path
+
+    def entries(self) -> T.List[T.Tuple[Path, float, float]]:
+        """(path, last used, size in MB) of each entry, least recently used first"""
+        entries = []
+        for manifest in self.path.glob(f"*/{MANIFEST}"):
+            entry = manifest.parent
+            entries.append((entry, manifest.stat().st_mtime, _size_mb(entry)))
+        return sorted(entries, key=lambda e: e[1])
+
+    def size_mb(self) -> float:
+        return sum(size for _, _, size in self.entries())
+
+    def evict(self) -> T.List[Path]:
+        """Removes least recently used entries until the cache fits in max_mb"""
+        entries = self.entries()
+        used = sum(size for _, _, size in entries)
+
+        evicted = []
+        # the most recent entry is always kept
+        for path, _, size in entries[:-1]:
+            if used <= self.max_mb:
+                break
+            logging.info(f"Evicting {path.name} from the cache ({size:.1f}[MB])")
+            shutil.rmtree(path)
+            used -= size
+            evicted.append(path)
+
+        return evicted
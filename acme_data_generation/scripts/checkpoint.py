@@ -0,0 +1,192 @@
+import json
+import os
+import random
+import shutil
+import typing as T
+from datetime import datetime
+from pathlib import Path
+
+import attr
+
+from acme_data_generation import __version__
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts.store import SpilledTable, class_path, import_class
+
+__doc__ = """Checkpoints of a generation run, to resume it after a failure
+
+After every stage, AircraftGenerator saves the tables that stage wrote, the
+state of its random generators and its serial ids to a run folder:
+
+    <run_dir>/
+        checkpoint.json    # the last completed stage, and where its tables are
+        tables/
+            02-flight_slots/     # a SpilledTable, written by stage 2
+            03-flight_slots/     # rewritten by stage 3, replaces the one above
+            ...
+
+Tables that a stage does not write are not saved again. checkpoint.json is
+replaced atomically once the tables of a stage are written, so a run that
+dies halfway through saving resumes from the previous stage. Resuming
+restores everything a stage reads, so the output is identical to that of a
+run that never stopped.
+"""
+
+CHECKPOINT = "checkpoint.json"
+
+
+class CheckpointMismatch(Exception):
+    """Raised when resuming a run with different settings than it started with"""
+
+
+@attr.s(auto_attribs=True)
+class Checkpoint:
+    # hash of the configuration, see cache.config_key
+    key: str
+    # index and name of the last completed stage
+    stage: int
+    stage_name: str
+    # tablename -> rows, in the order they were generated
+    tables: T.Dict[str, T.Sequence[T.Any]]
+    # random.getstate() of each random generator
+    rng: T.Dict[str, T.Any]
+    # anything else needed to resume, e.g. serial ids
+    extra: T.Dict[str, T.Any]
+
+
+def rng_state(rng: random.Random) -> T.List[T.Any]:
+    """The state of a random generator, as JSON types"""
+    version, internal, gauss_next = rng.getstate()
+    return [version, list(internal), gauss_next]
+
+
+def set_rng_state(rng: random.Random, state: T.List[T.Any]) -> None:
+    version, internal, gauss_next = state
+    rng.setstate((version, tuple(internal), gauss_next))
+
+
+class RunCheckpoint:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @property
+    def manifest(self) -> Path:
+        return self.path.joinpath(CHECKPOINT)
+
+    def exists(self) -> bool:
+        return self.manifest.exists()
+
+    def read_meta(self) -> T.Dict[str, T.Any]:
+        return json.loads(self.manifest.read_text())
+
+    def config(self, **kwargs) -> BaseConfig:
+        """The configuration the run started with. kwargs override it, e.g.
+        to report progress differently"""
+        fields = {**self.read_meta()["config"], **kwargs, "checkpoint_dir": str(self.path)}
+        return BaseConfig(**fields)
+
+    def load(
+        self, key: str, spilled: T.Collection[str] = (), spill_dir: T.Optional[Path] = None
+    ) -> T.Optional[Checkpoint]:
+        """Returns the last checkpoint, with tables as lists. The tables in
+        `spilled` are copied to `spill_dir` and returned as spilled tables
+        instead, since the ones in the run folder are removed once a later
+        stage replaces them. None if there is no checkpoint yet"""
+        if not self.exists():
+            return None
+
+        meta = self.read_meta()
+        if meta["key"] != key:
+            raise CheckpointMismatch(
+                f"{self.path} was started with other settings, or another version")
+
+        tables: T.Dict[str, T.Sequence[T.Any]] = {}
+        for tablename, table in meta["tables"].items():
+            if not table["length"]:
+                tables[tablename] = []
+                continue
+            path = self.path.joinpath(table["dir"])
+            if tablename in spilled:
+                path = Path(shutil.copytree(path, Path(spill_dir, tablename)))
+            rows = SpilledTable(
+                path,
+                entity_class=import_class(table["class"]),
+                columns=table["columns"],
+                length=table["length"],
+                chunk_size=table["chunk_size"],
+            )
+            tables[tablename] = rows if tablename in spilled else list(rows)
+
+        return Checkpoint(
+            key=key,
+            stage=meta["stage"],
+            stage_name=meta["stage_name"],
+            tables=tables,
+            rng=meta["rng"],
+            extra=meta["extra"],
+        )
+
+    def save(
+        self,
+        key: str,
+        stage: int,
+        stage_name: str,
+        tables: T.Dict[str, T.Sequence[T.Any]],
+        changed: T.Iterable[str],
+        rng: T.Dict[str, T.Any],
+        extra: T.Optional[T.Dict[str, T.Any]] = None,
+        config: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> Path:
+        """Saves the tables in `changed` and the state after `stage`"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        previous = self.read_meta()["tables"] if self.exists() else {}
+        changed = set(changed)
+
+        meta = {
+            "version": __version__,
+            "created": datetime.now().isoformat(),
+            "key": key,
+            "stage": stage,
+            "stage_name": stage_name,
+            "tables": {},
+            "rng": rng,
+            "extra": extra or {},
+            "config": config or {},
+        }
+
+        for tablename, rows in tables.items():
+            if tablename in previous and tablename not in changed:
+                meta["tables"][tablename] = previous[tablename]
+                continue
+            if not len(rows):
+                meta["tables"][tablename] = {"length": 0}
+                continue
+
+            directory = f"tables/{stage:02d}-{tablename}"
+            path = self.path.joinpath(directory)
+            if path.exists():
+                # left by a run that died while saving this stage
+                shutil.rmtree(path)
+            if isinstance(rows, SpilledTable):
+                shutil.copytree(rows.path, path)
+                table = rows
+            else:
+                table = SpilledTable.spill(rows, path)
+
+            meta["tables"][tablename] = {
+                "dir": directory,
+                "class": class_path(table.entity_class),
+                "columns": table.columns,
+                "length": table.length,
+                "chunk_size": table.chunk_size,
+            }
+
+        tmp = self.path.joinpath(f"{CHECKPOINT}.tmp")
+        tmp.write_text(json.dumps(meta, default=str))
+        os.replace(tmp, self.manifest)
+
+        # tables replaced by this stage are no longer referenced
+        for tablename, table in previous.items():
+            if table.get("dir") and meta["tables"].get(tablename, {}).get("dir") != table["dir"]:
+                shutil.rmtree(self.path.joinpath(table["dir"]), ignore_errors=True)
+
+        return self.manifest
@@ -0,0 +1,166 @@
+import logging
+import re
+import time
+import typing as T
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import attr
+from sqlalchemy import text
+from sqlalchemy.engine.base import Engine
+
+__doc__ = """Runs the business rules checks in `tests-fixes/*-checks.sql`
+
+The check packs are plain SQL files meant to be pasted into pgAdmin. Each
+rule starts with a `-- Rn: description` header, followed by a mix of count
+queries, exploratory selects and `update` fixes. Only the `select count(...)`
+statements are considered checks, the rest is ignored.
+"""
+
+# e.g. "-- R16: flightID is ..." or "--  R15: In MaintenanceEvents ..."
+re_rule_header = re.compile(r"^--\s*(R\d+(?:-[A-Z])?)\b")
+re_statement_start = re.compile(
+    r"^(select|update|insert|delete|create|drop|alter)\b", re.IGNORECASE
+)
+re_count_query = re.compile(r"^select\s+count\s*\(", re.IGNORECASE)
+
+
+@attr.s(auto_attribs=True)
+class Check:
+    name: str
+    rule: str
+    sql: str
+    source: str
+
+
+@attr.s(auto_attribs=True)
+class CheckResult:
+    check: Check
+    violations: T.Optional[int]
+    elapsed: float
+    error: T.Optional[str] = None
+
+
+def _split_statements(lines: T.List[str]) -> T.List[str]:
+    """Splits SQL lines into statements.
+
+    Statements in the check packs are not always terminated by a semicolon,
+    so a new statement also starts on any line beginning with a SQL verb
+    outside of parentheses.
+    """
+    statements = []
+    buffer: T.List[str] = []
+    depth = 0
+
+    for line in lines:
+        stripped = line.strip()
+        if buffer and depth == 0 and re_statement_start.search(stripped):
+            statements.append(" ".join(buffer))
+            buffer = []
+
+        for chunk in re.split(r"(;)", stripped):
+            if chunk == ";":
+                if buffer:
+                    statements.append(" ".join(buffer))
+                buffer = []
+                depth = 0
+            elif chunk.strip():
+                buffer.append(chunk.strip())
+                depth += chunk.count("(") - chunk.count(")")
+
+    if buffer:
+        statements.append(" ".join(buffer))
+
+    return statements
+
+
+def parse_checks(path: Path) -> T.List[Check]:
+    """Parses a check pack into named count queries, one or more per rule"""
+
+    sections: T.List[T.Tuple[str, T.List[str]]] = []
+
+    with path.open("rt", encoding="utf-8", errors="replace") as fp:
+        for line in fp:
+            header = re_rule_header.search(line.strip())
+            if header:
+                sections.append((header.group(1), []))
+                continue
+            if not sections:
+                continue
+            # drop comments, they are full of notes like "-- 3273 with error"
+            sections[-1][1].append(line.split("--", 1)[0])
+
+    checks = []
+    for rule, lines in sections:
+        queries = [s for s in _split_statements(lines) if re_count_query.search(s)]
+        for n, sql in enumerate(queries, start=1):
+            name = rule if len(queries) == 1 else f"{rule}.{n}"
+            checks.append(Check(name=name, rule=rule, sql=sql, source=path.name))
+
+    return checks
+
+
+def _violations(row) -> T.Optional[int]:
+    """Reads the number of violations out of a result row
+
+    Single column queries count violations directly. Two column queries are
+    of the form `count(distinct id), count(*)`, and violations are duplicates.
+    """
+    if row is None:
+        return None
+    if len(row) == 2:
+        return row[1] - row[0]
+    return row[0]
+
+
+def run_check(
+    engine: Engine, check: Check, timeout: T.Optional[float] = None
+) -> CheckResult:
+    start = time.perf_counter()
+    try:
+        # SET LOCAL only lasts for the transaction, so pooled connections are
+        # returned with their own settings
+        with engine.connect() as conn, conn.begin():
+            if engine.dialect.name == "postgresql":
+                # unqualified table names in the check packs
+                conn.execute('SET LOCAL search_path TO "AIMS", "AMOS", public')
+                if timeout:
+                    conn.execute(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+            row = conn.execute(text(check.sql)).first()
+    except Exception as e:
+        logging.debug(f"Check {check.name} failed", exc_info=True)
+        error = str(getattr(e, "orig", e)).strip().splitlines()[0]
+        return CheckResult(check, None, time.perf_counter() - start, error)
+
+    return CheckResult(check, _violations(row), time.perf_counter() - start)
+
+
+def run_checks(
+    engine: Engine,
+    checks: T.List[Check],
+    workers: int = 4,
+    timeout: T.Optional[float] = None,
+) -> T.List[CheckResult]:
+    """Runs checks concurrently over the connection pool of `engine`
+
+    Results are returned in the same order as `checks`.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(lambda check: run_check(engine, check, timeout), checks)
+        )
+
+
+def format_report(results: T.List[CheckResult]) -> str:
+    rows = [("rule", "violations", "elapsed [s]", "source")]
+    for r in results:
+        violations = f"error: {r.error}" if r.error else str(r.violations)
+        rows.append((r.check.name, violations, f"{r.elapsed:.3f}", r.check.source))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]) - 1)]
+    lines = [
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)) + "  " + row[-1]
+        for row in rows
+    ]
+    lines.insert(1, "-" * len(lines[0]))
+    return "\n".join(lines)
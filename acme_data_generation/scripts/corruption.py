@@ -0,0 +1,255 @@
+import random
+import typing as T
+from datetime import timedelta
+from string import ascii_letters, digits, punctuation
+
+__doc__ = """Corrupts generated tables in a single post-generation pass
+
+Instead of deciding the quality of every field inside each provider call,
+rows are generated clean and a quality mask is sampled per table, with exact
+noisy and bad rates. Corruption is then applied column by column, to all the
+masked rows of a table at once.
+
+Each operation takes the column values of the masked rows, one list per
+column, and returns them corrupted:
+
+>>> rng = random.Random(42)
+>>> swap([[1, 2], [3, 4]], rng)
+[[3, 4], [1, 2]]
+"""
+
+Columns = T.List[T.List[T.Any]]
+Operation = T.Callable[[Columns, random.Random], Columns]
+
+
+# ---------------------------------------------------------------------------- #
+#                               quality masks                                  #
+# ---------------------------------------------------------------------------- #
+
+
+def quality_mask(
+    size: int, weights: T.Sequence[float], rng: random.Random
+) -> T.List[str]:
+    """Returns `size` qualities with exact proportions given by `weights`
+
+    Counts are rounded with the largest remainder method, so that the mask
+    always has `size` elements.
+    """
+    choices = ("good", "noisy", "bad")
+    total = sum(weights)
+    exact = [size * w / total for w in weights]
+    counts = [int(e) for e in exact]
+
+    by_remainder = sorted(range(3), key=lambda i: exact[i] - counts[i], reverse=True)
+    for i in by_remainder[: size - sum(counts)]:
+        counts[i] += 1
+
+    mask = [q for q, count in zip(choices, counts) for _ in range(count)]
+    rng.shuffle(mask)
+    return mask
+
+
+# ---------------------------------------------------------------------------- #
+#                                  operations                                  #
+# ---------------------------------------------------------------------------- #
+
+
+def _random_strings(
+    n: int, rng: random.Random, size: T.Union[int, T.Tuple[int, int]], chars: str
+) -> T.List[str]:
+    low, high = (size, size) if isinstance(size, int) else size
+    return [
+        "".join(rng.choices(chars, k=rng.randint(low, high))) for _ in range(n)
+    ]
+
+
+def flip_case(columns: Columns, rng: random.Random) -> Columns:
+    """Alters the case of every character at random, like make_noisy"""
+
+    def _flip(value):
+        if not isinstance(value, str):
+            return value
+        bits = rng.getrandbits(len(value) or 1)
+        return "".join(
+            c.upper() if (bits >> i) & 1 else c.lower() for i, c in enumerate(value)
+        )
+
+    return [[_flip(v) for v in column] for column in columns]
+
+
+def pad(max_whitespace: int = 2) -> Operation:
+    """Adds trailing whitespace at random
+
+    Leading whitespace is left out, because it breaks CHAR(n) columns in SQL,
+    while postgres truncates trailing spaces.
+    """
+
+    def _pad(columns: Columns, rng: random.Random) -> Columns:
+        return [
+            [
+                v + " " * rng.randint(0, max_whitespace) if isinstance(v, str) else v
+                for v in column
+            ]
+            for column in columns
+        ]
+
+    return _pad
+
+
+def random_string(
+    size: T.Union[int, T.Tuple[int, int]] = 5,
+    chars: str = ascii_letters + punctuation + digits,
+) -> Operation:
+    """Replaces values with random strings, like AirportProvider.random_string"""
+
+    def _random_string(columns: Columns, rng: random.Random) -> Columns:
+        return [_random_strings(len(column), rng, size, chars) for column in columns]
+
+    return _random_string
+
+
+def shift_timestamps(min_days: int = 50 * 365, max_days: int = 100 * 365) -> Operation:
+    """Shifts all the columns of a row by the same random amount of days"""
+
+    def _shift(columns: Columns, rng: random.Random) -> Columns:
+        shifts = [
+            timedelta(days=rng.choice((-1, 1)) * rng.randint(min_days, max_days))
+            for _ in range(len(columns[0]))
+        ]
+        return [
+            [v + s if v is not None else v for v, s in zip(column, shifts)]
+            for column in columns
+        ]
+
+    return _shift
+
+
+def blow_up(low: int, high: int) -> Operation:
+    """Multiplies values by a random factor in [low, high]"""
+
+    def _blow_up(columns: Columns, rng: random.Random) -> Columns:
+        return [
+            [v * rng.randint(low, high) if v is not None else v for v in column]
+            for column in columns
+        ]
+
+    return _blow_up
+
+
+def swap(columns: Columns, rng: random.Random) -> Columns:
+    """Swaps two columns, e.g. arrivals and departures"""
+    first, second = columns
+    return [second, first]
+
+
+# ---------------------------------------------------------------------------- #
+#                              corruption rules                                #
+# ---------------------------------------------------------------------------- #
+
+# tablename -> quality -> [(columns, operation)], applied in order
+_noisy_strings = [flip_case, pad(2)]
+
+rules: T.Dict[str, T.Dict[str, T.List[T.Tuple[T.Tuple[str, ...], Operation]]]] = {
+    "maintenance_personnel": {
+        "noisy": [(("airport",), op) for op in _noisy_strings],
+        "bad": [(("airport",), random_string(3, digits + ascii_letters))],
+    },
+    "manufacturers": {
+        "noisy": [
+            (("manufacturer_serial_number", "aircraft_model", "aircraft_manufacturer"), op)
+            for op in _noisy_strings
+        ],
+        "bad": [
+            (("aircraft_reg_code",), random_string(6, digits + ascii_letters)),
+            (("aircraft_model",), random_string((5, 14))),
+        ],
+    },
+    "flight_slots": {
+        "noisy": [(("departureairport", "arrivalairport"), flip_case)],
+        "bad": [
+            (
+                (
+                    "scheduleddeparture",
+                    "scheduledarrival",
+                    "actualdeparture",
+                    "actualarrival",
+                ),
+                shift_timestamps(),
+            ),
+            (("actualdeparture", "actualarrival"), swap),
+            (("aircraftregistration",), random_string(6, digits + ascii_letters)),
+            (("passengers", "cabincrew", "flightcrew"), blow_up(5, 10)),
+        ],
+    },
+    "maintenance_slots": {
+        "bad": [
+            (("scheduleddeparture", "scheduledarrival"), shift_timestamps()),
+            (("aircraftregistration",), random_string(6, digits + ascii_letters)),
+        ],
+    },
+    "operational_interruptions": {
+        "noisy": [(("airport",), flip_case)],
+        "bad": [
+            (("airport",), random_string(3, digits + ascii_letters)),
+            (("subsystem",), random_string(4)),
+            (("duration",), blow_up(-100, 100)),
+        ],
+    },
+    "maintenance_events": {
+        "noisy": [(("airport",), flip_case)],
+        "bad": [
+            (("airport",), random_string(3, digits + ascii_letters)),
+            (("subsystem",), random_string(4)),
+            (("duration",), blow_up(-100, 100)),
+        ],
+    },
+    "forecasted_orders": {
+        "noisy": [(("executionplace",), flip_case)],
+        "bad": [(("frequency", "forecastedmanhours"), blow_up(5, 10))],
+    },
+    "tlb_orders": {
+        "noisy": [(("executionplace",), flip_case)],
+        "bad": [(("due",), shift_timestamps(1, 500))],
+    },
+    "work_packages": {
+        "noisy": [(("executionplace",), flip_case)],
+    },
+}
+
+
+def corrupt_table(
+    rows: T.List[T.Any],
+    mask: T.List[str],
+    table_rules: T.Dict[str, T.List[T.Tuple[T.Tuple[str, ...], Operation]]],
+    rng: random.Random,
+) -> None:
+    """Corrupts the rows of a table in-place, following a quality mask"""
+
+    for quality, operations in table_rules.items():
+        subset = [row for row, q in zip(rows, mask) if q == quality]
+        if not subset:
+            continue
+
+        for columns, operation in operations:
+            values = [[getattr(row, c) for row in subset] for c in columns]
+            for column, corrupted in zip(columns, operation(values, rng)):
+                for row, value in zip(subset, corrupted):
+                    setattr(row, column, value)
+
+
+def corrupt(
+    tables: T.Dict[str, T.List[T.Any]],
+    weights: T.Sequence[float],
+    rng: T.Optional[random.Random] = None,
+) -> T.Dict[str, T.List[str]]:
+    """Corrupts generated tables in-place, and returns their quality masks"""
+
+    rng = rng or random.Random()
+    masks = {}
+
+    for tablename, rows in tables.items():
+        masks[tablename] = quality_mask(len(rows), weights, rng)
+        if tablename in rules:
+            corrupt_table(rows, masks[tablename], rules[tablename], rng)
+
+    return masks
@@ -0,0 +1,304 @@
+import csv
+import hashlib
+import json
+import logging
+import typing as T
+from datetime import datetime
+from pathlib import Path
+
+import attr
+
+from acme_data_generation import __version__
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.base.ids import IdAllocator
+from acme_data_generation.providers.airport import AirportProvider
+
+__doc__ = """Generation of a single dataset split in shards, over several hosts
+
+1. `plan` splits a BaseConfig in `num_shards` shards, and writes a manifest
+   with the settings of each one: its seed, its range of the fleet, its
+   sizes, its share of the id blocks (R8) and its output folder
+2. `run_shard` generates one shard, on any host that can read the manifest,
+   and writes its CSV files and a `shard.json` report to its output folder
+3. `merge` verifies the shards against each other, and concatenates them
+   in one CSV file per table
+
+Shards never coordinate while running. Aircraft registration codes are
+disjoint by fleet range, and serial ids by id blocks, so the merged dataset
+is consistent by construction. `merge` checks it anyway, row by row and
+without keeping the ids: each shard's high-water marks and serial ids must
+lie in its own id blocks, and its registration codes in its fleet range.
+"""
+
+# configuration fields that are set per shard, or don't apply to shards
+SHARD_FIELDS = (
+    "seed",
+    "size",
+    "flight_slots_size",
+    "maintenance_slots_size",
+    "tlb_orders_size",
+    "forecasted_orders_size",
+    "work_packages_size",
+    "fleet_size",
+    "personnel_list_size",
+    "shard",
+    "num_shards",
+    "fleet_start",
+    "metrics_path",
+    "cache_dir",
+    "checkpoint_dir",
+)
+
+# columns holding serial ids (R8), that must be unique across shards, and
+# their id sequence. Aircraft registration codes have none, they are unique
+# by fleet range
+UNIQUE_COLUMNS = {
+    "maintenance_events": ("maintenanceid", "maintenanceevents"),
+    "operational_interruptions": ("maintenanceid", "maintenanceevents"),
+    "forecasted_orders": ("workorderid", "workorders"),
+    "tlb_orders": ("workorderid", "workorders"),
+    "manufacturers": ("aircraft_reg_code", None),
+}
+
+REPORT = "shard.json"
+
+
+class ShardMismatch(Exception):
+    """Raised by merge when the shards are missing or not consistent"""
+
+
+def _split(total: int, parts: int) -> T.List[int]:
+    """Splits total in parts that differ by one at most"""
+    return [total // parts + (1 if k < total % parts else 0) for k in range(parts)]
+
+
+def shard_seed(seed: int, shard: int) -> int:
+    """A seed per shard, that doesn't collide with the seeds of other datasets"""
+    return int(hashlib.sha256(f"{seed}:{shard}".encode()).hexdigest()[:8], 16)
+
+
+def plan(config: BaseConfig, num_shards: int, out: Path) -> T.Dict[str, T.Any]:
+    """Returns a manifest that splits the dataset of `config` in shards"""
+    if not (1 <= num_shards <= config.fleet_size):
+        raise ValueError("there must be between 1 and fleet_size shards")
+
+    out = Path(out)
+    fleet = _split(config.fleet_size, num_shards)
+    flight_slots = _split(config.flight_slots_size, num_shards)
+    maintenance_slots = _split(config.maintenance_slots_size, num_shards)
+    tlb_orders = _split(config.tlb_orders_size, num_shards)
+    forecasted_orders = _split(config.forecasted_orders_size, num_shards)
+    work_packages = _split(config.work_packages_size, num_shards)
+    personnel = _split(config.personnel_list_size, num_shards)
+
+    shards = []
+    fleet_start = 0
+    for k in range(num_shards):
+        shards.append(
+            {
+                "shard": k,
+                "seed": shard_seed(config.seed, k),
+                "fleet_start": fleet_start,
+                "fleet_size": fleet[k],
+                "flight_slots_size": flight_slots[k],
+                "maintenance_slots_size": maintenance_slots[k],
+                "tlb_orders_size": tlb_orders[k],
+                "forecasted_orders_size": forecasted_orders[k],
+                "work_packages_size": work_packages[k],
+                "personnel_list_size": personnel[k],
+                "out": str(out.joinpath(f"shard-{k:03d}")),
+            }
+        )
+        fleet_start += fleet[k]
+
+    return {
+        "version": __version__,
+        "created": datetime.now().isoformat(),
+        "num_shards": num_shards,
+        "id_block_size": config.id_block_size,
+        "out": str(out),
+        "config": {
+            k: v for k, v in attr.asdict(config).items() if k not in SHARD_FIELDS
+        },
+        "shards": shards,
+    }
+
+
+def write_manifest(manifest: T.Dict[str, T.Any], path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, indent=2, default=str))
+    return path
+
+
+def read_manifest(path: Path) -> T.Dict[str, T.Any]:
+    manifest = json.loads(Path(path).read_text())
+    if manifest["version"] != __version__:
+        logging.warning(
+            f"Manifest written by version {manifest['version']}, running {__version__}"
+        )
+    return manifest
+
+
+def shard_config(manifest: T.Dict[str, T.Any], shard: int, **kwargs) -> BaseConfig:
+    """The BaseConfig of one shard of a manifest"""
+    settings = manifest["shards"][shard]
+    fields = {
+        **manifest["config"],
+        **kwargs,
+        "seed": settings["seed"],
+        "fleet_size": settings["fleet_size"],
+        "flight_slots_size": settings["flight_slots_size"],
+        "maintenance_slots_size": settings["maintenance_slots_size"],
+        "tlb_orders_size": settings["tlb_orders_size"],
+        "forecasted_orders_size": settings["forecasted_orders_size"],
+        "work_packages_size": settings["work_packages_size"],
+        "personnel_list_size": settings["personnel_list_size"],
+        "shard": shard,
+        "num_shards": manifest["num_shards"],
+        "fleet_start": settings["fleet_start"],
+    }
+    return BaseConfig(**fields)
+
+
+def run_shard(
+    manifest: T.Dict[str, T.Any], shard: int, profiler: T.Optional[T.Any] = None, **kwargs
+) -> Path:
+    """Generates one shard to its output folder, profiled by `profiler` if
+    given, see AircraftGenerator. kwargs go to its BaseConfig"""
+    from acme_data_generation.scripts.generate import AircraftGenerator
+
+    config = shard_config(manifest, shard, **kwargs)
+    out = Path(manifest["shards"][shard]["out"])
+    out.mkdir(parents=True, exist_ok=True)
+
+    logging.info(f"Generating shard {shard} of {manifest['num_shards']} in {out}")
+    ag = AircraftGenerator(config, profiler=profiler).populate()
+    ag.to_csv(path=out)
+
+    report = {
+        "shard": shard,
+        "seed": config.seed,
+        "rows": {k: len(v) for k, v in ag.state.items()},
+        "ids": ag.ids.high_water_marks(),
+        "finished": datetime.now().isoformat(),
+    }
+    out.joinpath(REPORT).write_text(json.dumps(report, indent=2))
+    ag.close()
+    return out
+
+
+def _serial_id(column: str, value: str) -> T.Optional[int]:
+    """The serial id in a value of a unique column, or None if it holds none,
+    e.g. in bad rows"""
+    value = value.strip()
+    if column == "maintenanceid":
+        # R3: <id>_<timestamp>
+        value, sep, _ = value.partition("_")
+        if not sep:
+            return None
+    return int(value) if value.isdigit() else None
+
+
+def _fleet_index(code: str) -> T.Optional[int]:
+    """The index of a registration code in the fleet, or None if it is not
+    one of the codes given by index, e.g. a bad one"""
+    prefix, alphabet = AirportProvider._register_prefix, AirportProvider._alphabet
+    code = code.strip().upper()
+    suffix = code[len(prefix):]
+    if not code.startswith(prefix) or len(suffix) != 3 or not all(c in alphabet for c in suffix):
+        return None
+    return sum(alphabet.index(c) * 26 ** p for c, p in zip(suffix, (2, 1, 0)))
+
+
+def _owns(
+    settings: T.Dict[str, T.Any],
+    report: T.Dict[str, T.Any],
+    ids: IdAllocator,
+    column: str,
+    sequence: T.Optional[str],
+    value: str,
+) -> bool:
+    """Whether a value of a unique column can come from this shard: a serial
+    id in its blocks, up to its high-water mark, or a registration code in
+    its fleet range. Values that hold neither can't be checked"""
+    if sequence is None:
+        index = _fleet_index(value)
+        start = settings["fleet_start"]
+        return index is None or start <= index < start + settings["fleet_size"]
+
+    serial = _serial_id(column, value)
+    return serial is None or (
+        ids.owner(sequence, serial) == settings["shard"]
+        and serial <= report["ids"].get(sequence, 0)
+    )
+
+
+def _read_reports(manifest: T.Dict[str, T.Any]) -> T.List[T.Dict[str, T.Any]]:
+    reports = []
+    for settings in manifest["shards"]:
+        path = Path(settings["out"], REPORT)
+        if not path.exists():
+            raise ShardMismatch(f"shard {settings['shard']} has no report in {path.parent}")
+        reports.append(json.loads(path.read_text()))
+    return reports
+
+
+def merge(manifest: T.Dict[str, T.Any], out: T.Optional[Path] = None) -> T.Dict[str, int]:
+    """Verifies the shards, and concatenates them in one CSV file per table
+
+    Returns the number of rows of each merged table.
+    """
+    out = Path(out or Path(manifest["out"], "merged"))
+    reports = _read_reports(manifest)
+    tablenames = list(reports[0]["rows"])
+
+    out.mkdir(parents=True, exist_ok=True)
+    merged = {}
+    # the id blocks of every shard, see IdAllocator
+    ids = IdAllocator(block_size=manifest["id_block_size"], num_shards=manifest["num_shards"])
+    for settings, report in zip(manifest["shards"], reports):
+        for sequence, mark in report["ids"].items():
+            if ids.owner(sequence, mark) != settings["shard"]:
+                raise ShardMismatch(
+                    f"shard {settings['shard']} reports {sequence} ids up to {mark}, "
+                    "outside its id blocks")
+
+    for tablename in tablenames:
+        unique, sequence = UNIQUE_COLUMNS.get(tablename, (None, None))
+        merged[tablename] = 0
+
+        with out.joinpath(f"{tablename}.csv").open("wt", newline="") as fp:
+            writer = None
+            for settings, report in zip(manifest["shards"], reports):
+                path = Path(settings["out"], f"{tablename}.csv")
+                if not path.exists():
+                    if report["rows"].get(tablename):
+                        raise ShardMismatch(f"{path} is missing")
+                    continue
+
+                with path.open(newline="") as shard_fp:
+                    reader = csv.DictReader(shard_fp)
+                    if writer is None:
+                        writer = csv.DictWriter(fp, fieldnames=reader.fieldnames)
+                        writer.writeheader()
+                    elif reader.fieldnames != writer.fieldnames:
+                        raise ShardMismatch(f"{path} has different columns")
+
+                    rows = 0
+                    for row in reader:
+                        value = row[unique] if unique else None
+                        if unique and not _owns(settings, report, ids, unique, sequence, value):
+                            raise ShardMismatch(
+                                f"{tablename}.{unique} '{value}' of shard "
+                                f"{settings['shard']} is outside its id blocks or fleet range")
+                        writer.writerow(row)
+                        rows += 1
+
+                if rows != report["rows"].get(tablename, 0):
+                    raise ShardMismatch(
+                        f"{path} has {rows} rows, the shard reported {report['rows'].get(tablename)}")
+                merged[tablename] += rows
+
+    logging.info(f"Merged {len(reports)} shards in {out}")
+    return merged
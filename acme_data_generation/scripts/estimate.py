@@ -0,0 +1,283 @@
+import csv
+import io
+import logging
+import tempfile
+import time
+import typing as T
+from pathlib import Path
+
+import attr
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts.store import SpilledTable, estimate_size_mb
+
+__doc__ = """Estimates the size and runtime of a dataset before generating it
+
+Row counts are worked out from the BaseConfig, with two rates measured on a
+small calibration sample: the share of delayed flights, which produce an
+operational interruption each (R13), and the maintenance events per
+maintenance slot, since revisions are split in days (R14). Work orders follow
+from `max_work_orders`, `proba_forecast_order` and the order sizes, work
+packages from `max_work_packages` and `work_packages_size`, and attachments
+from `max_attach_size` (R5).
+
+The same sample measures, for every table, the bytes and seconds per row of
+generating it, of holding it in memory, and of writing it to CSV and to the
+columnar store. Estimates scale those linearly to the expected rows.
+"""
+
+# ---------------------------------------------------------------------------- #
+#                                  row counts                                  #
+# ---------------------------------------------------------------------------- #
+
+
+@attr.s(auto_attribs=True)
+class Rates:
+    # share of flight slots with a delay code, i.e. an operational interruption
+    delayed: float
+    # maintenance events per maintenance slot
+    events_per_slot: float
+
+
+def _mean_draw(maximum: int) -> float:
+    """Mean of random.randint(1, maximum)"""
+    return (1 + maximum) / 2
+
+
+def expected_rows(config: BaseConfig, rates: Rates) -> T.Dict[str, int]:
+    """Expected rows of every table, in generation order"""
+    flight_slots = config.flight_slots_size
+    maintenance_slots = config.maintenance_slots_size
+    interruptions = flight_slots * rates.delayed
+    events = maintenance_slots * rates.events_per_slot
+
+    # orders fill both kinds up to their sizes, the overflow of one goes to the other
+    orders = min(
+        events * _mean_draw(config.max_work_orders),
+        config.forecasted_orders_size + config.tlb_orders_size,
+    )
+    forecasted = min(orders * config.proba_forecast_order, config.forecasted_orders_size)
+    tlb = min(orders - forecasted, config.tlb_orders_size)
+    forecasted = orders - tlb
+
+    # R1: one package per order, the rest up to work_packages_size
+    extra = orders * (_mean_draw(config.max_work_packages) - 1)
+    packages = orders + min(extra, max(config.work_packages_size - orders, 0))
+
+    rows = {
+        "maintenance_personnel": config.personnel_list_size,
+        "manufacturers": config.fleet_size,
+        "flight_slots": flight_slots,
+        "maintenance_slots": maintenance_slots,
+        "operational_interruptions": interruptions,
+        "maintenance_events": events,
+        "forecasted_orders": forecasted,
+        "tlb_orders": tlb,
+        "work_packages": packages,
+        "attachments": (interruptions + events) * config.max_attach_size,
+    }
+    return {k: int(round(v)) for k, v in rows.items()}
+
+
+# ---------------------------------------------------------------------------- #
+#                                  calibration                                 #
+# ---------------------------------------------------------------------------- #
+
+
+@attr.s(auto_attribs=True)
+class TableCost:
+    """Measured cost per row of a table"""
+
+    memory_bytes: float = 0.0
+    csv_bytes: float = 0.0
+    csv_seconds: float = 0.0
+    columnar_bytes: float = 0.0
+    columnar_seconds: float = 0.0
+
+
+@attr.s(auto_attribs=True)
+class Calibration:
+    sample_size: int
+    rates: Rates
+    # tablename -> cost per row
+    costs: T.Dict[str, TableCost]
+    # stage -> (seconds, rows of the tables it writes) in the sample
+    stages: T.Dict[str, T.Tuple[float, int]]
+
+
+def _calibration_config(config: BaseConfig, sample_size: int) -> BaseConfig:
+    """The config of the sample: same settings, small sizes, no caps"""
+    orders = sample_size * config.max_work_orders
+    sample = attr.evolve(
+        config,
+        size=sample_size,
+        flight_slots_size=sample_size,
+        maintenance_slots_size=sample_size,
+        forecasted_orders_size=orders,
+        tlb_orders_size=orders,
+        work_packages_size=orders * config.max_work_packages,
+        personnel_list_size=min(config.personnel_list_size, sample_size),
+        fleet_size=min(config.fleet_size, sample_size),
+        metrics_path=None,
+        max_memory_mb=None,
+        cache_dir=None,
+        checkpoint_dir=None,
+        progress="none",
+    )
+    sample._prob_weights = config._prob_weights
+    return sample
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def calibrate(config: BaseConfig, sample_size: int = 200) -> Calibration:
+    """Generates and writes a small sample of the dataset of `config`"""
+    from acme_data_generation.scripts.generate import AircraftGenerator
+
+    ag = AircraftGenerator(_calibration_config(config, sample_size)).populate()
+
+    costs = {}
+    with tempfile.TemporaryDirectory(prefix="acme-calibration-") as scratch:
+        for tablename, rows in ag.state.items():
+            if not rows:
+                costs[tablename] = TableCost()
+                continue
+
+            start = time.perf_counter()
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=rows[0].as_dict().keys())
+            writer.writeheader()
+            writer.writerows(row.as_dict() for row in rows)
+            csv_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            spilled = SpilledTable.spill(rows, Path(scratch, tablename))
+            columnar_seconds = time.perf_counter() - start
+
+            n = len(rows)
+            costs[tablename] = TableCost(
+                memory_bytes=estimate_size_mb(rows) * 2 ** 20 / n,
+                csv_bytes=len(buffer.getvalue().encode()) / n,
+                csv_seconds=csv_seconds / n,
+                columnar_bytes=_dir_size(spilled.path) / n,
+                columnar_seconds=columnar_seconds / n,
+            )
+
+    stages = {}
+    for stage in ag.metrics:
+        outputs = ag.stage_outputs.get(stage.name, tuple(ag.state))
+        stages[stage.name] = (stage.wall_time, sum(len(ag.state[t]) for t in outputs))
+
+    flights = len(ag.flight_slots) or 1
+    rates = Rates(
+        delayed=len(ag.operational_interruptions) / flights,
+        events_per_slot=len(ag.maintenance_events) / (len(ag.maintenance_slots) or 1),
+    )
+    ag.close()
+    return Calibration(sample_size=sample_size, rates=rates, costs=costs, stages=stages)
+
+
+# ---------------------------------------------------------------------------- #
+#                                   estimates                                  #
+# ---------------------------------------------------------------------------- #
+
+
+@attr.s(auto_attribs=True)
+class TableEstimate:
+    tablename: str
+    rows: int
+    memory_mb: float
+    csv_mb: float
+    csv_seconds: float
+    columnar_mb: float
+    columnar_seconds: float
+
+
+@attr.s(auto_attribs=True)
+class Estimate:
+    tables: T.List[TableEstimate]
+    generation_seconds: float
+    calibration: Calibration
+
+    @property
+    def rows(self) -> int:
+        return sum(t.rows for t in self.tables)
+
+    def total(self, field: str) -> float:
+        return sum(getattr(t, field) for t in self.tables)
+
+
+def estimate(config: BaseConfig, calibration: T.Optional[Calibration] = None) -> Estimate:
+    """Estimates rows, bytes and seconds per table for `config`"""
+    calibration = calibration or calibrate(config)
+    rows = expected_rows(config, calibration.rates)
+    sample_rows = expected_rows(
+        _calibration_config(config, calibration.sample_size), calibration.rates)
+
+    tables = []
+    for tablename, n in rows.items():
+        cost = calibration.costs.get(tablename, TableCost())
+        tables.append(
+            TableEstimate(
+                tablename=tablename,
+                rows=n,
+                memory_mb=n * cost.memory_bytes / 2 ** 20,
+                csv_mb=n * cost.csv_bytes / 2 ** 20,
+                csv_seconds=n * cost.csv_seconds,
+                columnar_mb=n * cost.columnar_bytes / 2 ** 20,
+                columnar_seconds=n * cost.columnar_seconds,
+            )
+        )
+
+    # each stage scales with the rows of the tables it writes
+    from acme_data_generation.scripts.generate import AircraftGenerator
+
+    generation = 0.0
+    for stage, (seconds, measured) in calibration.stages.items():
+        outputs = AircraftGenerator.stage_outputs.get(stage, tuple(rows))
+        expected = sum(rows.get(t, 0) for t in outputs)
+        sampled = sum(sample_rows.get(t, 0) for t in outputs) or measured or 1
+        generation += seconds * expected / sampled
+
+    logging.info(f"Estimated from a sample of {calibration.sample_size} slots")
+    return Estimate(tables=tables, generation_seconds=generation, calibration=calibration)
+
+
+def format_estimate(estimate: Estimate, shards: int = 1) -> str:
+    header = ("table", "rows", "memory [MB]", "csv [MB]", "csv [s]", "columnar [MB]", "columnar [s]")
+    rows = [header]
+    for t in estimate.tables:
+        rows.append((
+            t.tablename,
+            str(t.rows),
+            f"{t.memory_mb:.1f}",
+            f"{t.csv_mb:.1f}",
+            f"{t.csv_seconds:.1f}",
+            f"{t.columnar_mb:.1f}",
+            f"{t.columnar_seconds:.1f}",
+        ))
+    rows.append((
+        "total",
+        str(estimate.rows),
+        *(f"{estimate.total(f):.1f}" for f in (
+            "memory_mb", "csv_mb", "csv_seconds", "columnar_mb", "columnar_seconds")),
+    ))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows]
+    lines.insert(1, "-" * len(lines[0]))
+    lines.insert(len(lines) - 1, "-" * len(lines[0]))
+
+    generation = estimate.generation_seconds
+    lines.append("")
+    lines.append(f"generation: {generation:.1f}[s], peak memory of the tables: "
+                 f"{estimate.total('memory_mb'):.1f}[MB]")
+    lines.append(f"csv: {generation + estimate.total('csv_seconds'):.1f}[s] in total, "
+                 f"columnar: {generation + estimate.total('columnar_seconds'):.1f}[s] in total")
+    if shards > 1:
+        lines.append(
+            f"with {shards} shards: about {(generation + estimate.total('csv_seconds')) / shards:.1f}[s] "
+            f"and {estimate.total('memory_mb') / shards:.1f}[MB] per shard")
+    return "\n".join(lines)
@@ -1,13 +1,34 @@
 import csv
 import logging
 import random
+import tempfile
 import typing as T
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from itertools import chain, zip_longest
 from pathlib import Path
 
-from acme_data_generation.providers.airport import fake_airport
-from tqdm import tqdm
+import attr
+
+from acme_data_generation.base.ids import IdAllocator
+from acme_data_generation.base.timestamps import seconds, to_epoch
+from acme_data_generation.models.declarative import amos
+from acme_data_generation.providers.airport import AirportProvider, fake_airport
+from acme_data_generation.scripts.cache import REFERENCE_STAGES, TableCache, config_key, stage_key
+from acme_data_generation.scripts.checkpoint import RunCheckpoint, rng_state, set_rng_state
+from acme_data_generation.scripts.corruption import corrupt
+from acme_data_generation.scripts.metrics import Metrics, StageMetrics
+from acme_data_generation.scripts.profiling import StageProfiler
+from acme_data_generation.scripts.progress import get_reporter
+from acme_data_generation.scripts.store import (
+    ColumnarTable,
+    MappedTable,
+    SpilledTable,
+    Vocabulary,
+    compact,
+    estimate_size_mb,
+    read_column,
+)
 
 
 def grouper(iterable, n, fillvalue=None):
@@ -16,10 +37,64 @@ def grouper(iterable, n, fillvalue=None):
     return zip_longest(*args, fillvalue=fillvalue)
 
 
+def split_evenly(total: int, parts: int) -> T.List[int]:
+    """Splits total in parts that differ by one at most"""
+    return [total // parts + (1 if k < total % parts else 0) for k in range(parts)]
+
+
 class AircraftGenerator:
-    def __init__(self, config):
+
+    # tables read by each stage, other than the ones it produces. Once no
+    # remaining stage reads a table, it can be spilled to disk
+    stage_inputs: T.Dict[str, T.Tuple[str, ...]] = {
+        "flight slots": ("manufacturers",),
+        "timelines": ("manufacturers",),
+        "R20 fix": ("flight_slots",),
+        "maintenance slots": ("manufacturers",),
+        "operational interruptions": ("flight_slots",),
+        "maintenance events": ("maintenance_slots",),
+        "work orders": ("maintenance_events",),
+        "work packages": ("forecasted_orders", "tlb_orders"),
+        "attachments": ("operational_interruptions", "maintenance_events"),
+    }
+
+    # tables written by each stage. Once no remaining stage writes to a table,
+    # it is final. The corruption pass writes to every table
+    stage_outputs: T.Dict[str, T.Tuple[str, ...]] = {
+        "maintenance personnel": ("maintenance_personnel",),
+        "fleet": ("manufacturers",),
+        "flight slots": ("flight_slots",),
+        "R20 fix": ("flight_slots",),
+        "maintenance slots": ("maintenance_slots",),
+        "timelines": ("flight_slots", "maintenance_slots"),
+        "operational interruptions": ("operational_interruptions",),
+        "maintenance events": ("maintenance_events",),
+        "revision days": ("maintenance_events",),
+        "work orders": ("forecasted_orders", "tlb_orders"),
+        "work packages": ("work_packages",),
+        "attachments": ("attachments",),
+    }
+
+    # timeline engine: minimum time on ground between two slots of an aircraft
+    turnaround: int = seconds(minutes=30)
+
+    def __init__(self, config, profiler: T.Optional[StageProfiler] = None):
         super().__init__()
         self.config = config
+        self.profiler = profiler
+        self.metrics = Metrics()
+        self.progress = get_reporter(
+            config.progress, chunk_size=config.progress_chunk_size)
+
+    @contextmanager
+    def _stage(self, name: str) -> T.Iterator[StageMetrics]:
+        """Measures, and profiles if requested, a generation or output stage"""
+        with self.metrics.stage(name) as stage:
+            if self.profiler is None:
+                yield stage
+            else:
+                with self.profiler.stage(name):
+                    yield stage
 
     def to_csv(self, path: Path) -> Path:
 
@@ -27,7 +102,16 @@ class AircraftGenerator:
         path.mkdir(exist_ok=True)
 
         logging.info("Writing instances to CSV files")
-        for tablename, entities in tqdm(self.state.items(), unit="file"):
+        with self._stage("to_csv") as stage:
+            self._write_csv(path)
+            stage.rows = self.total_instances
+
+        self._dump_metrics()
+        logging.info("Done")
+        return path
+
+    def _write_csv(self, path: Path) -> None:
+        for tablename, entities in self.state.items():
             file = path.joinpath(f"{tablename}.csv")
 
             # creates a dictwriter
@@ -40,37 +124,376 @@ class AircraftGenerator:
 
             writer.writeheader()
 
-            for entity in entities:
-                writer.writerow(entity.as_dict())
+            if isinstance(entities, (SpilledTable, ColumnarTable, MappedTable)):
+                # written as read, without building entities
+                rows = chain.from_iterable(entities.iter_chunks())
+            else:
+                rows = (entity.as_dict() for entity in entities)
 
-        logging.info("Done")
-        return path
+            for chunk in self.progress.chunks(rows, stage=f"{tablename}.csv", total=len(entities)):
+                writer.writerows(chunk)
 
     def to_sql(self, session, db_url: T.Optional[str] = None):
 
         logging.info("Inserting instances to DB tables")
-        for k, v in tqdm(self.state.items(), unit="table"):
-            for instance in v:
-                # if it has a _mapper_ attribute then it is a sqlalchemy mapped class
-                if getattr(instance, "__mapper__", False):
-                    session.add(instance)
-        session.commit()
+        with self._stage("to_sql") as stage:
+            for k, v in self.state.items():
+                for chunk in self.progress.chunks(v, stage=k):
+                    # if it has a _mapper_ attribute then it is a sqlalchemy mapped class
+                    instances = [i for i in chunk if getattr(i, "__mapper__", False)]
+                    session.add_all(instances)
+                    stage.rows += len(instances)
+                    # flushed instances are only weakly referenced by the
+                    # session, so spilled tables don't pile up in memory
+                    if isinstance(v, (SpilledTable, ColumnarTable, MappedTable)):
+                        session.flush()
+            session.commit()
+
+        self._dump_metrics()
         logging.info("Done")
 
-    def populate(self) -> "AircraftGenerator":
+    def _quality(self) -> str:
+        if self.config.corruption_pass:
+            # rows are generated clean, and corrupted afterwards in one pass
+            return "good"
+        return fake_airport.quality(self.config._prob_weights)
 
-        # --------------------------- maintenance personnel -------------------#
+    @property
+    def stages(self) -> T.List[T.Tuple[str, T.Callable[[], int]]]:
+        """Generation stages, in order. Each one returns the number of rows it produced"""
+
+        if self.config.engine == "timeline":
+            slots = [("timelines", self._simulate_timelines)]
+        else:
+            slots = [
+                ("flight slots", self._generate_flight_slots),
+                ("R20 fix", self._fix_overlapping_flight_slots),
+                ("maintenance slots", self._generate_maintenance_slots),
+            ]
+
+        stages = [
+            ("maintenance personnel", self._generate_maintenance_personnel),
+            ("fleet", self._generate_fleet),
+            *slots,
+            ("operational interruptions", self._generate_operational_interruptions),
+            ("maintenance events", self._generate_maintenance_events),
+            ("revision days", self._split_revisions),
+            ("work orders", self._generate_work_orders),
+            ("work packages", self._generate_work_packages),
+            ("attachments", self._generate_attachments),
+        ]
+
+        if self.config.corruption_pass:
+            stages.append(("corruption", self._corrupt))
+
+        return stages
+
+    def seed(self) -> None:
+        """Seeds the provider and the random module with config.seed"""
+        fake_airport.seed_instance(self.config.seed)
+        random.seed(self.config.seed)
+
+    def _new_ids(self, start: T.Union[int, T.Dict[str, int]] = 1) -> IdAllocator:
+        """R8: serial ids for maintenance events, work orders and work packages"""
+        return IdAllocator(
+            block_size=self.config.id_block_size,
+            shard=self.config.shard,
+            num_shards=self.config.num_shards,
+            start=start,
+        )
+
+    def populate(
+        self, on_table: T.Optional[T.Callable[[str, T.Sequence[T.Any]], None]] = None
+    ) -> "AircraftGenerator":
+        """Generates every table. If given, `on_table(tablename, rows)` is called
+        as soon as a table is final, e.g. to start writing it while the next
+        ones are generated"""
+
+        self.seed()
+        self.ids = self._new_ids()
+        self.metrics = Metrics()
+        fake_airport.use_fast_primitives(self.config.fast_primitives)
+
+        if self.config.cache_dir is not None and self._load_from_cache():
+            if on_table is not None:
+                for tablename, rows in self.state.items():
+                    on_table(tablename, rows)
+            self._dump_metrics()
+            logging.info("Done")
+            return self
+
+        stages = self.stages
+        resume = self._load_checkpoint() if self.config.checkpoint_dir is not None else 0
+        # categorical values of every compacted table, seeded with the
+        # provider's reference tables so that their values keep their codes
+        self.vocabulary = Vocabulary([
+            AirportProvider._airport_codes,
+            AirportProvider._delay_codes,
+            AirportProvider._ata_codes,
+            AirportProvider._aircraft_models,
+        ])
+        final: T.Set[str] = set()
+        reference_key = ""
+        for n, (name, generate) in enumerate(stages):
+            # reference stages are cached on their own, as long as only other
+            # reference stages ran before them
+            reference = self.config.cache_dir is not None and all(
+                s in REFERENCE_STAGES for s, _ in stages[:n + 1])
+            if reference:
+                reference_key = stage_key(self.config, name, previous=reference_key)
+            if n < resume:
+                continue
+
+            with self._stage(name) as stage:
+                if reference:
+                    stage.rows = self._generate_reference(name, generate, reference_key)
+                else:
+                    stage.rows = generate()
+
+            remaining = [s for s, _ in stages[n + 1:]]
+            if self.config.compact_tables:
+                self._compact_tables(remaining=remaining)
+            if self.config.mapped_tables:
+                self._map_tables(remaining=remaining)
+            if self.config.max_memory_mb is not None:
+                self._enforce_memory_budget(remaining=remaining)
+
+            if self.config.checkpoint_dir is not None:
+                self._save_checkpoint(n, name)
+
+            if on_table is not None:
+                written = self._written(remaining)
+                for tablename, rows in self.state.items():
+                    if tablename not in written and tablename not in final:
+                        final.add(tablename)
+                        on_table(tablename, rows)
+
+        if on_table is not None:
+            # e.g. resumed after the last stage
+            for tablename, rows in self.state.items():
+                if tablename not in final:
+                    on_table(tablename, rows)
+
+        if self.config.cache_dir is not None:
+            self._save_to_cache()
+
+        self._dump_metrics()
+        logging.info("Done")
+        return self
+
+    def _written(self, remaining: T.List[str]) -> T.Set[str]:
+        """Tables that some remaining stage writes to. The others are final"""
+        if "corruption" in remaining:
+            # it writes to every table
+            return set(self.state)
+        return {table for stage in remaining for table in self.stage_outputs.get(stage, ())}
+
+    def _compact_tables(self, remaining: T.List[str]) -> None:
+        """Stores the tables no remaining stage writes to as columns, with
+        their categorical columns encoded"""
+
+        written = self._written(remaining)
+        for tablename, rows in self.state.items():
+            if tablename not in written and isinstance(rows, (list, ColumnarTable)):
+                setattr(self, tablename, compact(rows, self.vocabulary))
+
+    def _map_tables(self, remaining: T.List[str]) -> None:
+        """Moves the final tables to memory-mapped column files, which later
+        stages and the sinks read from"""
+
+        written = self._written(remaining)
+        for tablename, rows in self.state.items():
+            if tablename not in written and isinstance(rows, (list, ColumnarTable)) and rows:
+                path = self._scratch_dir().joinpath("mapped", tablename)
+                setattr(self, tablename, MappedTable.write(rows, path))
+
+    def _scratch_dir(self) -> Path:
+        if getattr(self, "_spill_dir", None) is None:
+            # removed along with the generator
+            self._spill_dir = tempfile.TemporaryDirectory(
+                prefix="acme-spill-", dir=self.config.spill_dir)
+        return Path(self._spill_dir.name)
+
+    def close(self) -> None:
+        """Unmaps the mapped tables and removes the scratch folder. The tables
+        kept on disk can't be read afterwards"""
+        for rows in self.state.values():
+            if isinstance(rows, MappedTable):
+                rows.close()
+        if getattr(self, "_spill_dir", None) is not None:
+            self._spill_dir.cleanup()
+            self._spill_dir = None
+
+    def _spill(self, tablename: str, rows: T.Sequence[T.Any]) -> SpilledTable:
+        return SpilledTable.spill(rows, self._scratch_dir().joinpath(tablename))
+
+    def _enforce_memory_budget(self, remaining: T.List[str]) -> None:
+        """Spills finished tables to disk, largest first, until the tables
+        left in memory fit in config.max_memory_mb"""
+
+        needed = {table for stage in remaining for table in self.stage_inputs.get(stage, ())}
+        sizes = {
+            tablename: estimate_size_mb(rows)
+            for tablename, rows in self.state.items()
+            if isinstance(rows, (list, ColumnarTable)) and rows
+        }
+
+        used = sum(sizes.values())
+        for tablename in sorted(sizes, key=sizes.get, reverse=True):
+            if used <= self.config.max_memory_mb:
+                break
+            if tablename in needed:
+                continue
+            logging.info(f"Spilling {tablename} to disk ({sizes[tablename]:.1f}[MB])")
+            setattr(self, tablename, self._spill(tablename, getattr(self, tablename)))
+            used -= sizes[tablename]
+
+    @property
+    def cache(self) -> TableCache:
+        return TableCache(self.config.cache_dir, max_mb=self.config.cache_max_mb)
+
+    def _load_from_cache(self) -> bool:
+        """Restores the tables of a previous run with the same config, if cached"""
+
+        with self._stage("cache lookup") as stage:
+            entry = self.cache.get(config_key(self.config))
+            if entry is None:
+                return False
+
+            logging.info(f"Loading tables from cache entry {entry.path}")
+            for tablename, rows in entry.tables.items():
+                # cached tables are streamed from disk when under a memory budget
+                if self.config.max_memory_mb is None:
+                    rows = list(rows)
+                setattr(self, tablename, rows)
+
+            self.ids = self._new_ids(start={t: n + 1 for t, n in entry.extra["ids"].items()})
+            if entry.extra.get("quality_masks") is not None:
+                self.quality_masks = entry.extra["quality_masks"]
+
+            stage.rows = self.total_instances
+
+        return True
+
+    def _generate_reference(self, name: str, generate: T.Callable[[], int], key: str) -> int:
+        """Runs a reference stage, or restores its tables and the random state
+        after it from the cache"""
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            logging.info(f"Reusing {', '.join(entry.tables)} from cache entry {entry.path}")
+            for tablename, rows in entry.tables.items():
+                setattr(self, tablename, list(rows))
+            set_rng_state(random, entry.extra["rng"]["random"])
+            set_rng_state(fake_airport.random, entry.extra["rng"]["provider"])
+            return sum(len(rows) for rows in entry.tables.values())
+
+        rows = generate()
+        self.cache.put(
+            key,
+            {t: self.state[t] for t in self.stage_outputs[name]},
+            extra={"rng": {"random": rng_state(random), "provider": rng_state(fake_airport.random)}},
+        )
+        return rows
+
+    @property
+    def checkpoint(self) -> RunCheckpoint:
+        return RunCheckpoint(self.config.checkpoint_dir)
+
+    def _load_checkpoint(self) -> int:
+        """Restores the last checkpoint of config.checkpoint_dir, if any.
+        Returns the index of the first stage left to run"""
+
+        with self._stage("checkpoint load") as stage:
+            # under a memory budget, the tables no remaining stage writes to
+            # are streamed from disk
+            spilled: T.Set[str] = set()
+            if self.config.max_memory_mb is not None and self.checkpoint.exists():
+                meta = self.checkpoint.read_meta()
+                remaining = [s for s, _ in self.stages[meta["stage"] + 1:]]
+                if "corruption" not in remaining:
+                    written = {t for s in remaining for t in self.stage_outputs.get(s, ())}
+                    spilled = set(meta["tables"]) - written
+            checkpoint = self.checkpoint.load(
+                config_key(self.config),
+                spilled=spilled,
+                spill_dir=self._scratch_dir().joinpath("checkpoint") if spilled else None,
+            )
+            if checkpoint is None:
+                return 0
+
+            logging.info(
+                f"Resuming from {self.config.checkpoint_dir}, after stage {checkpoint.stage_name}")
+            for tablename, rows in checkpoint.tables.items():
+                setattr(self, tablename, rows)
+
+            self.ids.setstate(checkpoint.extra["ids"])
+            if checkpoint.extra.get("quality_masks") is not None:
+                self.quality_masks = checkpoint.extra["quality_masks"]
+            set_rng_state(random, checkpoint.rng["random"])
+            set_rng_state(fake_airport.random, checkpoint.rng["provider"])
+
+            stage.rows = self.total_instances
+
+        return checkpoint.stage + 1
+
+    def _save_checkpoint(self, n: int, name: str) -> None:
+        """Saves the tables written by stage `n`, and the state to resume after it"""
+
+        with self._stage(f"{name} checkpoint") as stage:
+            saved = set(self.checkpoint.read_meta()["tables"]) if self.checkpoint.exists() else set()
+            changed = set(self.state) if name == "corruption" else {
+                *self.stage_outputs.get(name, ()), *(set(self.state) - saved)}
+            self.checkpoint.save(
+                config_key(self.config),
+                stage=n,
+                stage_name=name,
+                tables=self.state,
+                changed=changed,
+                rng={"random": rng_state(random), "provider": rng_state(fake_airport.random)},
+                extra={
+                    "ids": self.ids.getstate(),
+                    "quality_masks": getattr(self, "quality_masks", None),
+                },
+                config=attr.asdict(self.config),
+            )
+            stage.rows = sum(len(self.state[t]) for t in changed)
+
+    def _save_to_cache(self) -> None:
+        with self._stage("cache store") as stage:
+            path = self.cache.put(
+                config_key(self.config),
+                self.state,
+                extra={
+                    "ids": self.ids.high_water_marks(),
+                    "quality_masks": getattr(self, "quality_masks", None),
+                },
+            )
+            stage.rows = self.total_instances
+        logging.info(f"Tables cached in {path}")
+
+    def _dump_metrics(self) -> None:
+        if self.config.metrics_path:
+            self.metrics.to_json(Path(self.config.metrics_path))
+
+    # --------------------------- maintenance personnel ---------------------- #
+
+    def _generate_maintenance_personnel(self) -> int:
 
         logging.info("Generating maintenance personnel list")
 
         self.maintenance_personnel = []
 
-        for _ in tqdm(range(self.config.personnel_list_size)):
-            self.maintenance_personnel.append(
-                fake_airport.reporter(
-                    quality=fake_airport.quality(self.config._prob_weights)))
+        for chunk in self.progress.chunks(
+                range(self.config.personnel_list_size), stage="maintenance personnel"):
+            self.maintenance_personnel.extend(
+                fake_airport.reporter(quality=self._quality()) for _ in chunk)
 
-        # -------------------------- aircraft manufacturers ------------------ #
+        return len(self.maintenance_personnel)
+
+    # -------------------------- aircraft manufacturers ---------------------- #
+
+    def _generate_fleet(self) -> int:
 
         # Creates a list of random Manufacturers
         # This is intended to be stored and used 
@@ -78,27 +501,40 @@ class AircraftGenerator:
         logging.info("Generating aircraft fleet")
 
         self.manufacturers = []
-        for _ in tqdm(range(self.config.fleet_size)):
-            self.manufacturers.append(
+        start = self.config.fleet_start
+        for chunk in self.progress.chunks(range(self.config.fleet_size), stage="fleet"):
+            self.manufacturers.extend(
                 fake_airport.manufacturer(
-                    quality=fake_airport.quality(self.config._prob_weights)))
+                    quality=self._quality(), index=None if start is None else start + n)
+                for n in chunk
+            )
+
+        return len(self.manufacturers)
+
+    # ------------------------------- flight slots --------------------------- #
+
+    def _generate_flight_slots(self) -> int:
 
         # from these manufacturers, we obtain a list of aircraft_registration_codes
         # from which we obtain slots
 
         self.flight_slots = []
-        self.maintenance_slots = []
-
-        # ------------------------------- flight slots ----------------------- #
 
         logging.info("Generating flight slots")
 
-        for _ in tqdm(range(self.config.flight_slots_size)):
-            flight_slot = fake_airport.flight_slot(
-                manufacturer=fake_airport.random_element(self.manufacturers),
-                quality=fake_airport.quality(self.config._prob_weights),
+        for chunk in self.progress.chunks(
+                range(self.config.flight_slots_size), stage="flight slots"):
+            self.flight_slots.extend(
+                fake_airport.flight_slot(
+                    manufacturer=fake_airport.random_element(self.manufacturers),
+                    quality=self._quality(),
+                )
+                for _ in chunk
             )
-            self.flight_slots.append(flight_slot)
+
+        return len(self.flight_slots)
+
+    def _fix_overlapping_flight_slots(self) -> int:
 
         # R20
         # verify overlaps if any, and fix them with prob_good probability
@@ -159,142 +595,331 @@ class AircraftGenerator:
                 # make the start of ending of flight 1, the beginning of flight 2
                 self.flight_slots[flight1_idx].actualarrival = ts2
 
-        # ----------------------------- maintenance slots -------------------- #
+        # rows checked, not produced
+        return len(non_cancelled_flights_indexes)
+
+    # ----------------------------- maintenance slots ------------------------ #
+
+    def _generate_maintenance_slots(self) -> int:
+
+        self.maintenance_slots = []
 
         logging.info("Generating maintenance slots")
-        for _ in tqdm(range(self.config.maintenance_slots_size)):
-            maintenance_slot = fake_airport.maintenance_slot(
-                manufacturer=fake_airport.random_element(self.manufacturers),
-                quality=fake_airport.quality(self.config._prob_weights),
+        for chunk in self.progress.chunks(
+                range(self.config.maintenance_slots_size), stage="maintenance slots"):
+            self.maintenance_slots.extend(
+                fake_airport.maintenance_slot(
+                    manufacturer=fake_airport.random_element(self.manufacturers),
+                    quality=self._quality(),
+                )
+                for _ in chunk
+            )
+
+        return len(self.maintenance_slots)
+
+    # -------------------------------- timelines ----------------------------- #
+
+    def _simulate_timelines(self) -> int:
+
+        # flight and maintenance slots are generated aircraft by aircraft, in
+        # order, each one starting after the previous one has landed. This
+        # holds R19, R20 and the flight/maintenance overlap by construction,
+        # with no sort or fix-up pass
+        self.flight_slots = []
+        self.maintenance_slots = []
+
+        logging.info("Simulating aircraft timelines")
+
+        fleet = len(self.manufacturers)
+        aircraft = list(zip(
+            self.manufacturers,
+            split_evenly(self.config.flight_slots_size, fleet),
+            split_evenly(self.config.maintenance_slots_size, fleet),
+        ))
+
+        for chunk in self.progress.chunks(aircraft, stage="timelines", unit="aircraft"):
+            for manufacturer, flights, maintenance in chunk:
+                flight_slots, maintenance_slots = self._aircraft_timeline(
+                    manufacturer, flights, maintenance)
+                self.flight_slots.extend(flight_slots)
+                self.maintenance_slots.extend(maintenance_slots)
+
+        return len(self.flight_slots) + len(self.maintenance_slots)
+
+    def _aircraft_timeline(
+        self,
+        manufacturer,
+        flights: int,
+        maintenance: int,
+        start: T.Optional[int] = None,
+        end: T.Optional[int] = None,
+    ):
+        """The flight and maintenance slots of one aircraft, one after another,
+        between start and end in epoch seconds, the provider's range by default.
+
+        Every slot ends before `end`, unless the slots can't fit in the range
+        at their longest, in which case they are packed one after another"""
+
+        kinds = ["Flight"] * flights + ["Maintenance"] * maintenance
+        random.shuffle(kinds)
+        qualities = [self._quality() for _ in kinds]
+
+        # time the slots after each one need at most, turnarounds included
+        longest = [
+            self.turnaround + fake_airport.longest_slot(kind, quality)
+            for kind, quality in zip(kinds, qualities)
+        ]
+        after = [sum(longest[n + 1:]) for n in range(len(kinds))]
+
+        flight_slots, maintenance_slots = [], []
+        cursor = AirportProvider._offset_epoch if start is None else start
+        end = AirportProvider._end_epoch if end is None else end
+
+        for n, (kind, quality) in enumerate(zip(kinds, qualities)):
+            # free time left before this slot has to depart, spread over the
+            # remaining slots
+            earliest = cursor + self.turnaround
+            slack = max(end - after[n] - longest[n] - cursor, 0)
+            departure = earliest + min(
+                int(random.random() * 2 * slack / (len(kinds) - n)), slack)
+
+            slot = fake_airport.slot(
+                kind=kind,
+                manufacturer=manufacturer,
+                quality=quality,
+                departure=departure,
             )
-            self.maintenance_slots.append(maintenance_slot)
 
-        # ------------------------- operational interruptions ---------------- #
+            if kind == "Flight":
+                flight_slots.append(slot)
+            else:
+                maintenance_slots.append(slot)
+
+            # the next slot starts after this one, delays included
+            cursor = to_epoch(max(
+                slot.scheduledarrival, getattr(slot, "actualarrival", None) or slot.scheduledarrival))
+
+        return flight_slots, maintenance_slots
+
+    # ------------------------- operational interruptions -------------------- #
+
+    def _generate_operational_interruptions(self) -> int:
 
         # from the existing slots, create an operational interruption
         # if flight slot, produces an operational interruption
         # if maintenance slot, produces a maintenance slot
         self.operational_interruptions = []
-        self.maintenance_events = []
 
         logging.info("Generating operational interruptions")
 
-        for flight_slot in self.flight_slots:
+        for chunk in self.progress.chunks(self.flight_slots, stage="operational interruptions"):
             # R13: If flight slot has some delay, that introduces 
             # an operational interruption of some kind
-            if flight_slot.delaycode is not None:
-                operational_interruption = fake_airport.operational_interruption_event(
-                    max_id=self.config.size,
+            self.operational_interruptions.extend(
+                fake_airport.operational_interruption_event(
+                    ids=self.ids,
                     slot=flight_slot,
-                    quality=fake_airport.quality(self.config._prob_weights),
+                    quality=self._quality(),
                 )
-                self.operational_interruptions.append(operational_interruption)
-        
-        for _ in tqdm(self.operational_interruptions):
-            pass # hacky way to display a bar
-        
+                for flight_slot in chunk
+                if flight_slot.delaycode is not None
+            )
+
+        return len(self.operational_interruptions)
+
+    # ---------------------------- maintenance events ------------------------ #
+
+    def _generate_maintenance_events(self) -> int:
+
+        self.maintenance_events = []
+
         logging.info("Generating maintenance events")
 
-        for maintenance_slot in tqdm(self.maintenance_slots):
-            # maintenance slots produce only maintenance events
-            # flight slots produce operational interruptions
-            
-            maintenance_event = fake_airport.maintenance_event(
-                max_id=self.config.size,
-                slot=maintenance_slot,
-                quality=fake_airport.quality(self.config._prob_weights),
-            )
+        for chunk in self.progress.chunks(self.maintenance_slots, stage="maintenance events"):
+            for maintenance_slot in chunk:
+                # maintenance slots produce only maintenance events
+                # flight slots produce operational interruptions
+
+                self.maintenance_events.append(
+                    fake_airport.maintenance_event(
+                        ids=self.ids,
+                        slot=maintenance_slot,
+                        quality=self._quality(),
+                    )
+                )
 
-            # R14
-            if maintenance_event.kind == "Revision":
-                # split duration in number of days
-                assert maintenance_event.duration.days >= 1
-                # add an extra day if there is a non integer number of days
-                extra_day = (1 if bool(maintenance_event.duration.total_seconds() % (24*60*60)) else 0)
-                _splitted_maintenance_events = [maintenance_event] * (maintenance_event.duration.days + extra_day)
-
-                for event_chunk in _splitted_maintenance_events:
-                    event_chunk.duration = timedelta(days=1)
-                    self.maintenance_events.append(event_chunk)
-            else:
-                self.maintenance_events.append(maintenance_event)
+        return len(self.maintenance_events)
+
+    def _split_revisions(self) -> int:
+        """R14: splits revisions in one event per day, starting a day after
+        the other. A revision of 2 days and 3 hours takes 3 rows"""
+
+        day = timedelta(days=1)
+        # bad durations, shorter than a day, are not split
+        days = [
+            -(-event.duration // day)
+            if event.kind == "Revision" and event.duration >= day else 1
+            for event in self.maintenance_events
+        ]
+        if all(n == 1 for n in days):
+            return 0
 
-        # ---------------------------------------------------------------------------- #
-        #                                  work orders                                 #
-        # ---------------------------------------------------------------------------- #
+        logging.info("Splitting revisions in days")
+
+        # the days of a revision share every column but starttime, so they
+        # are repeated as columns rather than built as entities
+        events = ColumnarTable.from_rows(self.maintenance_events)
+        self.maintenance_events = events.repeat(
+            days, steps={"starttime": day}, fill={"duration": day})
+
+        # rows added
+        return len(self.maintenance_events) - events.length
+
+    # ---------------------------------------------------------------------------- #
+    #                                  work orders                                 #
+    # ---------------------------------------------------------------------------- #
+
+    def _generate_work_orders(self) -> int:
 
         self.forecasted_orders = []
         self.tlb_orders = []
 
-        # ----------------  technical logbook orders ----------------------- #
-
-        # We produce a number of work orders equal to maintenance events
-        # and we sample the type using probabilities
+        # Each maintenance event produces up to config.max_work_orders work
+        # orders, and we sample the type using probabilities. Each type stops
+        # at its size, config.forecasted_orders_size or config.tlb_orders_size,
+        # and the orders left are of the other type
 
         proba_fo = self.config.proba_forecast_order
-        
+        max_wo = self.config.max_work_orders
+        left = {
+            "Forecast": self.config.forecasted_orders_size,
+            "TechnicalLogBook": self.config.tlb_orders_size,
+        }
+
         logging.info(
             "Generating work orders"
         )
 
         # only maintenance events produce work orders, operationalinterruptions don't
-        for maintenance_event in tqdm(self.maintenance_events):
-            
-            order_kind = ("Forecast" if random.random() < proba_fo else "TechnicalLogBook")
+        for chunk in self.progress.chunks(self.maintenance_events, stage="work orders"):
+            for maintenance_event in chunk:
+                for _ in range(1 if max_wo == 1 else random.randint(a=1, b=max_wo)):
 
-            order = fake_airport.work_order(
-                max_id=len(self.maintenance_events),
-                quality=fake_airport.quality(self.config._prob_weights),
-                maintenance_event=maintenance_event,
-                kind=order_kind
-            )
+                    order_kind = ("Forecast" if random.random() < proba_fo else "TechnicalLogBook")
+                    if not left[order_kind]:
+                        order_kind = ("TechnicalLogBook" if order_kind == "Forecast" else "Forecast")
+                    if not left[order_kind]:
+                        # both tables are full
+                        break
+                    left[order_kind] -= 1
 
-            if order_kind == "Forecast":
-                self.forecasted_orders.append(order)
-            else:
-                self.tlb_orders.append(order)
+                    order = fake_airport.work_order(
+                        ids=self.ids,
+                        quality=self._quality(),
+                        maintenance_event=maintenance_event,
+                        kind=order_kind
+                    )
 
-        # ------------------------------- work packages ------------------------------ #
+                    if order_kind == "Forecast":
+                        self.forecasted_orders.append(order)
+                    else:
+                        self.tlb_orders.append(order)
 
-        logging.info("Generating work packages")
-        self.work_packages = []
+        return len(self.forecasted_orders) + len(self.tlb_orders)
+
+    # ------------------------------- work packages -------------------------- #
 
-        tqdm_total_wp = len(self.forecasted_orders) + len(self.tlb_orders)
+    def _generate_work_packages(self) -> int:
 
-        for work_order in tqdm(chain(self.forecasted_orders, self.tlb_orders), total=tqdm_total_wp):
-            # R30: each work order produces a number of workpackages less or equal than 
-            # config.max_work_packages
-            work_packages = []
-            for _ in range(random.randint(a=1, b=self.config.max_work_packages)):
-                work_package = fake_airport.work_package(
-                    quality=fake_airport.quality(self.config._prob_weights),
-                    max_id=self.config.size,
-                    work_order = work_order)
-                work_packages.append(work_package)
-                
-            self.work_packages.extend(work_packages)
+        logging.info("Generating work packages")
+        self.work_packages = []
 
-        # ---------------------------- create attachments -------------------- #
+        total_wp = len(self.forecasted_orders) + len(self.tlb_orders)
+        # every order needs its first package, config.work_packages_size
+        # only limits the rest
+        extra = self.config.work_packages_size - total_wp
+        if extra < 0:
+            logging.warning(
+                f"{total_wp} work orders need more than work_packages_size={self.config.work_packages_size} packages")
+
+        for chunk in self.progress.chunks(
+                chain(self.forecasted_orders, self.tlb_orders), stage="work packages", total=total_wp):
+            for work_order in chunk:
+                # R30: each work order produces a number of workpackages less or equal than
+                # config.max_work_packages. They are duplicated entries, all with
+                # the workpackage id of the order, which links them to it
+                for n in range(random.randint(a=1, b=self.config.max_work_packages)):
+                    if n:
+                        if extra <= 0:
+                            break
+                        extra -= 1
+                    self.work_packages.append(
+                        fake_airport.work_package(quality=self._quality(), work_order=work_order)
+                    )
+
+        return len(self.work_packages)
+
+    # ---------------------------- create attachments ------------------------ #
+
+    def _generate_attachments(self) -> int:
 
-        self.attachments = []
         # since ois inherits from maintenance events,
         # ois are also maintenance events
-        tqdm_total_at = len(self.operational_interruptions) + len(self.maintenance_events)
+        events = [
+            *read_column(self.operational_interruptions, "maintenanceid"),
+            *read_column(self.maintenance_events, "maintenanceid"),
+        ]
 
         logging.info("Generating attachments")
 
-        for event in tqdm(chain(self.operational_interruptions, self.maintenance_events), total=tqdm_total_at):
-            # R5
-            logging.debug(f"Generating attachments for event '{event.maintenanceid}'")
-            for _ in range(self.config.max_attach_size):
-                fake_attachment = fake_airport.attachment(event=event)
-                self.attachments.append(fake_attachment)
-        logging.info("Done")
-        return self
+        # R5: attachments are built as columns, their files drawn in one
+        # batch per chunk of events
+        columns: T.Dict[str, T.List[str]] = {"file": [], "event": []}
+        for chunk in self.progress.chunks(events, stage="attachments"):
+            for column, values in fake_airport.attachment_columns(
+                    chunk, per_event=self.config.max_attach_size).items():
+                columns[column].extend(values)
+
+        self.attachments = ColumnarTable(amos.Attachment, columns) if events else []
+        return len(self.attachments)
+
+    # ------------------------------- corruption ----------------------------- #
+
+    def _corrupt(self) -> int:
+
+        logging.info("Corrupting noisy and bad rows")
+        rng = random.Random(self.config.seed)
+        self.quality_masks = {}
+
+        for tablename, rows in self.state.items():
+            # spilled tables are loaded and spilled back, one at a time
+            spilled = isinstance(rows, SpilledTable)
+            if spilled:
+                rows = list(rows)
+            elif isinstance(rows, (ColumnarTable, MappedTable)):
+                # corrupted in place, as entities
+                table, rows = rows, list(rows)
+                setattr(self, tablename, rows)
+                if isinstance(table, MappedTable):
+                    table.close()
+
+            self.quality_masks.update(
+                corrupt({tablename: rows}, self.config._prob_weights, rng=rng))
+
+            if spilled:
+                setattr(self, tablename, self._spill(tablename, rows))
+
+        # rows corrupted
+        return sum(
+            1 for mask in self.quality_masks.values() for q in mask if q != "good")
 
     @property
     def state(self):
-        return {k: v for k, v in self.__dict__.items() if isinstance(v, list)}
+        return {
+            k: v
+            for k, v in self.__dict__.items()
+            if isinstance(v, (list, SpilledTable, ColumnarTable, MappedTable))
+        }
 
     @property
     def total_instances(self):
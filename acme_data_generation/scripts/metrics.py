@@ -0,0 +1,100 @@
+import json
+import sys
+import time
+import typing as T
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+import attr
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+__doc__ = """Per-stage measurements of the generation process
+
+>>> metrics = Metrics()
+>>> with metrics.stage("flight slots") as stage:
+...     stage.rows = 1000
+>>> metrics["flight slots"].rows
+1000
+"""
+
+
+def peak_rss_mb() -> T.Optional[float]:
+    """Returns the peak resident set size of this process, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+@attr.s(auto_attribs=True)
+class StageMetrics:
+    name: str
+    rows: int = 0
+    wall_time: float = 0.0
+    # growth of the peak RSS during the stage, None if it can't be measured
+    peak_rss_delta_mb: T.Optional[float] = None
+
+    @property
+    def rows_per_s(self) -> T.Optional[float]:
+        return self.rows / self.wall_time if self.wall_time else None
+
+    def as_dict(self):
+        return {**attr.asdict(self), "rows_per_s": self.rows_per_s}
+
+
+class Metrics:
+    """An ordered collection of StageMetrics, one per stage"""
+
+    def __init__(self):
+        self.stages: T.Dict[str, StageMetrics] = OrderedDict()
+
+    def __getitem__(self, name: str) -> StageMetrics:
+        return self.stages[name]
+
+    def __iter__(self) -> T.Iterator[StageMetrics]:
+        return iter(self.stages.values())
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    @contextmanager
+    def stage(self, name: str) -> T.Iterator[StageMetrics]:
+        """Measures the block as a stage. Set `rows` on the yielded object"""
+        metrics = StageMetrics(name=name)
+        self.stages[name] = metrics
+
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_time = time.perf_counter() - start
+            if rss_before is not None:
+                metrics.peak_rss_delta_mb = peak_rss_mb() - rss_before
+
+    @property
+    def total_time(self) -> float:
+        return sum(m.wall_time for m in self)
+
+    def as_dict(self):
+        return {
+            "total_time": self.total_time,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": [m.as_dict() for m in self],
+        }
+
+    def to_json(self, path: Path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.as_dict(), indent=2))
+        return path
+
+    def __str__(self):
+        return "\n".join(
+            f"{m.name}: {m.rows} rows in {m.wall_time:.3f}[s]" for m in self
+        )
@@ -0,0 +1,433 @@
+import csv
+import logging
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+import typing as T
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from pathlib import Path
+
+import attr
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts import distributed
+from acme_data_generation.scripts.store import CHUNK_SIZE, ColumnarTable, MappedTable, SpilledTable
+
+__doc__ = """A producer/consumer pipeline from the generator to any sink
+
+    generator processes --[generated]--> dispatcher --[write-k]--> writer threads --> sink
+
+The dataset is split in shards, as in `scripts.distributed`, and a pool of
+`workers` processes generates them. Every table is cut in chunks as soon as
+it is final, and the chunks go through a bounded queue to the main process,
+which routes them to `writers` threads. Each table is always written by the
+same thread, in the order its chunks arrive. Every queue is bounded, so a slow
+sink blocks the generators instead of piling up chunks in memory.
+
+Each queue records its depth and how long its producers were stalled on it
+and its consumers waited on it, which tells whether generation or the sink
+is the bottleneck.
+
+The output is the dataset of `airbase-gen plan` with `workers` shards. Rows
+of different shards interleave in a table in no particular order.
+"""
+
+# seconds the dispatcher waits for a chunk before checking the workers are alive
+POLL_INTERVAL = 1.0
+
+# ---------------------------------------------------------------------------- #
+#                                    chunks                                    #
+# ---------------------------------------------------------------------------- #
+
+
+@attr.s(auto_attribs=True)
+class TableChunk:
+    """Rows of a table as tuples, cheap to send between processes"""
+
+    tablename: str
+    entity_class: type
+    columns: T.List[str]
+    rows: T.List[T.Tuple[T.Any, ...]]
+
+    def as_dicts(self) -> T.List[T.Dict[str, T.Any]]:
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+
+def table_chunks(
+    tablename: str, rows: T.Iterable[T.Any], chunk_size: int = CHUNK_SIZE
+) -> T.Iterator[TableChunk]:
+    if isinstance(rows, (ColumnarTable, MappedTable)):
+        for records in rows.iter_records(chunk_size):
+            yield TableChunk(
+                tablename=tablename, entity_class=rows.entity_class, columns=rows.columns, rows=records)
+        return
+
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, chunk_size))
+        if not batch:
+            break
+        columns = list(batch[0].as_dict().keys())
+        yield TableChunk(
+            tablename=tablename,
+            entity_class=type(batch[0]),
+            columns=columns,
+            rows=[tuple(row.as_dict().values()) for row in batch],
+        )
+
+
+# ---------------------------------------------------------------------------- #
+#                                    queues                                    #
+# ---------------------------------------------------------------------------- #
+
+
+@attr.s(auto_attribs=True)
+class QueueStats:
+    name: str
+    maxsize: int
+    items: int = 0
+    max_depth: int = 0
+    # sum of the depth seen by each put, for the mean depth
+    depth_sum: int = 0
+    # time producers were blocked on a full queue
+    put_stall: float = 0.0
+    # time consumers were blocked on an empty queue
+    get_wait: float = 0.0
+
+    @property
+    def mean_depth(self) -> float:
+        return self.depth_sum / self.items if self.items else 0.0
+
+    def record_put(self, depth: int, stall: float) -> None:
+        self.items += 1
+        self.depth_sum += depth
+        self.max_depth = max(self.max_depth, depth)
+        self.put_stall += stall
+
+    def __str__(self):
+        return (
+            f"{self.name}: {self.items} chunks, depth {self.mean_depth:.1f} mean, "
+            f"{self.max_depth}/{self.maxsize} max, producers stalled {self.put_stall:.3f}[s], "
+            f"consumers waited {self.get_wait:.3f}[s]"
+        )
+
+
+def _depth(q) -> int:
+    try:
+        return q.qsize()
+    except NotImplementedError:
+        # multiprocessing queues on macOS
+        return 0
+
+
+class BoundedQueue:
+    """A bounded thread queue that records its QueueStats"""
+
+    def __init__(self, name: str, maxsize: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.stats = QueueStats(name=name, maxsize=maxsize)
+
+    def put(self, item: T.Any) -> None:
+        start = time.perf_counter()
+        self.queue.put(item)
+        self.stats.record_put(_depth(self.queue), time.perf_counter() - start)
+
+    def close(self) -> None:
+        """Tells the consumer there is nothing else to get"""
+        self.queue.put(None)
+
+    def get(self) -> T.Any:
+        start = time.perf_counter()
+        item = self.queue.get()
+        self.stats.get_wait += time.perf_counter() - start
+        return item
+
+
+# ---------------------------------------------------------------------------- #
+#                                     sinks                                    #
+# ---------------------------------------------------------------------------- #
+
+
+class Sink:
+    """Where the pipeline writes tables to
+
+    `write` is called from several writer threads, but each table is always
+    written by the same thread, so only state shared between tables needs
+    locking.
+    """
+
+    def open(self) -> None:
+        pass
+
+    def write(self, chunk: TableChunk) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class CsvSink(Sink):
+    """One CSV file per table, as `AircraftGenerator.to_csv`"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files: T.Dict[str, T.Any] = {}
+        self.writers: T.Dict[str, T.Any] = {}
+
+    def open(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, chunk: TableChunk) -> None:
+        writer = self.writers.get(chunk.tablename)
+        if writer is None:
+            fp = self.path.joinpath(f"{chunk.tablename}.csv").open("wt", newline="")
+            writer = csv.writer(fp, delimiter=",")
+            writer.writerow(chunk.columns)
+            self.files[chunk.tablename] = fp
+            self.writers[chunk.tablename] = writer
+        writer.writerows(chunk.rows)
+
+    def close(self) -> None:
+        for fp in self.files.values():
+            fp.close()
+
+
+class SqlSink(Sink):
+    """Bulk inserts through a SQLAlchemy engine, one connection per writer.
+    Tables that are not mapped, such as manufacturers, are skipped"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def write(self, chunk: TableChunk) -> None:
+        table = getattr(chunk.entity_class, "__table__", None)
+        if table is None:
+            return
+        with self.engine.begin() as connection:
+            connection.execute(table.insert(), chunk.as_dicts())
+
+
+class ColumnarSink(Sink):
+    """Tables as SpilledTables, one file per column, in `path`"""
+
+    def __init__(self, path: Path, chunk_size: int = CHUNK_SIZE):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.tables: T.Dict[str, SpilledTable] = {}
+        self._files: T.Dict[str, T.List[T.Any]] = {}
+        self._pending: T.Dict[str, T.List[T.Tuple[T.Any, ...]]] = {}
+
+    def _flush(self, tablename: str, rows: T.List[T.Tuple[T.Any, ...]]) -> None:
+        # a SpilledTable reads back chunks of exactly chunk_size rows
+        for values, fp in zip(zip(*rows), self._files[tablename]):
+            pickle.dump(list(values), fp, pickle.HIGHEST_PROTOCOL)
+        self.tables[tablename].length += len(rows)
+
+    def write(self, chunk: TableChunk) -> None:
+        if chunk.tablename not in self.tables:
+            path = self.path.joinpath(chunk.tablename)
+            path.mkdir(parents=True, exist_ok=True)
+            self._files[chunk.tablename] = [
+                path.joinpath(f"{c}.pickle").open("wb") for c in chunk.columns
+            ]
+            self._pending[chunk.tablename] = []
+            self.tables[chunk.tablename] = SpilledTable(
+                path, chunk.entity_class, chunk.columns, 0, self.chunk_size
+            )
+
+        pending = self._pending[chunk.tablename]
+        pending.extend(chunk.rows)
+        while len(pending) >= self.chunk_size:
+            self._flush(chunk.tablename, pending[: self.chunk_size])
+            del pending[: self.chunk_size]
+
+    def close(self) -> None:
+        for tablename, pending in self._pending.items():
+            if pending:
+                self._flush(tablename, pending)
+            for fp in self._files[tablename]:
+                fp.close()
+
+
+# ---------------------------------------------------------------------------- #
+#                                   pipeline                                   #
+# ---------------------------------------------------------------------------- #
+
+# the queue to the main process, set in each worker process
+_generated = None
+
+
+def _init_worker(generated) -> None:
+    global _generated
+    _generated = generated
+
+
+def _generate_shard(
+    manifest: T.Dict[str, T.Any], shard: int, chunk_size: int
+) -> T.Dict[str, T.Any]:
+    """Runs in a worker process, returns the producer side of the queue stats"""
+    from acme_data_generation.scripts.generate import AircraftGenerator
+
+    stall = 0.0
+    chunks = 0
+
+    def on_table(tablename: str, rows: T.Sequence[T.Any]) -> None:
+        nonlocal stall, chunks
+        for chunk in table_chunks(tablename, rows, chunk_size):
+            start = time.perf_counter()
+            _generated.put(chunk)
+            stall += time.perf_counter() - start
+            chunks += 1
+
+    try:
+        config = distributed.shard_config(manifest, shard, progress="none")
+        ag = AircraftGenerator(config)
+        ag.populate(on_table=on_table)
+        ag.close()
+    finally:
+        # tells the dispatcher this shard is done, even if it failed
+        _generated.put(shard)
+
+    return {"shard": shard, "chunks": chunks, "put_stall": stall}
+
+
+@attr.s(auto_attribs=True)
+class PipelineStats:
+    rows: T.Dict[str, int] = attr.Factory(dict)
+    queues: T.Dict[str, QueueStats] = attr.Factory(dict)
+    wall_time: float = 0.0
+
+    @property
+    def bottleneck(self) -> str:
+        """'generate' if the writers mostly waited for chunks, 'write' otherwise"""
+        generated = self.queues["generated"]
+        writes = [q for name, q in self.queues.items() if name != "generated"]
+        stalled = generated.put_stall + sum(q.put_stall for q in writes)
+        return "write" if stalled > generated.get_wait else "generate"
+
+    def __str__(self):
+        lines = [str(q) for q in self.queues.values()]
+        lines.append(
+            f"{sum(self.rows.values())} rows in {self.wall_time:.3f}[s], "
+            f"bottleneck: {self.bottleneck}"
+        )
+        return "\n".join(lines)
+
+
+class Pipeline:
+    def __init__(
+        self,
+        config: BaseConfig,
+        sink: Sink,
+        workers: int = 2,
+        writers: int = 2,
+        queue_size: int = 8,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.config = config
+        self.sink = sink
+        self.workers = workers
+        self.writers = writers
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+
+    def _write(self, q: BoundedQueue, rows: T.Dict[str, int], errors: T.List[BaseException]):
+        while True:
+            chunk = q.get()
+            if chunk is None:
+                break
+            if errors:
+                # drains the queue, so the dispatcher never blocks
+                continue
+            try:
+                self.sink.write(chunk)
+                rows[chunk.tablename] = rows.get(chunk.tablename, 0) + len(chunk.rows)
+            except BaseException as e:
+                errors.append(e)
+
+    def _stop_writers(self, write_queues: T.List[BoundedQueue], threads: T.List[threading.Thread]) -> None:
+        """Lets the writers finish their queues, and closes the sink"""
+        for q in write_queues:
+            q.close()
+        for thread in threads:
+            thread.join()
+        self.sink.close()
+
+    def run(self) -> PipelineStats:
+        start = time.perf_counter()
+        manifest = distributed.plan(self.config, self.workers, out=Path("."))
+        context = multiprocessing.get_context()
+        generated = context.Queue(maxsize=self.queue_size)
+        generated_stats = QueueStats(name="generated", maxsize=self.queue_size)
+
+        write_queues = [
+            BoundedQueue(f"write-{k}", self.queue_size) for k in range(self.writers)
+        ]
+        rows: T.Dict[str, int] = {}
+        errors: T.List[BaseException] = []
+        threads = [
+            threading.Thread(target=self._write, args=(q, rows, errors), daemon=True)
+            for q in write_queues
+        ]
+
+        # tablename -> writer
+        routes: T.Dict[str, BoundedQueue] = {}
+        with ProcessPoolExecutor(
+            self.workers, mp_context=context, initializer=_init_worker, initargs=(generated,)
+        ) as pool:
+            futures = [
+                pool.submit(_generate_shard, manifest, k, self.chunk_size)
+                for k in range(self.workers)
+            ]
+
+            # the workers are forked by the first submit, before this
+            # process runs any thread of its own
+            self.sink.open()
+            for thread in threads:
+                thread.start()
+
+            pending = self.workers
+            while pending:
+                wait = time.perf_counter()
+                try:
+                    item = generated.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    # a worker killed by the OS never reports it is done,
+                    # but breaks the pool and fails every future
+                    for future in futures:
+                        if future.done() and isinstance(future.exception(), BrokenProcessPool):
+                            self._stop_writers(write_queues, threads)
+                            raise future.exception()
+                    continue
+                finally:
+                    generated_stats.get_wait += time.perf_counter() - wait
+                if isinstance(item, int):
+                    pending -= 1
+                    continue
+
+                # the put stall is measured by the workers, and added below
+                generated_stats.record_put(_depth(generated), 0.0)
+                route = routes.setdefault(
+                    item.tablename, write_queues[len(routes) % self.writers])
+                route.put(item)
+
+            self._stop_writers(write_queues, threads)
+
+            # raises the errors of the workers, if any
+            for future in futures:
+                generated_stats.put_stall += future.result()["put_stall"]
+
+        if errors:
+            raise errors[0]
+
+        stats = PipelineStats(
+            rows=rows,
+            queues={"generated": generated_stats, **{q.stats.name: q.stats for q in write_queues}},
+            wall_time=time.perf_counter() - start,
+        )
+        logging.info(f"Pipeline done in {stats.wall_time:.3f}[s], bottleneck: {stats.bottleneck}")
+        return stats
@@ -0,0 +1,89 @@
+import cProfile
+import io
+import pstats
+import tracemalloc
+import typing as T
+from contextlib import contextmanager
+from pathlib import Path
+
+__doc__ = """Profiles each stage of the generation process separately
+
+A StageProfiler is passed to AircraftGenerator, which runs every generation
+and output stage inside `profiler.stage(name)`. One profile file is written
+per stage to `out_dir`:
+
+- `cprofile`: `NN-stage_name.prof`, readable with `python -m pstats` or snakeviz
+- `tracemalloc`: `NN-stage_name.tracemalloc`, readable with
+  `tracemalloc.Snapshot.load`
+"""
+
+PROFILERS = ("cprofile", "tracemalloc")
+
+
+class StageProfiler:
+    def __init__(self, kind: str, out_dir: Path, top: int = 10):
+        if kind not in PROFILERS:
+            raise ValueError(f"profiler must be one of {PROFILERS}")
+
+        self.kind = kind
+        self.out_dir = Path(out_dir)
+        self.top = top
+        # stage name -> formatted top-N summary
+        self.summaries: T.Dict[str, str] = {}
+        self.files: T.List[Path] = []
+
+    def _path(self, name: str) -> Path:
+        slug = name.lower().replace(" ", "_")
+        ext = "prof" if self.kind == "cprofile" else "tracemalloc"
+        return self.out_dir.joinpath(f"{len(self.files):02d}-{slug}.{ext}")
+
+    @contextmanager
+    def stage(self, name: str) -> T.Iterator[None]:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(name)
+
+        if self.kind == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                profile.dump_stats(str(path))
+                self.summaries[name] = self._cprofile_summary(profile)
+        else:
+            # tracing started by someone else, e.g. python -X tracemalloc, is
+            # left running, and the snapshot also holds what it traced before
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            try:
+                yield
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                if started:
+                    tracemalloc.stop()
+                snapshot.dump(str(path))
+                self.summaries[name] = self._tracemalloc_summary(snapshot)
+
+        self.files.append(path)
+
+    def _cprofile_summary(self, profile: cProfile.Profile) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.strip_dirs().sort_stats("tottime").print_stats(self.top)
+        # skip the preamble, up to the table header
+        lines = stream.getvalue().splitlines()
+        header = next(
+            (i for i, line in enumerate(lines) if "ncalls" in line), 0
+        )
+        return "\n".join(line for line in lines[header:] if line.strip())
+
+    def _tracemalloc_summary(self, snapshot: tracemalloc.Snapshot) -> str:
+        statistics = snapshot.statistics("lineno")[: self.top]
+        return "\n".join(str(stat) for stat in statistics)
+
+    def summary(self) -> str:
+        return "\n\n".join(
+            f"# {name}\n{summary}" for name, summary in self.summaries.items()
+        )
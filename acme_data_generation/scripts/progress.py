@@ -0,0 +1,120 @@
+import logging
+import time
+import typing as T
+from itertools import islice
+
+__doc__ = """Progress reporting for the generation and output stages
+
+Reporters hand out the items of a stage in chunks, and only update on chunk
+boundaries, so there is no per-row overhead:
+
+>>> progress = LogReporter(chunk_size=1000)
+>>> for chunk in progress.chunks(range(5000), stage="flight slots"):
+...     slots = [fake_airport.flight_slot() for _ in chunk]
+
+- `bar`: a tqdm progress bar per stage, for interactive runs
+- `log`: a log line with rows/s and ETA every `interval` seconds, for batch jobs
+- `none`: nothing at all
+"""
+
+REPORTERS = ("bar", "log", "none")
+
+
+class ProgressReporter:
+    """Base reporter, it reports nothing"""
+
+    def __init__(self, chunk_size: int = 1000, interval: float = 10.0):
+        self.chunk_size = chunk_size
+        self.interval = interval
+
+    def start(self, stage: str, total: T.Optional[int], unit: str) -> None:
+        pass
+
+    def update(self, n: int) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def chunks(
+        self,
+        iterable: T.Iterable[T.Any],
+        stage: str,
+        total: T.Optional[int] = None,
+        unit: str = "rows",
+    ) -> T.Iterator[T.List[T.Any]]:
+        """Yields the items of `iterable` in lists of `chunk_size`"""
+        if total is None and hasattr(iterable, "__len__"):
+            total = len(iterable)
+
+        self.start(stage, total, unit)
+        iterator = iter(iterable)
+        try:
+            while True:
+                chunk = list(islice(iterator, self.chunk_size))
+                if not chunk:
+                    break
+                yield chunk
+                self.update(len(chunk))
+        finally:
+            self.finish()
+
+
+class NullReporter(ProgressReporter):
+    pass
+
+
+class TqdmReporter(ProgressReporter):
+    def start(self, stage: str, total: T.Optional[int], unit: str) -> None:
+        # imported here, so the CLI starts without it
+        from tqdm import tqdm
+
+        self._bar = tqdm(total=total, desc=stage, unit=unit)
+
+    def update(self, n: int) -> None:
+        self._bar.update(n)
+
+    def finish(self) -> None:
+        self._bar.close()
+
+
+class LogReporter(ProgressReporter):
+    def start(self, stage: str, total: T.Optional[int], unit: str) -> None:
+        self._stage = stage
+        self._total = total
+        self._unit = unit
+        self._done = 0
+        self._start = self._last = time.perf_counter()
+
+    def update(self, n: int) -> None:
+        self._done += n
+        now = time.perf_counter()
+        if now - self._last < self.interval:
+            return
+
+        self._last = now
+        rate = self._done / (now - self._start)
+        if self._total:
+            eta = (self._total - self._done) / rate if rate else float("inf")
+            logging.info(
+                f"{self._stage}: {self._done}/{self._total} {self._unit} "
+                f"({self._done / self._total:.0%}), {rate:.0f} {self._unit}/s, "
+                f"ETA {eta:.0f}[s]"
+            )
+        else:
+            logging.info(f"{self._stage}: {self._done} {self._unit}, {rate:.0f} {self._unit}/s")
+
+    def finish(self) -> None:
+        elapsed = time.perf_counter() - self._start
+        rate = self._done / elapsed if elapsed else 0
+        logging.info(
+            f"{self._stage}: {self._done} {self._unit} in {elapsed:.1f}[s], "
+            f"{rate:.0f} {self._unit}/s"
+        )
+
+
+def get_reporter(kind: str = "bar", **kwargs) -> ProgressReporter:
+    reporters = {"bar": TqdmReporter, "log": LogReporter, "none": NullReporter}
+    if kind not in reporters:
+        raise ValueError(f"progress must be one of {REPORTERS}")
+    return reporters[kind](**kwargs)
@@ -0,0 +1,713 @@
+import importlib
+import json
+import mmap
+import pickle
+import sys
+import typing as T
+from array import array
+from collections import Counter
+from datetime import date, datetime, timedelta
+from itertools import chain, islice, repeat
+from pathlib import Path
+
+from acme_data_generation.providers.reference import ReferenceTable
+
+__doc__ = """On-disk storage for generated tables
+
+When AircraftGenerator runs with a memory budget, tables that are no longer
+needed by later stages are spilled to disk as a SpilledTable, and streamed
+back when written by `to_csv` or `to_sql`.
+
+A spilled table is a folder with one file per column. Each file holds the
+column values as a sequence of pickled chunks, so that rows can be rebuilt
+chunk by chunk, without loading the whole table.
+
+A ColumnarTable keeps a table in memory the same way, one list per column,
+for tables derived from others by column operations, such as revisions
+fanned out in days. Rows that repeat values share them, and entities are only
+built chunk by chunk, when the table is read.
+
+With a Vocabulary, the columns in CATEGORICAL_COLUMNS, which take values from
+small sets such as airports or kinds, are kept as 2-byte codes into a
+vocabulary shared by every table. Reading rows decodes them, so sinks see
+plain values. The vocabulary can be seeded with the reference tables of the
+provider, so that airports, delay codes, ATA codes and aircraft models keep
+the codes those tables already gave them.
+
+A MappedTable is a folder of column files that are memory-mapped, rather
+than read: fixed-width arrays for numbers, timestamps and durations, and
+offsets into a byte buffer for strings. Any row can be read in constant time,
+and the OS pages the files in and out, so tables larger than the memory can
+be read at random by later stages, and streamed by sinks.
+"""
+
+CHUNK_SIZE = 10000
+
+# columns that take their values from small sets
+CATEGORICAL_COLUMNS = frozenset({
+    "kind",
+    "airport",
+    "departureairport",
+    "arrivalairport",
+    "delaycode",
+    "subsystem",
+    "mel",
+    "reporteurclass",
+    "frequencyunits",
+    "aircraft_model",
+})
+
+
+def _columns(entity) -> T.List[str]:
+    return list(entity.as_dict().keys())
+
+
+def class_path(cls: type) -> str:
+    """An importable reference to a class, see import_class"""
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def import_class(path: str) -> type:
+    module, qualname = path.split(":")
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def estimate_size_mb(rows: T.Sequence[T.Any], sample: int = 100) -> float:
+    """Estimates the memory used by a list of entities, from a sample of rows"""
+    if not rows or isinstance(rows, (SpilledTable, MappedTable)):
+        return 0.0
+    if isinstance(rows, ColumnarTable):
+        return rows.size_mb(sample)
+
+    step = max(len(rows) // sample, 1)
+    sampled = rows[::step][:sample]
+
+    total = 0
+    for row in sampled:
+        total += sys.getsizeof(row)
+        attributes = getattr(row, "__dict__", {})
+        total += sys.getsizeof(attributes)
+        total += sum(sys.getsizeof(v) for v in attributes.values())
+
+    # plus the list itself
+    return (total / len(sampled) * len(rows) + sys.getsizeof(rows)) / 2 ** 20
+
+
+class SpilledTable:
+    """A table of entities stored on disk, column by column
+
+    It behaves as a read-only sequence: it has a length, can be iterated
+    over, and indexed (slowly, by scanning).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        entity_class: type,
+        columns: T.List[str],
+        length: int,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.path = Path(path)
+        self.entity_class = entity_class
+        self.columns = columns
+        self.length = length
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def spill(
+        cls, rows: T.Sequence[T.Any], path: Path, chunk_size: int = CHUNK_SIZE
+    ) -> "SpilledTable":
+        """Writes a list of entities of the same class to `path`"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        columns = rows.columns if isinstance(rows, (ColumnarTable, MappedTable)) else _columns(rows[0])
+
+        files = [path.joinpath(f"{c}.pickle").open("wb") for c in columns]
+        try:
+            for start in range(0, len(rows), chunk_size):
+                if isinstance(rows, (ColumnarTable, MappedTable)):
+                    # straight from the columns, decoded
+                    for column, fp in zip(columns, files):
+                        pickle.dump(
+                            list(rows.column(column)[start : start + chunk_size]),
+                            fp,
+                            pickle.HIGHEST_PROTOCOL,
+                        )
+                    continue
+                chunk = [row.as_dict() for row in rows[start : start + chunk_size]]
+                for column, fp in zip(columns, files):
+                    pickle.dump(
+                        [row[column] for row in chunk], fp, pickle.HIGHEST_PROTOCOL
+                    )
+        finally:
+            for fp in files:
+                fp.close()
+
+        entity_class = (
+            rows.entity_class if isinstance(rows, (ColumnarTable, MappedTable)) else type(rows[0]))
+        return cls(path, entity_class, columns, len(rows), chunk_size)
+
+    def iter_chunks(self) -> T.Iterator[T.List[T.Dict[str, T.Any]]]:
+        """Yields rows as dictionaries, one chunk at a time"""
+        files = [self.path.joinpath(f"{c}.pickle").open("rb") for c in self.columns]
+        try:
+            for _ in range(0, self.length, self.chunk_size):
+                values = [pickle.load(fp) for fp in files]
+                yield [dict(zip(self.columns, row)) for row in zip(*values)]
+        finally:
+            for fp in files:
+                fp.close()
+
+    def column(self, name: str) -> T.List[T.Any]:
+        """Reads the values of a single column"""
+        values: T.List[T.Any] = []
+        with self.path.joinpath(f"{name}.pickle").open("rb") as fp:
+            for _ in range(0, self.length, self.chunk_size):
+                values.extend(pickle.load(fp))
+        return values
+
+    def __iter__(self) -> T.Iterator[T.Any]:
+        for chunk in self.iter_chunks():
+            for row in chunk:
+                yield self.entity_class(**row)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> T.Any:
+        if not isinstance(index, int):
+            raise TypeError("SpilledTable only supports integer indexes")
+        if index < 0:
+            index += self.length
+        if not (0 <= index < self.length):
+            raise IndexError("SpilledTable index out of range")
+        return next(islice(iter(self), index, None))
+
+    def __repr__(self):
+        return f"SpilledTable({self.entity_class.__name__}, {self.length} rows, {self.path})"
+
+
+class VocabularyFull(ValueError):
+    """Raised when a vocabulary has no codes left"""
+
+
+class Vocabulary:
+    """Values of categorical columns, shared by several tables. A value is
+    stored once, and referred to by its code"""
+
+    max_size = 2 ** 16
+
+    def __init__(self, references: T.Iterable[ReferenceTable] = ()):
+        self.values: T.List[T.Any] = []
+        self.codes: T.Dict[T.Any, int] = {}
+        for table in references:
+            self.add_reference(table)
+
+    def add_reference(self, table: ReferenceTable) -> None:
+        """Appends the values of a reference table. They keep their codes in
+        the table, offset by the values before them"""
+        offset = len(self.values)
+        if offset + len(table) > self.max_size:
+            raise VocabularyFull(f"more than {self.max_size} distinct values")
+        self.values.extend(table.values)
+        for value, code in table.index.items():
+            self.codes.setdefault(value, offset + code)
+
+    def code(self, value: T.Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.values) >= self.max_size:
+                raise VocabularyFull(f"more than {self.max_size} distinct values")
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values: T.Iterable[T.Any]) -> "CategoricalColumn":
+        return CategoricalColumn(array("H", map(self.code, values)), self)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class CategoricalColumn:
+    """A column stored as codes into a Vocabulary. It reads as a sequence of
+    the decoded values"""
+
+    def __init__(self, codes: array, vocabulary: Vocabulary):
+        self.codes = codes
+        self.vocabulary = vocabulary
+
+    def decode(self) -> T.List[T.Any]:
+        return list(map(self.vocabulary.values.__getitem__, self.codes))
+
+    def value_counts(self) -> T.Dict[T.Any, int]:
+        """Rows per value, counted on the codes"""
+        values = self.vocabulary.values
+        return {values[code]: n for code, n in Counter(self.codes).items()}
+
+    def group_indices(self) -> T.Dict[T.Any, T.List[int]]:
+        """Row indexes per value, grouped on the codes"""
+        groups: T.Dict[int, T.List[int]] = {}
+        for index, code in enumerate(self.codes):
+            groups.setdefault(code, []).append(index)
+        values = self.vocabulary.values
+        return {values[code]: indices for code, indices in groups.items()}
+
+    def size_mb(self) -> float:
+        return sys.getsizeof(self.codes) / 2 ** 20
+
+    def __iter__(self) -> T.Iterator[T.Any]:
+        return map(self.vocabulary.values.__getitem__, self.codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: T.Union[int, slice]) -> T.Any:
+        if isinstance(index, slice):
+            return list(map(self.vocabulary.values.__getitem__, self.codes[index]))
+        return self.vocabulary.values[self.codes[index]]
+
+
+def repeat_column(
+    values: T.Sequence[T.Any],
+    repeats: T.Sequence[int],
+    step: T.Any = None,
+    fill: T.Any = None,
+) -> T.List[T.Any]:
+    """Repeats values[i] repeats[i] times.
+
+    The k-th copy is offset by k * step, if a step is given. Values repeated
+    more than once are replaced by `fill`, if it is given.
+    """
+    if fill is not None:
+        values = [fill if n > 1 else v for v, n in zip(values, repeats)]
+    if step is None:
+        return list(chain.from_iterable(map(repeat, values, repeats)))
+
+    # k * step, computed once for all rows
+    offsets = [k * step for k in range(max(repeats, default=0))]
+    return [
+        v if v is None else v + offset
+        for v, n in zip(values, repeats)
+        for offset in offsets[:n]
+    ]
+
+
+class ColumnarTable:
+    """A table of entities kept in memory, column by column
+
+    It behaves as a read-only sequence, like SpilledTable, and builds the
+    entities it yields chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        entity_class: type,
+        data: T.Dict[str, T.List[T.Any]],
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.entity_class = entity_class
+        self.data = data
+        self.columns = list(data)
+        self.length = len(data[self.columns[0]]) if self.columns else 0
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: T.Sequence[T.Any],
+        chunk_size: int = CHUNK_SIZE,
+        vocabulary: T.Optional[Vocabulary] = None,
+    ) -> "ColumnarTable":
+        """Reads a list of entities of the same class into columns. With a
+        vocabulary, categorical columns are encoded"""
+        columns = _columns(rows[0])
+        data: T.Dict[str, T.List[T.Any]] = {c: [] for c in columns}
+        appends = [data[c].append for c in columns]
+        for row in rows:
+            for append, value in zip(appends, row.as_dict().values()):
+                append(value)
+        table = cls(type(rows[0]), data, chunk_size)
+        return table.encode(vocabulary) if vocabulary is not None else table
+
+    def encode(self, vocabulary: Vocabulary) -> "ColumnarTable":
+        """Encodes the categorical columns, in place. Columns with too many
+        distinct values, e.g. noisy ones, are left as they are"""
+        for column in CATEGORICAL_COLUMNS.intersection(self.columns):
+            values = self.data[column]
+            if isinstance(values, CategoricalColumn):
+                continue
+            try:
+                self.data[column] = vocabulary.encode(values)
+            except VocabularyFull:
+                pass
+        return self
+
+    def repeat(
+        self,
+        repeats: T.Sequence[int],
+        steps: T.Optional[T.Dict[str, T.Any]] = None,
+        fill: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> "ColumnarTable":
+        """Repeats row i repeats[i] times, see repeat_column. `steps` and
+        `fill` map columns to their step and fill value"""
+        steps = steps or {}
+        fill = fill or {}
+        data: T.Dict[str, T.Any] = {}
+        for column, values in self.data.items():
+            if isinstance(values, CategoricalColumn):
+                # repeats the codes, categorical columns have no steps
+                vocabulary = values.vocabulary
+                code = vocabulary.code(fill[column]) if column in fill else None
+                codes = repeat_column(values.codes, repeats, fill=code)
+                data[column] = CategoricalColumn(array("H", codes), vocabulary)
+            else:
+                data[column] = repeat_column(values, repeats, steps.get(column), fill.get(column))
+        return type(self)(self.entity_class, data, self.chunk_size)
+
+    def size_mb(self, sample: int = 100) -> float:
+        """Estimates the memory used by the columns, from a sample of rows.
+        Values shared by several rows are counted once per row, so it is an
+        upper bound for repeated tables"""
+        if not self.length:
+            return 0.0
+        step = max(self.length // sample, 1)
+        total = 0.0
+        for values in self.data.values():
+            if isinstance(values, CategoricalColumn):
+                total += sys.getsizeof(values.codes)
+                continue
+            sampled = values[::step][:sample]
+            total += sys.getsizeof(values)
+            total += sum(sys.getsizeof(v) for v in sampled) / len(sampled) * self.length
+        return total / 2 ** 20
+
+    def column(self, name: str) -> T.Sequence[T.Any]:
+        return self.data[name]
+
+    def iter_records(self, chunk_size: T.Optional[int] = None) -> T.Iterator[T.List[T.Tuple[T.Any, ...]]]:
+        """Yields rows as tuples, in the order of `columns`, one chunk at a time"""
+        chunk_size = chunk_size or self.chunk_size
+        for start in range(0, self.length, chunk_size):
+            yield list(zip(*(v[start : start + chunk_size] for v in self.data.values())))
+
+    def iter_chunks(self) -> T.Iterator[T.List[T.Dict[str, T.Any]]]:
+        """Yields rows as dictionaries, one chunk at a time"""
+        for start in range(0, self.length, self.chunk_size):
+            values = [v[start : start + self.chunk_size] for v in self.data.values()]
+            yield [dict(zip(self.columns, row)) for row in zip(*values)]
+
+    def __iter__(self) -> T.Iterator[T.Any]:
+        for chunk in self.iter_chunks():
+            for row in chunk:
+                yield self.entity_class(**row)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: T.Union[int, slice]) -> T.Any:
+        if isinstance(index, slice):
+            return [self[k] for k in range(*index.indices(self.length))]
+        if not isinstance(index, int):
+            raise TypeError("ColumnarTable only supports integer indexes and slices")
+        if index < 0:
+            index += self.length
+        if not (0 <= index < self.length):
+            raise IndexError("ColumnarTable index out of range")
+        return self.entity_class(**{c: v[index] for c, v in self.data.items()})
+
+    def __repr__(self):
+        return f"ColumnarTable({self.entity_class.__name__}, {self.length} rows)"
+
+
+def read_column(rows: T.Sequence[T.Any], name: str) -> T.Sequence[T.Any]:
+    """The values of a column of a table, without building its entities if
+    it is stored by columns"""
+    if isinstance(rows, (SpilledTable, ColumnarTable, MappedTable)):
+        return rows.column(name)
+    return [getattr(row, name) for row in rows]
+
+
+def compact(rows: T.Sequence[T.Any], vocabulary: Vocabulary) -> T.Sequence[T.Any]:
+    """A list of entities as a ColumnarTable with encoded categorical
+    columns. Spilled and empty tables are returned as they are"""
+    if isinstance(rows, ColumnarTable):
+        return rows.encode(vocabulary)
+    if isinstance(rows, SpilledTable) or not rows:
+        return rows
+    return ColumnarTable.from_rows(rows, vocabulary=vocabulary)
+
+
+# ---------------------------------------------------------------------------- #
+#                              memory-mapped tables                            #
+# ---------------------------------------------------------------------------- #
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+DATE_EPOCH = date(1970, 1, 1).toordinal()
+
+# kind -> array typecode, for fixed-width columns
+FIXED_WIDTH = {"int": "q", "float": "d", "bool": "b", "datetime": "q", "date": "i", "timedelta": "q"}
+INT64 = (-(2 ** 63), 2 ** 63 - 1)
+
+_encoders: T.Dict[str, T.Callable[[T.Any], T.Any]] = {
+    "int": int,
+    "float": float,
+    "bool": int,
+    "datetime": lambda v: (v - EPOCH) // MICROSECOND,
+    "date": lambda v: v.toordinal() - DATE_EPOCH,
+    "timedelta": lambda v: v // MICROSECOND,
+    "str": lambda v: v.encode(),
+    "object": lambda v: pickle.dumps(v, pickle.HIGHEST_PROTOCOL),
+}
+
+_decoders: T.Dict[str, T.Callable[[T.Any], T.Any]] = {
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "datetime": lambda v: EPOCH + v * MICROSECOND,
+    "date": lambda v: date.fromordinal(v + DATE_EPOCH),
+    "timedelta": lambda v: v * MICROSECOND,
+    "str": lambda v: bytes(v).decode(),
+    "object": lambda v: pickle.loads(v),
+}
+
+
+_KINDS = {
+    bool: "bool",
+    int: "int",
+    float: "float",
+    datetime: "datetime",
+    date: "date",
+    timedelta: "timedelta",
+    str: "str",
+}
+
+
+def _fits(value: T.Any) -> bool:
+    """Whether a value can be stored in the fixed-width array of its kind"""
+    if type(value) is int:
+        return INT64[0] <= value <= INT64[1]
+    if type(value) is datetime:
+        return value.tzinfo is None
+    return True
+
+
+def _kind(types: T.Set[type]) -> str:
+    """How a column is stored, from the types of its values"""
+    if not types:
+        # only nulls
+        return "int"
+    if len(types) > 1:
+        # e.g. noisy values of another type
+        return "object"
+    return _KINDS.get(next(iter(types)), "object")
+
+
+def _map(path: Path) -> T.Union[mmap.mmap, bytes]:
+    with path.open("rb") as fp:
+        if not path.stat().st_size:
+            # empty files can't be mapped
+            return b""
+        return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class MappedColumn:
+    """A column of a MappedTable. It reads as a sequence of its values"""
+
+    def __init__(self, path: Path, name: str, kind: str, nullable: bool, length: int):
+        self.kind = kind
+        self.length = length
+        self._decode = _decoders[kind]
+
+        # the maps of the column files, closed by close()
+        self.maps: T.List[mmap.mmap] = []
+
+        values = self._map(path.joinpath(f"{name}.values"))
+        if kind in FIXED_WIDTH:
+            self.values = memoryview(values).cast(FIXED_WIDTH[kind]) if length else []
+            self.offsets = None
+        else:
+            self.values = values
+            self.offsets = memoryview(self._map(path.joinpath(f"{name}.offsets"))).cast("q")
+        self.nulls = self._map(path.joinpath(f"{name}.nulls")) if nullable else None
+
+    def _map(self, path: Path) -> T.Union[mmap.mmap, bytes]:
+        values = _map(path)
+        if isinstance(values, mmap.mmap):
+            self.maps.append(values)
+        return values
+
+    def close(self) -> None:
+        """Unmaps the column files. The column can't be read afterwards"""
+        # the views on a map must be released before it is closed
+        for view in (self.values, self.offsets):
+            if isinstance(view, memoryview):
+                view.release()
+        for values in self.maps:
+            values.close()
+
+    def _get(self, index: int) -> T.Any:
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        if self.offsets is None:
+            return self._decode(self.values[index])
+        return self._decode(self.values[self.offsets[index] : self.offsets[index + 1]])
+
+    def __iter__(self) -> T.Iterator[T.Any]:
+        for start in range(0, self.length, CHUNK_SIZE):
+            yield from self[start : start + CHUNK_SIZE]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: T.Union[int, slice]) -> T.Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1 or self.offsets is not None or self.nulls is not None:
+                return [self._get(k) for k in range(start, stop, step)]
+            # contiguous, fixed-width and without nulls: decoded in bulk
+            return list(map(self._decode, self.values[start:stop].tolist()))
+        if index < 0:
+            index += self.length
+        if not (0 <= index < self.length):
+            raise IndexError("MappedColumn index out of range")
+        return self._get(index)
+
+
+class MappedTable:
+    """A table of entities in memory-mapped column files
+
+    It behaves as a read-only sequence, with constant time indexing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        meta = json.loads(self.path.joinpath("table.json").read_text())
+        self.entity_class = import_class(meta["class"])
+        self.length = meta["length"]
+        self.columns = [c["name"] for c in meta["columns"]]
+        self.chunk_size = CHUNK_SIZE
+        self.data = {
+            c["name"]: MappedColumn(self.path, c["name"], c["kind"], c["nullable"], self.length)
+            for c in meta["columns"]
+        }
+
+    @classmethod
+    def write(
+        cls, rows: T.Sequence[T.Any], path: Path, chunk_size: int = CHUNK_SIZE
+    ) -> "MappedTable":
+        """Writes a table of entities, of any kind, to `path`"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        if isinstance(rows, (ColumnarTable, SpilledTable)):
+            entity_class, columns = rows.entity_class, list(rows.columns)
+        else:
+            entity_class, columns = type(rows[0]), _columns(rows[0])
+
+        def chunks() -> T.Iterator[T.Dict[str, T.List[T.Any]]]:
+            if isinstance(rows, ColumnarTable):
+                for start in range(0, len(rows), chunk_size):
+                    yield {c: list(rows.column(c)[start : start + chunk_size]) for c in columns}
+            elif isinstance(rows, SpilledTable):
+                for chunk in rows.iter_chunks():
+                    yield {c: [row[c] for row in chunk] for c in columns}
+            else:
+                for start in range(0, len(rows), chunk_size):
+                    chunk = [row.as_dict() for row in rows[start : start + chunk_size]]
+                    yield {c: [row[c] for row in chunk] for c in columns}
+
+        # a first pass finds how to store each column
+        types: T.Dict[str, T.Set[type]] = {c: set() for c in columns}
+        nullable = {c: False for c in columns}
+        fits = {c: True for c in columns}
+        for chunk in chunks():
+            for c, values in chunk.items():
+                types[c].update(type(v) for v in values if v is not None)
+                nullable[c] = nullable[c] or any(v is None for v in values)
+                fits[c] = fits[c] and all(map(_fits, values))
+        kinds = {c: _kind(types[c]) if fits[c] else "object" for c in columns}
+
+        files = {}
+        try:
+            for c in columns:
+                files[c] = [path.joinpath(f"{c}.values").open("wb")]
+                if kinds[c] not in FIXED_WIDTH:
+                    files[c].append(path.joinpath(f"{c}.offsets").open("wb"))
+                    array("q", [0]).tofile(files[c][1])
+                if nullable[c]:
+                    files[c].append(path.joinpath(f"{c}.nulls").open("wb"))
+
+            offsets = {c: 0 for c in columns}
+            for chunk in chunks():
+                for c, values in chunk.items():
+                    kind, fps = kinds[c], files[c]
+                    encode = _encoders[kind]
+                    if nullable[c]:
+                        fps[-1].write(bytes(v is None for v in values))
+                    if kind in FIXED_WIDTH:
+                        array(FIXED_WIDTH[kind], [0 if v is None else encode(v) for v in values]).tofile(fps[0])
+                        continue
+                    encoded = [b"" if v is None else encode(v) for v in values]
+                    ends = array("q")
+                    for value in encoded:
+                        offsets[c] += len(value)
+                        ends.append(offsets[c])
+                    fps[0].write(b"".join(encoded))
+                    ends.tofile(fps[1])
+        finally:
+            for fps in files.values():
+                for fp in fps:
+                    fp.close()
+
+        meta = {
+            "class": class_path(entity_class),
+            "length": len(rows),
+            "columns": [{"name": c, "kind": kinds[c], "nullable": nullable[c]} for c in columns],
+        }
+        path.joinpath("table.json").write_text(json.dumps(meta))
+        return cls(path)
+
+    def column(self, name: str) -> MappedColumn:
+        return self.data[name]
+
+    def close(self) -> None:
+        """Unmaps the column files. The table can't be read afterwards"""
+        for column in self.data.values():
+            column.close()
+
+    def iter_records(self, chunk_size: T.Optional[int] = None) -> T.Iterator[T.List[T.Tuple[T.Any, ...]]]:
+        """Yields rows as tuples, in the order of `columns`, one chunk at a time"""
+        chunk_size = chunk_size or self.chunk_size
+        for start in range(0, self.length, chunk_size):
+            yield list(zip(*(v[start : start + chunk_size] for v in self.data.values())))
+
+    def iter_chunks(self) -> T.Iterator[T.List[T.Dict[str, T.Any]]]:
+        """Yields rows as dictionaries, one chunk at a time"""
+        for records in self.iter_records():
+            yield [dict(zip(self.columns, record)) for record in records]
+
+    def __iter__(self) -> T.Iterator[T.Any]:
+        for chunk in self.iter_chunks():
+            for row in chunk:
+                yield self.entity_class(**row)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> T.Any:
+        if not isinstance(index, int):
+            raise TypeError("MappedTable only supports integer indexes")
+        if index < 0:
+            index += self.length
+        if not (0 <= index < self.length):
+            raise IndexError("MappedTable index out of range")
+        return self.entity_class(**{c: v[index] for c, v in self.data.items()})
+
+    def __repr__(self):
+        return f"MappedTable({self.entity_class.__name__}, {self.length} rows, {self.path})"
@@ -0,0 +1,59 @@
+import argparse
+import json
+import logging
+from pathlib import Path
+
+from benchmarks import bench_generate, bench_primitives, bench_provider  # noqa: F401 registers benchmarks
+from benchmarks.harness import compare, registry, run
+
+logging.basicConfig(level=logging.INFO)
+
+parser = argparse.ArgumentParser(
+    prog="python -m benchmarks",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "-k", "--filter", help="only run benchmarks whose name contains this", default=""
+)
+parser.add_argument(
+    "--max-size", help="skip benchmark sizes above this", default=10000, type=int
+)
+parser.add_argument("--repeat", help="timed runs per benchmark", default=3, type=int)
+parser.add_argument(
+    "-o", "--out", help="write results to this JSON file", default=None, type=Path
+)
+parser.add_argument(
+    "--compare",
+    metavar="BASELINE",
+    help="JSON results to compare against; exits with 1 on regressions",
+    default=None,
+    type=Path,
+)
+parser.add_argument(
+    "--threshold", help="relative change considered a regression", default=0.1, type=float
+)
+
+
+def main():
+    args = parser.parse_args()
+
+    # read before running, as the baseline may be overwritten by --out
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    benchmarks = [b for b in registry if args.filter in f"{b.group}.{b.name}"]
+    report = run(benchmarks, max_size=args.max_size, repeat=args.repeat)
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2))
+        logging.info(f"Results written to {args.out}")
+
+    if baseline:
+        regressions = compare(baseline, report, threshold=args.threshold)
+        for regression in regressions:
+            logging.warning(f"Regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+main()
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from acme_data_generation.providers.airport import fake_airport
+
+from benchmarks.harness import benchmark
+
+__doc__ = """Microbenchmarks of the hot provider primitives, Faker's vs the fast path
+
+Each primitive is registered twice, e.g. `faker_uuid4` and `fast_uuid4`, so
+that `--filter uuid4` compares both.
+"""
+
+_start = datetime(2010, 1, 1)
+_end = datetime(2020, 1, 1)
+
+primitives = {
+    "lexify": (
+        lambda: fake_airport.lexify(text="???", letters="ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
+        lambda: fake_airport.fast_lexify("???", "ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
+    ),
+    "numerify": (
+        lambda: fake_airport.numerify(text="MSN %%%%"),
+        lambda: fake_airport.fast_numerify("MSN %%%%"),
+    ),
+    "date_time_between_dates": (
+        lambda: fake_airport.date_time_between_dates(_start, _end),
+        lambda: fake_airport.fast_date_time_between(_start, _end),
+    ),
+    "date_time_ad": (
+        lambda: fake_airport.date_time_ad(start_datetime=_start, end_datetime=_end),
+        lambda: fake_airport.fast_date_time_between(_start, _end),
+    ),
+    "uuid4": (fake_airport.uuid4, fake_airport.fast_uuid4),
+    "pybool": (fake_airport.pybool, fake_airport.fast_pybool),
+}
+
+
+def _primitive(name, function):
+    def setup(rows):
+        return (lambda: [function() for _ in range(rows)]), rows
+
+    setup.__name__ = name
+    return benchmark(group="primitives", sizes=[10000])(setup)
+
+
+for _name, (_faker, _fast) in primitives.items():
+    _primitive(f"faker_{_name}", _faker)
+    _primitive(f"fast_{_name}", _fast)
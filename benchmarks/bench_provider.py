@@ -0,0 +1,32 @@
+from acme_data_generation.providers.airport import fake_airport
+
+from benchmarks.harness import benchmark
+
+__doc__ = "Benchmarks of the AirportProvider entity methods, one entity per row"
+
+
+def _entities(method):
+    def setup(rows):
+        return (lambda: [method() for _ in range(rows)]), rows
+
+    setup.__name__ = method.__name__
+    return benchmark(group="provider", sizes=[1000])(setup)
+
+
+flight_slot = _entities(fake_airport.flight_slot)
+maintenance_slot = _entities(fake_airport.maintenance_slot)
+operational_interruption_event = _entities(fake_airport.operational_interruption_event)
+maintenance_event = _entities(fake_airport.maintenance_event)
+work_order = _entities(fake_airport.work_order)
+forecasted_order = _entities(fake_airport.forecasted_order)
+technical_logbook_order = _entities(fake_airport.technical_logbook_order)
+work_package = _entities(fake_airport.work_package)
+attachment = _entities(fake_airport.attachment)
+manufacturer = _entities(fake_airport.manufacturer)
+reporter = _entities(fake_airport.reporter)
+
+
+# reference tables, one value per call
+@benchmark(group="provider", sizes=[10000])
+def airport_code(rows):
+    return (lambda: [fake_airport.airport_code() for _ in range(rows)]), rows
@@ -0,0 +1,149 @@
+import gc
+import logging
+import platform
+import statistics
+import time
+import tracemalloc
+import typing as T
+from datetime import datetime
+
+import attr
+
+from acme_data_generation import __version__
+
+__doc__ = """A minimal benchmark harness, in the spirit of asv
+
+Benchmarks are setup functions registered with `@benchmark`. A setup function
+receives a number of rows, prepares whatever is needed and returns a callable
+to be timed, together with the number of rows that callable produces. When
+that number is only known afterwards, it can be given as a callable as well.
+
+>>> @benchmark(group="provider", sizes=[1000])
+... def flight_slot(rows):
+...     return (lambda: [fake_airport.flight_slot() for _ in range(rows)]), rows
+
+Each benchmark is timed `repeat` times, and run once more under tracemalloc
+to measure its peak memory, so that tracing does not distort the timings.
+"""
+
+
+class SkipBenchmark(Exception):
+    """Raised by a setup function when a benchmark can't run, e.g. no database"""
+
+
+Rows = T.Union[int, T.Callable[[], int]]
+Setup = T.Callable[[int], T.Tuple[T.Callable[[], T.Any], Rows]]
+
+
+@attr.s(auto_attribs=True)
+class Benchmark:
+    name: str
+    group: str
+    setup: Setup
+    sizes: T.Sequence[int]
+
+
+registry: T.List[Benchmark] = []
+
+
+def benchmark(group: str, sizes: T.Sequence[int] = (1000,)):
+    def decorator(setup: Setup) -> Setup:
+        registry.append(
+            Benchmark(name=setup.__name__, group=group, setup=setup, sizes=sizes)
+        )
+        return setup
+
+    return decorator
+
+
+def measure(bench: Benchmark, size: int, repeat: int = 3) -> T.Dict[str, T.Any]:
+    """Times a benchmark at a given size, and measures its peak memory"""
+
+    timings = []
+    for _ in range(repeat):
+        func, rows = bench.setup(size)
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        produced = rows() if callable(rows) else rows
+
+    func, _ = bench.setup(size)
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "name": f"{bench.group}.{bench.name}",
+        "size": size,
+        "rows": produced,
+        "repeat": repeat,
+        "best_s": best,
+        "median_s": statistics.median(timings),
+        "rows_per_s": produced / best if best else None,
+        "peak_mb": peak / 2 ** 20,
+    }
+
+
+def run(
+    benchmarks: T.Iterable[Benchmark],
+    max_size: T.Optional[int] = None,
+    repeat: int = 3,
+) -> T.Dict[str, T.Any]:
+    """Runs benchmarks and returns a machine-readable report"""
+
+    results = []
+    for bench in benchmarks:
+        for size in bench.sizes:
+            if max_size is not None and size > max_size:
+                continue
+            try:
+                result = measure(bench, size, repeat=repeat)
+            except SkipBenchmark as e:
+                logging.warning(f"Skipping {bench.group}.{bench.name}: {e}")
+                break
+            logging.info(
+                f"{result['name']}[{size}]: {result['rows_per_s']:.0f} rows/s, "
+                f"{result['peak_mb']:.1f}[MB]"
+            )
+            results.append(result)
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def compare(
+    old: T.Dict[str, T.Any], new: T.Dict[str, T.Any], threshold: float = 0.1
+) -> T.List[str]:
+    """Returns the regressions of `new` with respect to `old`
+
+    A regression is a drop in rows/s or a growth of peak memory larger
+    than `threshold`, as a fraction of the old value.
+    """
+    baseline = {(r["name"], r["size"]): r for r in old["results"]}
+    regressions = []
+
+    for r in new["results"]:
+        before = baseline.get((r["name"], r["size"]))
+        if before is None:
+            continue
+        if r["rows_per_s"] < before["rows_per_s"] * (1 - threshold):
+            regressions.append(
+                f"{r['name']}[{r['size']}]: rows/s "
+                f"{before['rows_per_s']:.0f} -> {r['rows_per_s']:.0f}"
+            )
+        if r["peak_mb"] > before["peak_mb"] * (1 + threshold):
+            regressions.append(
+                f"{r['name']}[{r['size']}]: peak memory "
+                f"{before['peak_mb']:.1f}[MB] -> {r['peak_mb']:.1f}[MB]"
+            )
+
+    return regressions
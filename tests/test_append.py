@@ -0,0 +1,80 @@
+import csv
+import subprocess
+import sys
+
+import pytest
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.base.timestamps import DAY, to_epoch
+from acme_data_generation.scripts import append
+from acme_data_generation.scripts.append import AppendGenerator, DatasetNotFound, read_state
+from acme_data_generation.scripts.generate import AircraftGenerator
+
+"""Tests that a CSV dataset can be extended by new days, consistently"""
+
+
+def read(path, tablename):
+    with path.joinpath(f"{tablename}.csv").open(newline="") as fp:
+        return list(csv.DictReader(fp))
+
+
+@pytest.fixture()
+def dataset(tmp_path):
+    config = BaseConfig(size=200, engine="timeline", progress="none")
+    AircraftGenerator(config).populate().to_csv(tmp_path)
+    yield tmp_path
+
+
+def test_append_days(dataset, monkeypatch):
+    before = read_state(dataset)
+    rows = len(read(dataset, "flight_slots"))
+
+    ag = AppendGenerator(BaseConfig(progress="none"), dataset, days=90).populate()
+    state = ag.append_csv()
+
+    assert state.until == before.until + 90 * DAY
+    assert len(read(dataset, "flight_slots")) == rows + len(ag.flight_slots) > rows
+    # new slots start after the end of the dataset, and of their aircraft
+    for slot in ag.flight_slots:
+        start = max(before.until, before.last_end.get(slot.aircraftregistration, 0))
+        assert to_epoch(slot.scheduleddeparture) >= start
+    # serial ids continue after the existing ones
+    assert min(int(o.workorderid) for o in ag.tlb_orders + ag.forecasted_orders) > before.ids["workorders"]
+
+    # later appends read the saved state, instead of scanning the dataset
+    monkeypatch.setattr(append, "scan_dataset", None)
+    second = AppendGenerator(BaseConfig(progress="none"), dataset, days=30).populate()
+    assert second.window == (state.until, state.until + 30 * DAY)
+    second.append_csv()
+
+    for tablename, column in (("tlb_orders", "workorderid"), ("forecasted_orders", "workorderid")):
+        ids = [row[column] for row in read(dataset, tablename)]
+        assert len(ids) == len(set(ids))
+
+
+@pytest.mark.parametrize("days", [30, 365])
+def test_appended_slots_are_inside_the_window(dataset, days):
+    ag = AppendGenerator(BaseConfig(progress="none", prob_bad=0.25, prob_noisy=0.25), dataset, days=days)
+    ag.populate()
+    start, end = ag.window
+
+    assert ag.flight_slots and ag.maintenance_slots
+    for slot in ag.flight_slots + ag.maintenance_slots:
+        arrival = max(slot.scheduledarrival, getattr(slot, "actualarrival", None) or slot.scheduledarrival)
+        assert start <= to_epoch(slot.scheduleddeparture)
+        assert to_epoch(arrival) <= end
+
+
+def test_append_needs_a_dataset(tmp_path):
+    with pytest.raises(DatasetNotFound):
+        AppendGenerator(BaseConfig(), tmp_path, days=1)
+
+    # the cli reports it as a usage error, not a traceback
+    result = subprocess.run(
+        [sys.executable, "-m", "acme_data_generation.cli", "append", "--from", str(tmp_path), "--days", "1"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    assert result.returncode == 2
+    assert b"has no manufacturers.csv to append to" in result.stderr
+    assert b"Traceback" not in result.stderr
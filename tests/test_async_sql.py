@@ -0,0 +1,102 @@
+import typing as T
+
+import pytest
+
+from acme_data_generation.scripts.async_sql import AsyncLoader, to_chunks
+from acme_data_generation.scripts.generate import AircraftGenerator
+
+COUNT_QUERY = 'SELECT COUNT(*) FROM "%s".%s'  # "schema".table
+
+
+class MemoryLoader(AsyncLoader):
+    """Loads chunks into a dict instead of postgres"""
+
+    async def _open(self):
+        self.loaded = {}
+        return self.loaded
+
+    async def _close(self, pool):
+        pass
+
+    async def _copy(self, pool, chunk):
+        pool.setdefault((chunk.schema, chunk.table), []).extend(chunk.records)
+
+
+def test_on_table_is_called_once_per_table(config):
+    config.size = 50
+    seen: T.List[str] = []
+    ag = AircraftGenerator(config).populate(on_table=lambda t, rows: seen.append(t))
+
+    assert sorted(seen) == sorted(ag.state)
+    # tables are handed over as soon as they are final
+    assert seen.index("flight_slots") < seen.index("attachments")
+
+
+def test_on_table_waits_for_corruption_pass(config):
+    config.size = 50
+    config.corruption_pass = True
+    lengths: T.Dict[str, int] = {}
+    ag = AircraftGenerator(config).populate(
+        on_table=lambda t, rows: lengths.setdefault(t, len(rows)))
+
+    assert lengths == {k: len(v) for k, v in ag.state.items()}
+
+
+def test_to_chunks_skips_unmapped_tables(gen):
+    chunks = list(to_chunks(gen.flight_slots, chunk_size=3))
+
+    assert sum(len(c.records) for c in chunks) == len(gen.flight_slots)
+    assert all(len(c.records) <= 3 for c in chunks)
+    assert chunks[0].table == gen.flight_slots[0].__table__.name
+    assert len(chunks[0].columns) == len(chunks[0].records[0])
+    assert list(to_chunks(gen.manufacturers)) == []
+
+
+def test_async_loader_pipeline(config):
+    config.size = 200
+    loader = MemoryLoader("postgresql://unused", workers=3, queue_size=2, chunk_size=7)
+    ag = AircraftGenerator(config)
+    stats = loader.run(ag)
+
+    mapped = {
+        k: v for k, v in ag.state.items() if len(v) and hasattr(v[0], "__mapper__")
+    }
+    assert stats.rows == {k: len(v) for k, v in mapped.items()}
+    assert stats.chunks == sum(-(-len(v) // 7) for v in mapped.values())
+    assert sum(len(r) for r in loader.loaded.values()) == sum(stats.rows.values())
+    assert stats.wall_time > 0
+
+
+class CopyFailed(Exception):
+    pass
+
+
+class FailingLoader(MemoryLoader):
+    """Fails to load the third chunk"""
+
+    async def _copy(self, pool, chunk):
+        if len(pool) == 2:
+            raise CopyFailed(chunk.table)
+        pool[len(pool)] = chunk.records
+
+
+def test_async_loader_fails_when_a_copy_fails(config):
+    config.size = 2000
+    loader = FailingLoader("postgresql://unused", workers=2, queue_size=2, chunk_size=7)
+
+    with pytest.raises(CopyFailed):
+        loader.run(AircraftGenerator(config))
+
+
+def test_async_loader_row_counts(session, config):
+    pytest.importorskip("asyncpg")
+
+    ag = AircraftGenerator(config)
+    stats = AsyncLoader(config.db_url, workers=2).run(ag)
+
+    for k, v in ag.state.items():
+        if len(v) and getattr(v[0], "__mapper__", False):
+            schema = v[0].__table__.schema
+            table = v[0].__table__.name
+            count = session.execute(COUNT_QUERY % (schema, table)).first()
+            assert count[0] == len(v) == stats.rows[k]
@@ -0,0 +1,22 @@
+from benchmarks.harness import Benchmark, compare, run
+
+"""Tests the benchmark harness, so that it does not rot"""
+
+
+def test_run_benchmark():
+    bench = Benchmark(
+        name="noop", group="test", setup=lambda rows: (lambda: None, rows), sizes=[10, 100]
+    )
+    report = run([bench], max_size=10, repeat=1)
+
+    assert [r["size"] for r in report["results"]] == [10]
+    assert report["results"][0]["name"] == "test.noop"
+    assert report["results"][0]["rows"] == 10
+
+
+def test_compare_benchmarks():
+    old = {"results": [{"name": "a", "size": 1, "rows_per_s": 100, "peak_mb": 1.0}]}
+    new = {"results": [{"name": "a", "size": 1, "rows_per_s": 50, "peak_mb": 1.0}]}
+
+    assert len(compare(old, new)) == 1
+    assert compare(old, old) == []
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts.cache import TableCache, config_key
+from acme_data_generation.scripts.generate import AircraftGenerator
+from acme_data_generation.scripts.store import SpilledTable
+
+"""Tests that generated tables are cached by config, and reused"""
+
+
+def rows(ag):
+    return {k: [row.as_dict() for row in v] for k, v in ag.state.items()}
+
+
+def test_config_key():
+    assert config_key(BaseConfig(size=10)) == config_key(BaseConfig(size=10))
+    assert config_key(BaseConfig(size=10)) != config_key(BaseConfig(size=11))
+    assert config_key(BaseConfig(size=10)) != config_key(BaseConfig(size=10, seed=1))
+    # output settings don't change the tables
+    assert config_key(BaseConfig(size=10)) == config_key(
+        BaseConfig(size=10, progress="none", metrics_path="metrics.json"))
+
+
+def test_generation_is_seeded():
+    config = BaseConfig(size=20, prob_noisy=0.3, prob_bad=0.2)
+    assert rows(AircraftGenerator(config).populate()) == rows(AircraftGenerator(config).populate())
+
+
+def test_populate_from_cache(tmp_path):
+    config = BaseConfig(size=20, cache_dir=str(tmp_path))
+
+    first = AircraftGenerator(config).populate()
+    assert "cache store" in first.metrics.stages
+    # the run, and each reference table
+    assert len(TableCache(tmp_path).entries()) == 3
+
+    second = AircraftGenerator(config).populate()
+    assert second.metrics["cache lookup"].rows == second.total_instances
+    assert "flight slots" not in second.metrics.stages
+    assert rows(second) == rows(first)
+    # serial ids continue after the cached ones
+    assert second.ids.next_id("workorders") == first.ids.high_water_marks()["workorders"] + 1
+
+    # a different config is a miss, but for the reference tables
+    third = AircraftGenerator(BaseConfig(size=21, cache_dir=str(tmp_path))).populate()
+    assert "flight slots" in third.metrics.stages
+    assert len(TableCache(tmp_path).entries()) == 4
+
+
+@pytest.mark.parametrize("corruption_pass", [False, True])
+def test_reference_tables_are_reused(tmp_path, monkeypatch, corruption_pass):
+    settings = dict(size=20, prob_noisy=0.25, prob_bad=0.25, corruption_pass=corruption_pass)
+    AircraftGenerator(BaseConfig(**settings, cache_dir=str(tmp_path))).populate()
+
+    # other slots, the same fleet and personnel
+    settings.update(size=30, max_attach_size=2)
+    if corruption_pass:
+        # rows are generated clean and corrupted at the end
+        settings.update(prob_noisy=0.5)
+    expected = AircraftGenerator(BaseConfig(**settings)).populate()
+
+    def regenerated(self):
+        raise AssertionError("regenerated a cached reference table")
+
+    monkeypatch.setattr(AircraftGenerator, "_generate_fleet", regenerated)
+    monkeypatch.setattr(AircraftGenerator, "_generate_maintenance_personnel", regenerated)
+    reused = AircraftGenerator(BaseConfig(**settings, cache_dir=str(tmp_path))).populate()
+    assert rows(reused) == rows(expected)
+
+    # the fleet depends on its size, the personnel doesn't
+    monkeypatch.undo()
+    settings.update(fleet_size=5)
+    expected = AircraftGenerator(BaseConfig(**settings)).populate()
+    monkeypatch.setattr(AircraftGenerator, "_generate_maintenance_personnel", regenerated)
+    fleet = AircraftGenerator(BaseConfig(**settings, cache_dir=str(tmp_path))).populate()
+    assert rows(fleet) == rows(expected)
+
+
+def test_cached_tables_are_streamed_under_a_memory_budget(tmp_path):
+    config = BaseConfig(size=20, cache_dir=str(tmp_path))
+    AircraftGenerator(config).populate()
+
+    config.max_memory_mb = 1000
+    ag = AircraftGenerator(config).populate()
+    assert isinstance(ag.flight_slots, SpilledTable)
+
+
+def test_lru_eviction(tmp_path):
+    cache = TableCache(tmp_path, max_mb=1000)
+    ag = AircraftGenerator(BaseConfig(size=10)).populate()
+
+    for n, key in enumerate(["a", "b", "c"]):
+        path = cache.put(key, ag.state, extra={"ids": {}})
+        os.utime(path.joinpath("manifest.json"), (n, n))
+
+    # reading marks "a" as recently used
+    assert cache.get("a") is not None
+    assert [p.name for p, _, _ in cache.entries()] == ["b", "c", "a"]
+
+    cache.max_mb = cache.size_mb() * 0.5
+    evicted = cache.evict()
+    assert [p.name for p in evicted] == ["b", "c"]
+    assert cache.get("b") is None
+    assert [p.name for p, _, _ in cache.entries()] == ["a"]
@@ -0,0 +1,79 @@
+import pytest
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts.checkpoint import CheckpointMismatch, RunCheckpoint
+from acme_data_generation.scripts.generate import AircraftGenerator
+
+"""Tests that an interrupted run resumes from its last checkpoint"""
+
+
+def rows(ag):
+    return {k: [row.as_dict() for row in v] for k, v in ag.state.items()}
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FailingGenerator(AircraftGenerator):
+    """Fails at the stage called `fail_at`"""
+
+    fail_at = "work orders"
+
+    @property
+    def stages(self):
+        def fail():
+            raise Interrupted(self.fail_at)
+
+        return [(n, fail if n == self.fail_at else f) for n, f in super().stages]
+
+
+@pytest.mark.parametrize("max_memory_mb", [None, 0.0])
+@pytest.mark.parametrize("corruption_pass", [False, True])
+def test_resume_is_identical(tmp_path, corruption_pass, max_memory_mb):
+    settings = dict(
+        size=50, prob_noisy=0.3, prob_bad=0.2, corruption_pass=corruption_pass,
+        max_memory_mb=max_memory_mb)
+    expected = AircraftGenerator(BaseConfig(**settings)).populate()
+
+    config = BaseConfig(**settings, checkpoint_dir=str(tmp_path))
+    with pytest.raises(Interrupted):
+        FailingGenerator(config).populate()
+    assert RunCheckpoint(tmp_path).read_meta()["stage_name"] == "revision days"
+
+    resumed = AircraftGenerator(config).populate()
+
+    assert "revision days" not in resumed.metrics.stages
+    assert "work orders" in resumed.metrics.stages
+    assert rows(resumed) == rows(expected)
+    assert resumed.ids.high_water_marks() == expected.ids.high_water_marks()
+
+
+@pytest.mark.parametrize("fail_at", ["R20 fix", "revision days", "attachments"])
+def test_resume_under_a_memory_budget(tmp_path, fail_at):
+    settings = dict(size=50, prob_noisy=0.3, prob_bad=0.2, max_memory_mb=0.0)
+    expected = AircraftGenerator(BaseConfig(**settings)).populate()
+
+    config = BaseConfig(**settings, checkpoint_dir=str(tmp_path))
+    failing = FailingGenerator(config)
+    failing.fail_at = fail_at
+    with pytest.raises(Interrupted):
+        failing.populate()
+
+    # tables still written by later stages come back as lists, the others
+    # are copied out of the run folder, which later stages clean up
+    resumed = AircraftGenerator(config).populate()
+    assert rows(resumed) == rows(expected)
+
+
+def test_resume_with_the_settings_of_the_run(tmp_path):
+    config = BaseConfig(size=30, seed=7, checkpoint_dir=str(tmp_path))
+    AircraftGenerator(config).populate()
+
+    assert RunCheckpoint(tmp_path).config(progress="none").seed == 7
+    # superseded tables are removed
+    assert len(list(tmp_path.joinpath("tables").iterdir())) == len(
+        [k for k, v in AircraftGenerator(config).populate().state.items() if len(v)])
+
+    with pytest.raises(CheckpointMismatch):
+        AircraftGenerator(BaseConfig(size=31, checkpoint_dir=str(tmp_path))).populate()
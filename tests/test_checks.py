@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+from acme_data_generation.scripts.checks import (
+    Check,
+    format_report,
+    parse_checks,
+    run_checks,
+)
+
+"""Tests the parsing and execution of the SQL check packs in tests-fixes"""
+
+checks_path = Path(__file__).parent.parent.joinpath("tests-fixes")
+
+
+@pytest.mark.parametrize("pack", ["AIMS-checks.sql", "AMOS-checks.sql"])
+def test_parse_check_packs(pack):
+    checks = parse_checks(checks_path / pack)
+
+    assert checks
+    # fixes are never run
+    assert all(check.sql.lower().startswith("select count") for check in checks)
+    assert all(check.name.startswith(check.rule) for check in checks)
+    assert len(set(check.name for check in checks)) == len(checks)
+
+
+def test_parse_unterminated_statements(tmp_path):
+    pack = tmp_path / "pack.sql"
+    pack.write_text(
+        "-- R1: something\n"
+        "select count(*) from a\n"
+        "where x = 1 -- 10 out of 100\n"
+        "\n"
+        "update a set x = 2\n"
+        "select count(distinct x), count(*) from a;\n"
+        "-- R2: something else\n"
+        "select count(*) from b where not exists (\n"
+        "select * from a)\n"
+    )
+
+    checks = parse_checks(pack)
+
+    assert [c.name for c in checks] == ["R1.1", "R1.2", "R2"]
+    assert checks[0].sql == "select count(*) from a where x = 1"
+
+
+def test_run_checks(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'checks.db'}")
+    engine.execute("create table a (x integer)")
+    engine.execute("insert into a values (1), (1), (2)")
+
+    checks = [
+        Check(name="R1", rule="R1", sql="select count(*) from a where x = 1", source=""),
+        Check(name="R2", rule="R2", sql="select count(distinct x), count(*) from a", source=""),
+        Check(name="R3", rule="R3", sql="select count(*) from missing", source=""),
+    ]
+
+    results = run_checks(engine, checks, workers=2)
+
+    assert [r.check.name for r in results] == ["R1", "R2", "R3"]
+    assert results[0].violations == 2
+    assert results[1].violations == 1
+    assert results[2].violations is None and results[2].error
+    assert "R3" in format_report(results)
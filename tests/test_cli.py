@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+"""Tests that the CLI starts without importing the generation and SQL stacks"""
+
+HEAVY_MODULES = [
+    "sqlalchemy",
+    "faker",
+    "tqdm",
+    "psycopg2",
+    "acme_data_generation.providers.airport",
+    "acme_data_generation.scripts.generate",
+]
+
+SCRIPT = """
+import json, sys
+sys.argv = ["airbase-gen"] + {argv!r}
+try:
+    from acme_data_generation.cli import base_parser
+    base_parser.parse_args()
+except SystemExit:
+    pass
+print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))
+"""
+
+
+def imported_modules(argv):
+    # a fresh interpreter, since the test session already imported everything
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(argv=argv, heavy=HEAVY_MODULES)],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    ).stdout
+    return json.loads(out.decode().splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        [],
+        ["--help"],
+        ["csv", "--help"],
+        ["sql", "--help"],
+        ["csv", "./out", "--progress", "spinner"],
+        ["sql", "-r", "100"],  # missing --db-pwd
+    ],
+)
+def test_cli_startup_is_lazy(argv):
+    assert imported_modules(argv) == []
@@ -1,5 +1,5 @@
 import pytest
-from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.base.config import SCALE_FACTOR_SIZES, BaseConfig, scale_sizes
 
 
 @pytest.mark.skip("not implemented")
@@ -15,3 +15,13 @@ def test_config_is_loaded(tmpdir):
 @pytest.mark.skip("not implemented")
 def test_config_loads_from_file(tmpdir):
     assert False
+
+
+def test_scale_sizes():
+    small, large = BaseConfig(**scale_sizes(1)), BaseConfig(**scale_sizes(10))
+
+    for field in SCALE_FACTOR_SIZES:
+        assert getattr(large, field) == 10 * getattr(small, field)
+
+    with pytest.raises(ValueError):
+        scale_sizes(0)
@@ -0,0 +1,61 @@
+import random
+from collections import Counter
+
+import pytest
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts.corruption import flip_case, quality_mask
+from acme_data_generation.scripts.generate import AircraftGenerator
+
+"""Tests the post-generation corruption pass"""
+
+
+@pytest.mark.parametrize("size", [0, 7, 100, 1001])
+def test_quality_mask_has_exact_rates(size):
+    mask = quality_mask(size, [0.6, 0.3, 0.1], random.Random(42))
+    counts = Counter(mask)
+
+    assert len(mask) == size
+    assert abs(counts["noisy"] - size * 0.3) < 1
+    assert abs(counts["bad"] - size * 0.1) < 1
+
+
+def test_flip_case_keeps_letters():
+    (column,) = flip_case([["acme", None]], random.Random(42))
+
+    assert column[0].lower() == "acme"
+    assert column[1] is None
+
+
+def test_corruption_pass_good_is_clean():
+    config = BaseConfig(size=100, corruption_pass=True)
+    ag = AircraftGenerator(config=config)
+    ag.populate()
+
+    assert set(ag.quality_masks["flight_slots"]) == {"good"}
+    for f in ag.flight_slots:
+        if not f.cancelled:
+            assert f.actualdeparture <= f.actualarrival
+
+
+def test_corruption_pass_bad():
+    config = BaseConfig(size=100, prob_bad=1, corruption_pass=True)
+    ag = AircraftGenerator(config=config)
+    ag.populate()
+
+    assert set(ag.quality_masks["flight_slots"]) == {"bad"}
+    for f in ag.flight_slots:
+        if not f.cancelled:
+            assert f.actualdeparture >= f.actualarrival
+        assert f.passengers > config.max_pas
+
+
+def test_corruption_pass_mixed_rates():
+    config = BaseConfig(
+        size=200, prob_good=0.5, prob_noisy=0.4, prob_bad=0.1, corruption_pass=True
+    )
+    ag = AircraftGenerator(config=config)
+    ag.populate()
+
+    counts = Counter(ag.quality_masks["flight_slots"])
+    assert counts == {"good": 100, "noisy": 80, "bad": 20}
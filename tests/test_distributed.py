@@ -0,0 +1,134 @@
+import csv
+import json
+import subprocess
+import sys
+
+import pytest
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts.distributed import (
+    ShardMismatch,
+    merge,
+    plan,
+    read_manifest,
+    shard_config,
+    write_manifest,
+)
+
+"""Tests that a dataset can be generated in shards, by independent processes"""
+
+
+@pytest.fixture()
+def manifest(tmp_path):
+    config = BaseConfig(size=30, fleet_size=5, personnel_list_size=7)
+    path = write_manifest(plan(config, num_shards=2, out=tmp_path / "out"), tmp_path / "m.json")
+
+    # one process per shard, standing in for nodes
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "acme_data_generation.cli", "run-shard", str(path),
+             "--shard", str(k), "--progress", "none"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for k in range(2)
+    ]
+    assert all(p.wait() == 0 for p in processes)
+
+    yield read_manifest(path)
+
+
+def test_plan():
+    manifest = plan(BaseConfig(size=11, fleet_size=5, personnel_list_size=7), 2, "out")
+    shards = manifest["shards"]
+
+    assert [s["fleet_start"] for s in shards] == [0, 3]
+    assert [s["flight_slots_size"] for s in shards] == [6, 5]
+    assert [s["personnel_list_size"] for s in shards] == [4, 3]
+    assert [s["work_packages_size"] for s in shards] == [6, 5]
+    assert len({s["seed"] for s in shards}) == 2
+
+    config = shard_config(manifest, 1)
+    assert (config.shard, config.num_shards, config.fleet_start) == (1, 2, 3)
+    assert config.tlb_orders_size == config.forecasted_orders_size == 5
+
+    with pytest.raises(ValueError):
+        plan(BaseConfig(fleet_size=5), 6, "out")
+
+
+def test_run_shards_and_merge(manifest, tmp_path):
+    merged = merge(manifest)
+
+    assert merged["flight_slots"] == 30
+    assert merged["manufacturers"] == 5
+    assert merged["maintenance_personnel"] == 7
+
+    with open(tmp_path / "out" / "merged" / "manufacturers.csv") as fp:
+        codes = [row["aircraft_reg_code"] for row in csv.DictReader(fp)]
+    assert codes == ["XY-AAA", "XY-AAB", "XY-AAC", "XY-AAD", "XY-AAE"]
+
+
+def test_run_shard_is_instrumented(tmp_path):
+    path = write_manifest(plan(BaseConfig(size=10, fleet_size=2), 1, tmp_path / "out"), tmp_path / "m.json")
+    profiles, metrics = tmp_path / "profiles", tmp_path / "metrics.json"
+    subprocess.run(
+        [sys.executable, "-m", "acme_data_generation.cli", "run-shard", str(path), "--shard", "0",
+         "--progress", "none", "--profile", "cprofile", "--profile-out", str(profiles),
+         "--metrics-out", str(metrics)],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    assert list(profiles.glob("*.prof"))
+    assert json.loads(metrics.read_text())
+
+
+def test_merge_detects_duplicate_ids(manifest, tmp_path):
+    shard0, shard1 = (tmp_path / "out" / f"shard-00{k}" for k in range(2))
+
+    # copy one work order of shard 0 into shard 1
+    with open(shard0 / "tlb_orders.csv") as fp:
+        row = fp.readlines()[1]
+    with open(shard1 / "tlb_orders.csv", "a") as fp:
+        fp.write(row)
+
+    report = json.loads((shard1 / "shard.json").read_text())
+    report["rows"]["tlb_orders"] += 1
+    (shard1 / "shard.json").write_text(json.dumps(report))
+
+    with pytest.raises(ShardMismatch, match="workorderid"):
+        merge(manifest)
+
+
+def test_merge_detects_foreign_registration_codes(manifest, tmp_path):
+    shard0, shard1 = (tmp_path / "out" / f"shard-00{k}" for k in range(2))
+
+    # copy one aircraft of shard 0 into shard 1
+    with open(shard0 / "manufacturers.csv") as fp:
+        row = fp.readlines()[1]
+    with open(shard1 / "manufacturers.csv", "a") as fp:
+        fp.write(row)
+
+    report = json.loads((shard1 / "shard.json").read_text())
+    report["rows"]["manufacturers"] += 1
+    (shard1 / "shard.json").write_text(json.dumps(report))
+
+    with pytest.raises(ShardMismatch, match="aircraft_reg_code"):
+        merge(manifest)
+
+
+def test_merge_checks_high_water_marks(manifest, tmp_path):
+    path = tmp_path / "out" / "shard-001" / "shard.json"
+    report = json.loads(path.read_text())
+    # the first id of shard 0
+    report["ids"]["workorders"] = 1
+    path.write_text(json.dumps(report))
+
+    with pytest.raises(ShardMismatch, match="outside its id blocks"):
+        merge(manifest)
+
+
+def test_merge_detects_missing_shards(manifest, tmp_path):
+    (tmp_path / "out" / "shard-001" / "shard.json").unlink()
+    with pytest.raises(ShardMismatch, match="no report"):
+        merge(manifest)
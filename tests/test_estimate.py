@@ -0,0 +1,40 @@
+import pytest
+
+from acme_data_generation.base.config import BaseConfig, scale_sizes
+from acme_data_generation.scripts.estimate import (
+    Rates,
+    calibrate,
+    estimate,
+    expected_rows,
+    format_estimate,
+)
+from acme_data_generation.scripts.generate import AircraftGenerator
+
+"""Tests that the dry-run estimate is close to what a run generates"""
+
+
+def test_expected_rows_follow_the_config():
+    config = BaseConfig(size=100, max_work_orders=3, max_work_packages=2, max_attach_size=2)
+    rows = expected_rows(config, Rates(delayed=0.5, events_per_slot=1.0))
+
+    assert rows["operational_interruptions"] == 50
+    assert rows["maintenance_events"] == 100
+    # 2 orders per event on average, within the sizes of both kinds
+    assert rows["forecasted_orders"] + rows["tlb_orders"] == 200
+    # one package per order, and no more than work_packages_size
+    assert rows["work_packages"] == 200
+    assert rows["attachments"] == 300
+
+
+def test_estimate_is_close_to_a_run():
+    config = BaseConfig(**scale_sizes(1), progress="none")
+    result = estimate(config, calibrate(config, sample_size=100))
+    ag = AircraftGenerator(config).populate()
+
+    for table in result.tables:
+        actual = len(ag.state[table.tablename])
+        assert table.rows == pytest.approx(actual, rel=0.15, abs=5), table.tablename
+        assert table.csv_mb > 0 and table.memory_mb > 0
+
+    report = format_estimate(result, shards=2)
+    assert "attachments" in report and "per shard" in report
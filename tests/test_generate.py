@@ -1,12 +1,17 @@
 import pytest
 import typing as T
+from collections import Counter
 from statistics import mean
 import re
+import json
+from datetime import datetime, timedelta
 
 from itertools import chain, permutations
 
 from acme_data_generation.scripts.generate import AircraftGenerator
-from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.base.config import BaseConfig, scale_sizes
+from acme_data_generation.models.declarative import amos
+from acme_data_generation.providers.airport import AirportProvider, fake_airport
 
 
 __doc__ = "Tests the generation of data"
@@ -369,4 +374,157 @@ def test_slots_with_same_aircraft_do_overlap_when_prob_bad_non_zero():
                 if min_end > max_start:
                     bad_checks_count += 1
 
-    assert bad_checks_count == 100
\ No newline at end of file
+    assert bad_checks_count == 100
+
+def test_serial_ids_are_unique():
+    """tests R1, R2, R3: ids are unique by construction (R8)"""
+
+    config = BaseConfig(size=100, id_block_size=16, max_work_packages=3)
+    ag = AircraftGenerator(config=config)
+    ag.populate()
+
+    workorderids = [wo.workorderid for wo in chain(ag.forecasted_orders, ag.tlb_orders)]
+    workpackageids = [wo.workpackage for wo in chain(ag.forecasted_orders, ag.tlb_orders)]
+    maintenanceids = [
+        me.maintenanceid.split("_")[0]
+        for me in chain(ag.operational_interruptions, ag.maintenance_events)
+    ]
+
+    assert len(workorderids) == len(set(workorderids))
+    assert len(workpackageids) == len(set(workpackageids))
+    assert len(maintenanceids) == len(set(maintenanceids))
+
+
+def test_work_packages_reference_their_order():
+    """tests R30: packages repeat the workpackage id of the order that produced them"""
+
+    config = BaseConfig(size=100, max_work_packages=3)
+    ag = AircraftGenerator(config=config)
+    ag.populate()
+
+    orders = {wo.workpackage: wo for wo in chain(ag.forecasted_orders, ag.tlb_orders)}
+    packages = Counter(wp.workpackageid for wp in ag.work_packages)
+
+    assert set(packages) == set(orders)
+    assert all(1 <= n <= config.max_work_packages for n in packages.values())
+    for wp in ag.work_packages:
+        order = orders[wp.workpackageid]
+        assert (wp.executiondate, wp.executionplace) == (order.executiondate, order.executionplace)
+
+
+def test_populate_metrics(tmp_path):
+    metrics_path = tmp_path / "metrics.json"
+    config = BaseConfig(size=10, metrics_path=str(metrics_path))
+    ag = AircraftGenerator(config=config)
+    ag.populate()
+
+    assert [m.name for m in ag.metrics][:3] == [
+        "maintenance personnel",
+        "fleet",
+        "flight slots",
+    ]
+    assert ag.metrics["flight slots"].rows == len(ag.flight_slots)
+    assert ag.metrics["attachments"].rows == len(ag.attachments)
+    assert all(m.wall_time >= 0 for m in ag.metrics)
+
+    # metrics are not a table
+    assert "metrics" not in ag.state
+
+    report = json.loads(metrics_path.read_text())
+    assert len(report["stages"]) == len(ag.metrics)
+
+
+def test_populate_with_fast_primitives():
+    config = BaseConfig(size=50, fast_primitives=True)
+    ag = AircraftGenerator(config).populate()
+
+    assert len(ag.flight_slots) == 50
+    assert all(len(a.file) == 36 for a in ag.attachments)
+
+    # the provider is shared, the next run gets Faker's primitives back
+    AircraftGenerator(BaseConfig(size=1)).populate()
+    provider = next(
+        p for p in fake_airport.get_providers() if isinstance(p, AirportProvider))
+    assert not provider.fast_primitives
+
+
+def test_timeline_engine_slots_never_overlap():
+    config = BaseConfig(size=200, fleet_size=5, engine="timeline")
+    ag = AircraftGenerator(config).populate()
+
+    assert len(ag.flight_slots) == 200
+    assert len(ag.maintenance_slots) == 200
+    assert "R20 fix" not in ag.metrics.stages
+
+    # flights and maintenance of each aircraft follow each other
+    intervals = {}
+    for slot in chain(ag.flight_slots, ag.maintenance_slots):
+        start = getattr(slot, "actualdeparture", None) or slot.scheduleddeparture
+        end = getattr(slot, "actualarrival", None) or slot.scheduledarrival
+        intervals.setdefault(slot.aircraftregistration, []).append((start, end))
+
+    assert len(intervals) == 5
+    for slots in intervals.values():
+        slots.sort()
+        assert all(end <= next_start for (_, end), (next_start, _) in zip(slots, slots[1:]))
+
+
+def test_timeline_engine_slots_stay_in_range():
+    config = BaseConfig(size=100, fleet_size=5, engine="timeline", prob_noisy=0.25, prob_bad=0.25)
+    ag = AircraftGenerator(config).populate()
+
+    for slot in chain(ag.flight_slots, ag.maintenance_slots):
+        end = max(slot.scheduledarrival, getattr(slot, "actualarrival", None) or slot.scheduledarrival)
+        assert AirportProvider._offset_timestamp <= slot.scheduleddeparture
+        assert end <= AirportProvider._end_timestamp
+
+
+def test_order_and_package_sizes_are_honored():
+    config = BaseConfig(
+        size=100,
+        max_work_orders=3,
+        tlb_orders_size=40,
+        forecasted_orders_size=60,
+        max_work_packages=4,
+        work_packages_size=150,
+    )
+    ag = AircraftGenerator(config=config).populate()
+
+    assert len(ag.tlb_orders) == 40
+    assert len(ag.forecasted_orders) == 60
+    assert len(ag.work_packages) == 150
+
+
+def test_scale_factor_row_counts():
+    ag = AircraftGenerator(BaseConfig(**scale_sizes(1))).populate()
+
+    assert len(ag.manufacturers) == len({m.aircraft_reg_code for m in ag.manufacturers}) == 20
+    assert len(ag.maintenance_personnel) == 500
+    assert len(ag.tlb_orders) == len(ag.forecasted_orders) == 500
+    assert len(ag.work_packages) == 1000
+
+
+def test_revisions_are_split_in_days(config):
+    start = datetime(2020, 1, 1, 8)
+    events = [
+        amos.MaintenanceEvent(maintenanceid="1", aircraftregistration="XY-ABC", starttime=start,
+                              duration=timedelta(days=2, hours=3), kind="Revision"),
+        amos.MaintenanceEvent(maintenanceid="2", aircraftregistration="XY-ABC", starttime=start,
+                              duration=timedelta(hours=5), kind="Maintenance"),
+        amos.MaintenanceEvent(maintenanceid="3", aircraftregistration="XY-ABC", starttime=start,
+                              duration=timedelta(days=1), kind="Revision"),
+    ]
+    ag = AircraftGenerator(config=config)
+    ag.maintenance_events = events
+
+    assert ag._split_revisions() == 2
+    rows = list(ag.maintenance_events)
+
+    assert [r.maintenanceid for r in rows] == ["1", "1", "1", "2", "3"]
+    # distinct rows, one per day of the revision
+    assert [r.starttime for r in rows[:3]] == [start + timedelta(days=k) for k in range(3)]
+    assert all(r.duration == timedelta(days=1) for r in rows[:3])
+    assert len({id(r) for r in rows}) == len(rows)
+    # other events are left as they are
+    assert rows[3].as_dict() == events[1].as_dict()
+    assert rows[4].as_dict() == events[2].as_dict()
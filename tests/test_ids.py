@@ -0,0 +1,61 @@
+import pytest
+
+from acme_data_generation.base.ids import IdAllocator, IdBlock, IdBlockExhausted
+
+"""Tests that serial ids are unique by construction (R8)"""
+
+
+def test_ids_are_serial():
+    ids = IdAllocator(block_size=3)
+    assert [ids.next_id("workorders") for _ in range(7)] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_ids_are_independent_per_table():
+    ids = IdAllocator(block_size=3)
+    ids.next_id("workorders")
+    ids.next_id("workorders")
+
+    assert ids.next_id("workpackages") == 1
+    assert ids.high_water_marks() == {"workorders": 2, "workpackages": 1}
+
+
+@pytest.mark.parametrize("num_shards", [1, 2, 5])
+def test_shards_dont_collide(num_shards):
+    shards = [
+        IdAllocator(block_size=4, shard=k, num_shards=num_shards)
+        for k in range(num_shards)
+    ]
+    drawn = [ids.next_id("workorders") for ids in shards for _ in range(10)]
+
+    assert len(drawn) == len(set(drawn))
+    assert all(
+        ids.owner("workorders", ids.next_id("workorders")) == ids.shard for ids in shards)
+
+
+def test_ids_start_from_high_water_mark():
+    ids = IdAllocator(block_size=10, start={"workorders": 101})
+    assert ids.next_id("workorders") == 101
+    assert ids.next_id("workpackages") == 1
+    assert ids.owner("workorders", 100) is None
+
+
+def test_block_is_exhausted():
+    block = IdBlock(start=1, stop=3)
+    block.next_id()
+    block.next_id()
+
+    with pytest.raises(IdBlockExhausted):
+        block.next_id()
+
+
+def test_state_roundtrip():
+    ids = IdAllocator(block_size=3, shard=1, num_shards=2, start={"workorders": 11})
+    [ids.next_id("workorders") for _ in range(4)]
+    ids.next_id("workpackages")
+
+    restored = IdAllocator()
+    restored.setstate(ids.getstate())
+
+    assert [restored.next_id("workorders") for _ in range(5)] == [
+        ids.next_id("workorders") for _ in range(5)]
+    assert restored.next_id("maintenance") == ids.next_id("maintenance")
@@ -0,0 +1,95 @@
+import csv
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from concurrent.futures.process import BrokenProcessPool
+
+from acme_data_generation.scripts import pipeline
+from acme_data_generation.scripts.pipeline import (
+    ColumnarSink,
+    CsvSink,
+    Pipeline,
+    Sink,
+    table_chunks,
+)
+
+
+class SlowSink(Sink):
+    def write(self, chunk):
+        time.sleep(0.02)
+
+
+class FailingSink(Sink):
+    def write(self, chunk):
+        raise RuntimeError("disk full")
+
+
+def killed_shard(manifest, shard, chunk_size):
+    # as the OOM killer would
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def test_csv_pipeline(config, tmp_path):
+    config.size = 100
+    stats = Pipeline(config, CsvSink(tmp_path), workers=2, writers=2, chunk_size=30).run()
+
+    for tablename, rows in stats.rows.items():
+        with tmp_path.joinpath(f"{tablename}.csv").open(newline="") as fp:
+            assert len(list(csv.DictReader(fp))) == rows
+
+    assert stats.rows["flight_slots"] == config.flight_slots_size
+    assert stats.queues["generated"].items == sum(
+        q.items for name, q in stats.queues.items() if name != "generated")
+    assert all(q.max_depth <= q.maxsize for q in stats.queues.values())
+
+
+def test_columnar_pipeline_rechunks(config, tmp_path):
+    config.size = 100
+    sink = ColumnarSink(tmp_path, chunk_size=7)
+    stats = Pipeline(config, sink, workers=2, chunk_size=30).run()
+
+    assert {k: len(v) for k, v in sink.tables.items()} == stats.rows
+    assert len(list(sink.tables["maintenance_events"])) == stats.rows["maintenance_events"]
+
+
+def test_slow_sink_is_the_bottleneck(config):
+    config.size = 100
+    stats = Pipeline(config, SlowSink(), workers=2, writers=1, queue_size=1, chunk_size=5).run()
+
+    assert stats.bottleneck == "write"
+
+
+def test_sink_errors_are_raised(config):
+    config.size = 20
+    with pytest.raises(RuntimeError, match="disk full"):
+        Pipeline(config, FailingSink(), workers=1, queue_size=1, chunk_size=5).run()
+
+
+def test_killed_worker_aborts_the_run(config, tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "_generate_shard", killed_shard)
+    monkeypatch.setattr(pipeline, "POLL_INTERVAL", 0.1)
+    with pytest.raises(BrokenProcessPool):
+        Pipeline(config, CsvSink(tmp_path), workers=1).run()
+
+
+def test_table_chunks(gen):
+    chunks = list(table_chunks("flight_slots", gen.flight_slots, chunk_size=4))
+
+    assert sum(len(c.rows) for c in chunks) == len(gen.flight_slots)
+    assert chunks[0].as_dicts()[0] == gen.flight_slots[0].as_dict()
+
+
+@pytest.mark.parametrize("option", [["--cache-dir", "cache"], ["--metrics-out", "m.json"], ["--profile", "cprofile"]])
+def test_cli_rejects_options_the_pipeline_ignores(tmp_path, option):
+    result = subprocess.run(
+        [sys.executable, "-m", "acme_data_generation.cli", "csv", str(tmp_path), "-w", "2", *option],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 2
+    assert "can't be combined with -w/--workers" in result.stderr
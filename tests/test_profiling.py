@@ -0,0 +1,49 @@
+import pstats
+import tracemalloc
+
+import pytest
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts.generate import AircraftGenerator
+from acme_data_generation.scripts.profiling import StageProfiler
+
+"""Tests that generation stages are profiled separately"""
+
+
+@pytest.mark.parametrize("kind", ["cprofile", "tracemalloc"])
+def test_profile_stages(tmp_path, kind):
+    profiler = StageProfiler(kind, tmp_path / "profiles", top=5)
+    ag = AircraftGenerator(BaseConfig(size=10), profiler=profiler)
+    ag.populate()
+
+    # one file per stage
+    assert len(profiler.files) == len(ag.stages)
+    assert all(f.exists() for f in profiler.files)
+    assert set(profiler.summaries) == set(name for name, _ in ag.stages)
+
+    if kind == "cprofile":
+        stats = pstats.Stats(str(profiler.files[2]))
+        assert any(func[2] == "slot" for func in stats.stats)
+    else:
+        assert tracemalloc.Snapshot.load(str(profiler.files[0])).traces
+
+
+def test_tracemalloc_is_left_as_found(tmp_path):
+    profiler = StageProfiler("tracemalloc", tmp_path)
+    with profiler.stage("first"):
+        pass
+    assert not tracemalloc.is_tracing()
+
+    tracemalloc.start()
+    try:
+        with profiler.stage("second"):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert len(profiler.files) == 2
+
+
+def test_profiler_kind_is_validated(tmp_path):
+    with pytest.raises(ValueError):
+        StageProfiler("perf", tmp_path)
@@ -0,0 +1,69 @@
+import logging
+
+import pytest
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.scripts.generate import AircraftGenerator
+from acme_data_generation.scripts.progress import (
+    LogReporter,
+    ProgressReporter,
+    get_reporter,
+)
+
+"""Tests that progress is reported per chunk, not per row"""
+
+
+class CountingReporter(ProgressReporter):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.started = []
+        self.updates = []
+
+    def start(self, stage, total, unit):
+        self.started.append((stage, total))
+
+    def update(self, n):
+        self.updates.append(n)
+
+
+def test_chunks():
+    progress = CountingReporter(chunk_size=4)
+    chunks = list(progress.chunks(range(10), stage="test"))
+
+    assert chunks == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert progress.started == [("test", 10)]
+    assert progress.updates == [4, 4, 2]
+
+
+def test_log_reporter(caplog):
+    progress = LogReporter(chunk_size=10, interval=0)
+    with caplog.at_level(logging.INFO):
+        for _ in progress.chunks(range(100), stage="flight slots"):
+            pass
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert len(messages) == 11
+    assert "ETA" in messages[0]
+    assert messages[-1].startswith("flight slots: 100 rows in")
+
+
+def test_get_reporter():
+    with pytest.raises(ValueError):
+        get_reporter("spinner")
+
+    with pytest.raises(ValueError):
+        BaseConfig(progress="spinner")
+
+
+def test_generator_reports_per_chunk(tmp_path):
+    config = BaseConfig(size=25, progress="none", progress_chunk_size=10)
+    ag = AircraftGenerator(config)
+    ag.progress = CountingReporter(chunk_size=10)
+    ag.populate()
+
+    stages = dict(ag.progress.started)
+    assert stages["flight slots"] == 25
+    assert len(ag.progress.updates) < ag.total_instances
+
+    ag.to_csv(tmp_path)
+    assert ("flight_slots.csv", 25) in ag.progress.started
@@ -3,6 +3,7 @@ import pytest
 import typing as T
 import datetime
 import re
+import uuid
 
 """Tests that the airport random generator behaves according to some rules"""
 
@@ -148,4 +149,72 @@ def test_tlb_orders_have_valid_executiondate(fake):
 
     tlb = fake.technical_logbook_order()
     assert tlb.executiondate <= tlb.due
-    assert tlb.executiondate >= tlb.reportingdate
\ No newline at end of file
+    assert tlb.executiondate >= tlb.reportingdate
+
+def test_fast_primitives(fake):
+
+    fake.use_fast_primitives()
+    start, end = datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 2)
+
+    assert re.search(r"^XY-[A-Z]{3}$", "XY-" + fake.fast_lexify("???", "ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    assert re.search(r"^MSN [1-9]{4}$", fake.fast_numerify("MSN %%%%"))
+    assert re.search(r"^\d{0,2}$", fake.fast_numerify("!@"))
+    assert all(start <= fake.fast_date_time_between(start, end) <= end for _ in range(100))
+    assert fake.fast_date_time_between(end, start) == end
+    assert {fake.fast_pybool() for _ in range(100)} == {True, False}
+
+    value = fake.fast_uuid4()
+    assert str(uuid.UUID(value)) == value
+    assert uuid.UUID(value).version == 4
+
+
+def test_fast_primitives_are_seedable(fake):
+
+    fake.use_fast_primitives()
+    fake.seed_instance(1)
+    first = [fake.fast_uuid4(), fake.fast_numerify("%%%%"), fake.manufacturer_serial_number()]
+    fake.seed_instance(1)
+    assert first == [fake.fast_uuid4(), fake.fast_numerify("%%%%"), fake.manufacturer_serial_number()]
+
+
+def test_uuid4_batch(fake):
+
+    fake.seed_instance(1)
+    values = fake.uuid4_batch(1000)
+
+    assert len(set(values)) == 1000
+    for value in values:
+        assert str(uuid.UUID(value)) == value
+        assert uuid.UUID(value).version == 4
+
+    fake.seed_instance(1)
+    assert fake.uuid4_batch(1000) == values
+    assert fake.uuid4_batch(0) == []
+
+
+def test_attachment_columns(fake):
+
+    columns = fake.attachment_columns(["1_a", "2_b"], per_event=3)
+
+    assert columns["event"] == ["1_a"] * 3 + ["2_b"] * 3
+    assert len(set(columns["file"])) == 6
+
+
+def test_fast_primitives_entities(fake):
+
+    fake.use_fast_primitives()
+
+    test_maintenance_slot(fake)
+    test_forecasted_orders_have_valid_executiondate(fake)
+    test_tlb_orders_have_valid_executiondate(fake)
+    assert re_aircraftregistration.search(fake.aircraft_registration_code())
+
+
+def test_aircraft_registration_code_by_index(fake):
+
+    assert fake.aircraft_registration_code(index=0) == "XY-AAA"
+    assert fake.aircraft_registration_code(index=27) == "XY-ABB"
+    assert fake.aircraft_registration_code(index=26 ** 3 - 1) == "XY-ZZZ"
+
+    with pytest.raises(ValueError):
+        fake.aircraft_registration_code(index=26 ** 3)
@@ -0,0 +1,50 @@
+import random
+from collections import Counter
+
+import pytest
+
+from acme_data_generation.providers.airport import AirportProvider
+from acme_data_generation.providers.reference import ReferenceTable
+
+"""Tests for the array-backed reference tables of the provider"""
+
+
+def test_reference_table():
+    table = ReferenceTable(["BCN", "VIE", "BRU"])
+
+    assert len(table) == 3
+    assert list(table) == ["BCN", "VIE", "BRU"]
+    assert table[1] == "VIE"
+    assert "BRU" in table and "JFK" not in table
+    assert table.code("BRU") == 2
+    assert list(table.codes) == [0, 1, 2]
+    # values are interned, so encoding can compare by identity
+    assert table.decode([0])[0] is table.values[0]
+
+    with pytest.raises(ValueError):
+        ReferenceTable([])
+    with pytest.raises(ValueError):
+        ReferenceTable(["BCN"], weights=[1, 2])
+
+
+def test_sampling_is_seedable():
+    table = AirportProvider._airport_codes
+    assert table.sample(random.Random(1), 50) == table.sample(random.Random(1), 50)
+    assert all(v in table for v in table.sample(random.Random(1), 50))
+
+
+def test_weighted_sampling():
+    table = ReferenceTable(["A", "B", "C"], weights=[0, 1, 3])
+    counts = Counter(table.sample(random.Random(42), 4000))
+
+    assert counts["A"] == 0
+    assert 2700 < counts["C"] < 3300
+
+
+def test_provider_vocabularies(fake):
+    assert fake.airport_code() in AirportProvider._airport_codes
+    assert fake.ata_code() in AirportProvider._ata_codes
+    assert len(set(fake.flight_route())) == 2
+
+    assert fake.delay_code() in AirportProvider._delay_codes
+    assert fake.aircraft_model() in AirportProvider._aircraft_models
@@ -0,0 +1,181 @@
+import csv
+from datetime import datetime, timedelta
+
+import pytest
+
+from acme_data_generation.base.config import BaseConfig
+from acme_data_generation.providers.airport import AirportProvider
+from acme_data_generation.scripts.generate import AircraftGenerator
+from acme_data_generation.scripts.store import (
+    CategoricalColumn,
+    ColumnarTable,
+    MappedTable,
+    SpilledTable,
+    Vocabulary,
+    estimate_size_mb,
+    repeat_column,
+)
+
+"""Tests the on-disk storage of generated tables"""
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_spilled_table_roundtrip(tmp_path, fake, chunk_size):
+    rows = [fake.flight_slot() for _ in range(10)]
+    table = SpilledTable.spill(rows, tmp_path / "flight_slots", chunk_size=chunk_size)
+
+    assert len(table) == len(rows)
+    assert [r.as_dict() for r in table] == [r.as_dict() for r in rows]
+    assert table[0].as_dict() == rows[0].as_dict()
+    assert table[-1].as_dict() == rows[-1].as_dict()
+    assert type(table[0]) is type(rows[0])
+
+
+def test_repeat_column():
+    assert repeat_column(["a", "b", "c"], [2, 0, 3]) == ["a", "a", "c", "c", "c"]
+    assert repeat_column([10, None], [3, 2], step=5) == [10, 15, 20, None, None]
+    assert repeat_column([1, 2], [1, 2], fill=0) == [1, 0, 0]
+
+    start = datetime(2020, 1, 1)
+    days = repeat_column([start], [3], step=timedelta(days=1))
+    assert days == [start + timedelta(days=k) for k in range(3)]
+
+
+def test_columnar_table(tmp_path, fake):
+    rows = [fake.flight_slot() for _ in range(10)]
+    table = ColumnarTable.from_rows(rows, chunk_size=3)
+
+    assert len(table) == len(rows)
+    assert [r.as_dict() for r in table] == [r.as_dict() for r in rows]
+    assert [r.as_dict() for r in table[2:4]] == [r.as_dict() for r in rows[2:4]]
+    assert type(table[-1]) is type(rows[-1])
+    assert estimate_size_mb(table) > 0
+
+    # it can be spilled as any other table
+    spilled = SpilledTable.spill(table, tmp_path / "flight_slots")
+    assert [r.as_dict() for r in spilled] == [r.as_dict() for r in rows]
+
+
+def test_categorical_columns(fake):
+    rows = [fake.flight_slot() for _ in range(50)]
+    vocabulary = Vocabulary()
+    table = ColumnarTable.from_rows(rows, vocabulary=vocabulary)
+
+    airports = table.column("departureairport")
+    assert isinstance(airports, CategoricalColumn)
+    assert not isinstance(table.column("flightid"), CategoricalColumn)
+    assert list(airports) == [r.departureairport for r in rows]
+    assert [r.as_dict() for r in table] == [r.as_dict() for r in rows]
+
+    # one vocabulary for every column
+    assert len(vocabulary) == len({
+        v for r in rows for v in (r.departureairport, r.arrivalairport, r.delaycode, r.kind)})
+    assert airports.value_counts() == {
+        a: sum(1 for r in rows if r.departureairport == a) for a in set(airports)}
+    for airport, indices in airports.group_indices().items():
+        assert all(rows[k].departureairport == airport for k in indices)
+
+    # repeated rows keep their codes
+    repeated = table.repeat([2] * len(rows))
+    assert isinstance(repeated.column("departureairport"), CategoricalColumn)
+    assert list(repeated.column("departureairport")) == [a for a in airports for _ in range(2)]
+
+
+def test_vocabulary_reuses_reference_codes(fake):
+    airports, delays = AirportProvider._airport_codes, AirportProvider._delay_codes
+    vocabulary = Vocabulary([airports, delays])
+
+    assert len(vocabulary) == len(airports) + len(delays)
+    assert vocabulary.code("VIE") == airports.code("VIE")
+    assert vocabulary.code("93") == len(airports) + delays.code("93")
+
+    rows = [fake.flight_slot(quality=q) for q in ("good", "noisy", "bad") * 10]
+    table = ColumnarTable.from_rows(rows, vocabulary=vocabulary)
+    assert [r.as_dict() for r in table] == [r.as_dict() for r in rows]
+    codes = table.column("departureairport").codes
+    assert all(code == airports.code(r.departureairport)
+               for code, r in zip(codes, rows) if r.departureairport in airports)
+
+
+def test_compact_tables_write_the_same_csv(tmp_path):
+    plain = AircraftGenerator(BaseConfig(size=100, prob_noisy=0.2, prob_bad=0.2))
+    compact = AircraftGenerator(BaseConfig(size=100, prob_noisy=0.2, prob_bad=0.2, compact_tables=True))
+    plain.populate().to_csv(tmp_path / "plain")
+    compact.populate().to_csv(tmp_path / "compact")
+
+    assert isinstance(compact.flight_slots, ColumnarTable)
+    for tablename in plain.state:
+        assert (tmp_path / "plain" / f"{tablename}.csv").read_text() == \
+            (tmp_path / "compact" / f"{tablename}.csv").read_text()
+
+
+def test_mapped_table(tmp_path, fake):
+    rows = [fake.flight_slot(quality=q) for q in ("good", "noisy", "bad") * 10]
+    table = MappedTable.write(rows, tmp_path / "flight_slots", chunk_size=7)
+
+    assert len(table) == len(rows)
+    assert [r.as_dict() for r in table] == [r.as_dict() for r in rows]
+    # constant time random access, from the files alone
+    reopened = MappedTable(tmp_path / "flight_slots")
+    assert reopened[17].as_dict() == rows[17].as_dict()
+    assert reopened[-1].as_dict() == rows[-1].as_dict()
+    assert list(reopened.column("delaycode")[3:9]) == [r.delaycode for r in rows[3:9]]
+    assert table.column("scheduleddeparture").kind == "datetime"
+
+    reopened.close()
+    assert all(m.closed for column in reopened.data.values() for m in column.maps)
+    with pytest.raises(ValueError):
+        reopened[0]
+
+    # any table can be mapped, and spilled from its columns
+    columnar = ColumnarTable.from_rows(rows, vocabulary=Vocabulary())
+    mapped = MappedTable.write(columnar, tmp_path / "columnar")
+    spilled = SpilledTable.spill(mapped, tmp_path / "spilled")
+    assert [r.as_dict() for r in spilled] == [r.as_dict() for r in rows]
+
+
+def test_mapped_tables_write_the_same_csv(tmp_path):
+    plain = AircraftGenerator(BaseConfig(size=100, prob_noisy=0.2, prob_bad=0.2))
+    mapped = AircraftGenerator(BaseConfig(
+        size=100, prob_noisy=0.2, prob_bad=0.2, mapped_tables=True, spill_dir=str(tmp_path)))
+    plain.populate().to_csv(tmp_path / "plain")
+    mapped.populate().to_csv(tmp_path / "mapped")
+
+    assert all(isinstance(rows, MappedTable) for rows in mapped.state.values())
+    for tablename in plain.state:
+        assert (tmp_path / "plain" / f"{tablename}.csv").read_text() == \
+            (tmp_path / "mapped" / f"{tablename}.csv").read_text()
+
+    # the maps and the scratch folder go away with close()
+    tables = list(mapped.state.values())
+    mapped.close()
+    assert all(m.closed for table in tables for column in table.data.values() for m in column.maps)
+    assert not list(tmp_path.glob("acme-spill-*"))
+
+
+def test_estimate_size(fake):
+    rows = [fake.manufacturer() for _ in range(10)]
+    assert 0 < estimate_size_mb(rows) < estimate_size_mb(rows * 10)
+
+
+@pytest.mark.parametrize("corruption_pass", [False, True])
+def test_populate_spills_over_budget(tmp_path, corruption_pass):
+    config = BaseConfig(
+        size=50,
+        max_memory_mb=0,
+        spill_dir=str(tmp_path),
+        corruption_pass=corruption_pass,
+    )
+    ag = AircraftGenerator(config=config)
+    ag.populate()
+
+    spilled = [k for k, v in ag.state.items() if isinstance(v, SpilledTable)]
+    assert "maintenance_personnel" in spilled
+    assert "attachments" in spilled
+
+    out = tmp_path / "out"
+    ag.to_csv(out)
+
+    for tablename, rows in ag.state.items():
+        with out.joinpath(f"{tablename}.csv").open("rt") as fp:
+            assert sum(1 for _ in csv.reader(fp)) == len(rows) + 1
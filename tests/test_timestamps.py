@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from faker import Faker
+
+from acme_data_generation.base.timestamps import from_epoch, seconds, to_epoch
+from acme_data_generation.providers.airport import AirportProvider
+
+"""Tests for the epoch representation of timestamps"""
+
+
+def test_epoch_round_trip():
+    timestamps = [datetime(2010, 1, 1), datetime(2016, 2, 29, 23, 59, 59), datetime(1920, 5, 1)]
+
+    assert all(from_epoch(to_epoch(t)) == t for t in timestamps)
+    assert seconds(days=1, hours=2, minutes=3) == timedelta(days=1, hours=2, minutes=3).total_seconds()
+
+
+def test_flight_epochs(fake):
+    epochs = [fake.flight_epoch() for _ in range(100)]
+    assert all(AirportProvider._offset_epoch <= e <= AirportProvider._end_epoch for e in epochs)
+
+    bad = fake.flight_timestamp(quality="bad")
+    assert not (AirportProvider._offset_timestamp <= bad <= AirportProvider._end_timestamp)
+
+
+def test_slot_timestamps(fake):
+    for _ in range(50):
+        slot = fake.flight_slot(cancelled=False)
+        delay = slot.actualdeparture - slot.scheduleddeparture
+
+        assert slot.scheduleddeparture <= slot.scheduledarrival
+        assert timedelta() <= delay <= timedelta(minutes=40)
+        assert slot.actualarrival - slot.scheduledarrival == delay
+
+
+def test_epoch_ad_matches_date_time_ad(fake):
+    provider = AirportProvider(fake)
+    start, end = datetime(2012, 3, 1), datetime(2012, 4, 1, 12)
+
+    Faker.seed(3)
+    expected = [fake.date_time_ad(start_datetime=start, end_datetime=end) for _ in range(20)]
+    Faker.seed(3)
+    assert [from_epoch(provider._epoch_ad(to_epoch(start), to_epoch(end))) for _ in range(20)] == expected
+
+
+def test_work_order_dates(fake):
+    for _ in range(50):
+        event = fake.maintenance_event()
+        fo = fake.forecasted_order(maintenance_event=event)
+        tlb = fake.technical_logbook_order(maintenance_event=event)
+
+        assert fo.planned <= fo.executiondate <= fo.deadline == event.starttime + event.duration
+        assert tlb.reportingdate <= tlb.executiondate <= tlb.due
+        assert tlb.due - event.starttime - event.duration == fake.mel_reporting_deadline_duration(tlb.mel)